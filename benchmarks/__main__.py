@@ -0,0 +1,121 @@
+"""
+benchmarks/__main__.py
+
+Suite de benchmarks du moteur d'envoi (depuis la racine du projet) :
+
+    python -m benchmarks                      # tous les cas, comparés à benchmarks/baseline.json
+    python -m benchmarks --quick              # tailles réduites (10^3 .. 10^4), rapport seul
+    python -m benchmarks -k dispatcher -o out.json
+    python -m benchmarks --save-baseline      # enregistre la baseline de référence
+
+Sortie JSON (-o) : environnement, comparaison à la baseline, puis par cas : ops, min/median/mean/stdev (s), calibration,
+ops_per_s (sur la médiane). Code de sortie 1 si le meilleur temps d'un cas dépasse celui
+de la baseline au-delà de --tolerance plus le bruit mesuré du cas, re-mesures comprises
+(--confirm). Avec --quick, la comparaison est affichée sans faire échouer (les petites
+tailles durent quelques millisecondes, dominées par le bruit) sauf --strict.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+from benchmarks import cases  # noqa: F401  (enregistre les cas)
+from benchmarks.harness import CASES, compare, run_all, run_case, select
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def _print_result(name: str, result: Dict[str, Any]) -> None:
+    if result["status"] != "ok":
+        print(f"{name:<45} ignoré ({result['reason']})")
+        return
+    print(f"{name:<45} {result['median_s'] * 1000:>10.2f} ms  {result['ops_per_s']:>14,.0f} ops/s")
+
+
+def _write(path: Optional[str], document: Dict[str, Any]) -> None:
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks du moteur d'envoi.")
+    parser.add_argument("-k", "--filter", help="sous-chaîne du nom des cas à exécuter")
+    parser.add_argument("--quick", action="store_true", help="uniquement les petites tailles")
+    parser.add_argument("--repeat", type=int, default=5, help="exécutions chronométrées par cas (défaut 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="exécutions d'échauffement (défaut 1)")
+    parser.add_argument("-o", "--output", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline de comparaison")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="ralentissement toléré (0.25 = +25 %%)")
+    parser.add_argument(
+        "--normalize", action="store_true",
+        help="corriger par la calibration (baseline enregistrée sur une autre machine)",
+    )
+    parser.add_argument(
+        "--confirm", type=int, default=2,
+        help="re-mesures d'un cas en régression avant de conclure (bruit machine, défaut 2)",
+    )
+    parser.add_argument("--strict", action="store_true", help="échouer sur régression même avec --quick")
+    parser.add_argument("--save-baseline", action="store_true", help="écrire les résultats dans --baseline")
+    args = parser.parse_args(argv)
+
+    if args.repeat < 1:
+        parser.error("--repeat doit être >= 1.")
+
+    report = run_all(select(args.filter, args.quick), repeat=args.repeat, warmup=args.warmup, progress=_print_result)
+
+    if args.save_baseline:
+        _write(args.output, report)
+        baseline: Dict[str, Any] = {"results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        # Fusion : un sous-ensemble (-k, --quick) ne retire pas les autres cas
+        baseline["environment"] = report["environment"]
+        baseline["results"].update({n: r for n, r in report["results"].items() if r["status"] == "ok"})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline enregistrée : {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        _write(args.output, report)
+        print(f"Pas de baseline ({args.baseline}) : aucune comparaison.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    normalize = args.normalize
+    rows = compare(report, baseline, tolerance=args.tolerance, normalize=normalize)
+    for _ in range(args.confirm):
+        flagged = [row for row in rows if row["regression"]]
+        if not flagged:
+            break
+        # Une régression doit se reproduire : on garde la meilleure mesure
+        for row in flagged:
+            again = {"results": {row["name"]: run_case(CASES[row["name"]], repeat=args.repeat, warmup=args.warmup)}}
+            (retry,) = compare(again, baseline, tolerance=args.tolerance, normalize=normalize)
+            if retry["ratio"] < row["ratio"]:
+                report["results"][row["name"]] = again["results"][row["name"]]
+        rows = compare(report, baseline, tolerance=args.tolerance, normalize=normalize)
+    regressions = [row for row in rows if row["regression"]]
+
+    _write(args.output, {**report, "comparison": rows})
+    for row in rows:
+        flag = "RÉGRESSION" if row["regression"] else "ok"
+        print(f"{row['name']:<45} x{row['ratio']:.2f} vs baseline (seuil x{row['threshold']:.2f})  {flag}")
+    if regressions:
+        print(f"{len(regressions)} régression(s) au-delà de +{args.tolerance:.0%} (+ bruit).", file=sys.stderr)
+        if args.quick and not args.strict:
+            print("--quick : rapport seul, code de sortie 0 (--strict pour échouer).", file=sys.stderr)
+            return 0
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""
+benchmarks/cases.py
+
+Cas de benchmark du moteur d'envoi (enregistrés dans harness.CASES à l'import).
+
+- priority_queue.add_pop[n=...] : n ajouts puis n retraits (10^3 .. 10^6)
+- dispatcher.dispatch[users=...] : schedule + dispatch de bout en bout sur une
+  population synthétique (contacts incomplets, priorités mélangées)
+- fallback.<mix>[n=...] : send_with_fallback avec pannes injectées par canal
+  (exceptions fournisseur ; disjoncteurs réinitialisés à chaque exécution)
+- descriptors.<cas>[n=...] : coût de validation des descripteurs
+- web.dispatch_from_form[n=...] : persistance DB (Django + SQLite temporaire),
+  ignoré si Django n'est pas installé
+
+Les logs des notificateurs sont configurés au niveau WARNING (vers un flux vide)
+pour ne pas mélanger la sortie et mesurer le moteur, pas le terminal.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import random
+import sys
+import tempfile
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.harness import register
+from core.dispatcher import Dispatcher
+from core.emergencies import EmergencyType
+from core.models import Notification, Priority, User, UserPreferences
+from core.notifiers import EmergencyNotifier
+from core.structured_logging import configure_logging
+from descriptors.validators import NotificationConfig
+from priority.priority_handler import PriorityQueue
+
+SEED = 20240601
+
+_QUIET = False
+
+
+def _once(build: Callable[[], Any]) -> Callable[[], Any]:
+    """Données d'un cas construites au premier setup (l'import de la suite reste instantané)."""
+    cache: List[Any] = []
+
+    def get() -> Any:
+        if not cache:
+            cache.append(build())
+        return cache[0]
+
+    return get
+
+
+def quiet_logging() -> None:
+    """Logs WARNING vers un flux vide (appelé une fois, avant la première mesure)."""
+    global _QUIET
+    if not _QUIET:
+        configure_logging(level="WARNING", stream=io.StringIO(), queue_size=1000)
+        _QUIET = True
+
+
+def population(n: int, seed: int = SEED) -> List[User]:
+    """
+    Population déterministe :
+    70 % avec téléphone, 60 % avec email, 40 % avec jeton push,
+    20 % avec un ordre de canaux personnalisé.
+    """
+    rng = random.Random(seed)
+    orders = [["email", "sms"], ["push", "sms", "email"], ["sms"]]
+    users = []
+    for i in range(n):
+        prefs = UserPreferences(enabled_channels=rng.choice(orders)) if rng.random() < 0.2 else UserPreferences()
+        users.append(
+            User(
+                user_id=f"u{i}",
+                phone="0812345678" if rng.random() < 0.7 else None,
+                email=f"u{i}@campus.test" if rng.random() < 0.6 else None,
+                push_token=f"tok{i}" if rng.random() < 0.4 else None,
+                preferences=prefs,
+            )
+        )
+    return users
+
+
+# ------------------------------------------------------------
+# PriorityQueue
+# ------------------------------------------------------------
+
+def _queue_case(n: int) -> Callable[[], Callable[[], Any]]:
+    def build() -> List[Priority]:
+        rng = random.Random(SEED)
+        return [rng.choice(list(Priority)) for _ in range(n)]
+
+    data = _once(build)
+
+    def setup() -> Callable[[], Any]:
+        priorities = data()
+        queue = PriorityQueue()
+
+        def run() -> None:
+            add = queue.add
+            for i, p in enumerate(priorities):
+                add(i, p)
+            get_next = queue.get_next
+            while get_next() is not None:
+                pass
+
+        return run
+
+    return setup
+
+
+for _exp in range(3, 7):
+    _n = 10 ** _exp
+    register(f"priority_queue.add_pop[n={_n}]", _queue_case(_n), ops=2 * _n, quick=_n <= 10_000)
+
+
+# ------------------------------------------------------------
+# Dispatcher de bout en bout
+# ------------------------------------------------------------
+
+def _dispatch_case(n: int) -> Callable[[], Callable[[], Any]]:
+    def build() -> List[Tuple[Notification, User]]:
+        rng = random.Random(SEED + 1)
+        alerts = [
+            Notification(emergency_type=t, priority=p, message=f"{t.name} {p.name}")
+            for t in EmergencyType
+            for p in Priority
+        ]
+        return [(rng.choice(alerts), user) for user in population(n)]
+
+    data = _once(build)
+
+    def setup() -> Callable[[], Any]:
+        plan = data()
+        quiet_logging()
+        dispatcher = Dispatcher()
+        notifier = EmergencyNotifier()
+
+        def run() -> None:
+            for alert, user in plan:
+                dispatcher.schedule(alert, user, notifier)
+            dispatcher.dispatch()
+
+        return run
+
+    return setup
+
+
+for _n in (1_000, 10_000, 100_000):
+    register(f"dispatcher.dispatch[users={_n}]", _dispatch_case(_n), ops=_n, quick=_n <= 10_000)
+
+
+# ------------------------------------------------------------
+# FallbackMixin sous pannes
+# ------------------------------------------------------------
+
+# Probabilité d'exception fournisseur par canal
+FAILURE_MIXES: Dict[str, Dict[str, float]] = {
+    "healthy": {"sms": 0.0, "email": 0.0, "push": 0.0},
+    "sms_flaky": {"sms": 0.3, "email": 0.0, "push": 0.0},
+    "sms_down": {"sms": 1.0, "email": 0.0, "push": 0.0},
+    "degraded": {"sms": 0.5, "email": 0.5, "push": 0.1},
+}
+
+
+class FaultyNotifier(EmergencyNotifier):
+    """Notificateur dont les canaux lèvent une exception selon une probabilité (graine fixe)."""
+    circuit_breaker_scope = "benchmark"
+
+    def __init__(self, failure_rates: Dict[str, float], seed: int = SEED) -> None:
+        self.failure_rates = failure_rates
+        self._rng = random.Random(seed)
+
+    def _maybe_fail(self, channel: str) -> None:
+        if self._rng.random() < self.failure_rates.get(channel, 0.0):
+            raise ConnectionError(f"{channel} provider unavailable")
+
+    def send_sms(self, notification, user):
+        self._maybe_fail("sms")
+        return super().send_sms(notification, user)
+
+    def send_email(self, notification, user):
+        self._maybe_fail("email")
+        return super().send_email(notification, user)
+
+    def send_push(self, notification, user):
+        self._maybe_fail("push")
+        return super().send_push(notification, user)
+
+
+def _fallback_case(rates: Dict[str, float], n: int) -> Callable[[], Callable[[], Any]]:
+    data = _once(
+        lambda: [
+            User(user_id=f"u{i}", phone="0812345678", email=f"u{i}@campus.test", push_token=f"tok{i}")
+            for i in range(n)
+        ]
+    )
+    alert = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.HIGH, message="Alerte")
+
+    def setup() -> Callable[[], Any]:
+        users = data()
+        quiet_logging()
+        FaultyNotifier.reset_circuit_breakers()
+        notifier = FaultyNotifier(rates)
+
+        def run() -> None:
+            send = notifier.send_with_fallback
+            for user in users:
+                send(alert, user)
+
+        return run
+
+    return setup
+
+
+for _mix, _rates in FAILURE_MIXES.items():
+    register(f"fallback.{_mix}[n=5000]", _fallback_case(_rates, 5_000), ops=5_000)
+
+
+# ------------------------------------------------------------
+# Descripteurs de validation
+# ------------------------------------------------------------
+
+def _descriptor_case(invalid_ratio: float, n: int) -> Callable[[], Callable[[], Any]]:
+    def build() -> List[Tuple[Any, Any, Any]]:
+        rng = random.Random(SEED + 2)
+        rows: List[Tuple[Any, Any, Any]] = []
+        for i in range(n):
+            if rng.random() < invalid_ratio:
+                rows.append((f"user{i}-at-campus", "12ab", "CRITICAL"))
+            else:
+                rows.append((f"user{i}@campus.edu", "+33612345678", rng.choice(["low", "HIGH", 4])))
+        return rows
+
+    data = _once(build)
+
+    def setup() -> Callable[[], Any]:
+        rows = data()
+
+        def run() -> None:
+            for email, phone, priority in rows:
+                try:
+                    NotificationConfig(email, phone, priority)
+                except ValueError:
+                    pass
+
+        return run
+
+    return setup
+
+
+register("descriptors.valid[n=10000]", _descriptor_case(0.0, 10_000), ops=10_000)
+register("descriptors.mixed_invalid[n=10000]", _descriptor_case(0.2, 10_000), ops=10_000)
+
+
+# ------------------------------------------------------------
+# Persistance Django (dispatch_from_form)
+# ------------------------------------------------------------
+
+_DJANGO_READY = False
+
+
+def _setup_django() -> None:
+    """Django configuré une fois, base SQLite temporaire migrée (jamais db.sqlite3)."""
+    global _DJANGO_READY
+    if _DJANGO_READY:
+        return
+    web_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "web")
+    if web_dir not in sys.path:
+        sys.path.insert(0, web_dir)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    django.setup()
+    # Avant toute connexion : la base de démo n'est jamais touchée
+    settings.DATABASES["default"]["NAME"] = os.path.join(tempfile.mkdtemp(prefix="notify-bench-"), "bench.sqlite3")
+    call_command("migrate", verbosity=0, interactive=False)
+    _DJANGO_READY = True
+
+
+def _form_case(n: int) -> Callable[[], Callable[[], Any]]:
+    def build() -> List[Dict[str, Any]]:
+        rng = random.Random(SEED + 3)
+        return [
+            {
+                "user_id": f"u{i}",
+                "email": f"u{i}@campus.test" if rng.random() < 0.6 else "",
+                "phone": "0812345678" if rng.random() < 0.7 else "",
+                "push_token": "",
+                "emergency_type": rng.choice(list(EmergencyType)).name,
+                "priority": rng.choice(list(Priority)).name,
+                "message": "Alerte campus",
+                "zone": "campus/B",
+            }
+            for i in range(n)
+        ]
+
+    data = _once(build)
+
+    def setup() -> Callable[[], Any]:
+        forms = data()
+        quiet_logging()
+        _setup_django()
+        from notifications.services import dispatch_from_form
+
+        def run() -> None:
+            for form in forms:
+                dispatch_from_form(form)
+
+        return run
+
+    return setup
+
+
+register("web.dispatch_from_form[n=200]", _form_case(200), ops=200, requires=("django",))
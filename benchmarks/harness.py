@@ -0,0 +1,207 @@
+"""
+benchmarks/harness.py
+
+Moteur de mesure des benchmarks.
+
+- Case : un cas = une fonction setup() -> run (préparation non chronométrée),
+  ops opérations par exécution de run() (débit = ops / durée)
+- mesure : warmup exécutions ignorées puis repeat exécutions chronométrées
+  (perf_counter_ns, ramasse-miettes désactivé pendant la mesure, comme timeit)
+- graines fixes dans les cas : mêmes données d'une exécution à l'autre
+- calibrate() : charge Python fixe mesurée juste avant chaque cas ; sur option,
+  la comparaison est normalisée par le rapport des calibrations (baseline
+  enregistrée sur une autre machine ; sur la même machine, la correction ajoute
+  plus de bruit qu'elle n'en retire)
+- compare() : régression si le meilleur temps (min_s, le moins sensible au bruit
+  de la machine) dépasse celui de la baseline de plus de tolerance + bruit, le
+  bruit étant la dispersion relative (médiane - min) / min la plus forte des deux
+  mesures : un cas instable doit ralentir davantage pour être signalé
+"""
+
+from __future__ import annotations
+
+import gc
+import importlib.util
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[], Callable[[], Any]]
+    ops: int
+    quick: bool = True  # inclus dans le mode rapide (--quick)
+    requires: Tuple[str, ...] = ()  # modules optionnels (cas ignoré s'ils manquent)
+
+
+# Registre des cas (alimenté par benchmarks/cases.py)
+CASES: Dict[str, Case] = {}
+
+
+def register(
+    name: str,
+    setup: Callable[[], Callable[[], Any]],
+    ops: int,
+    quick: bool = True,
+    requires: Iterable[str] = (),
+) -> Case:
+    if name in CASES:
+        raise ValueError(f"Benchmark déjà enregistré: {name}")
+    case = CASES[name] = Case(name, setup, ops, quick, tuple(requires))
+    return case
+
+
+def select(pattern: Optional[str] = None, quick: bool = False) -> List[Case]:
+    """Cas à exécuter (filtre par sous-chaîne du nom, mode rapide)."""
+    return [
+        case
+        for case in CASES.values()
+        if (pattern is None or pattern in case.name) and (case.quick or not quick)
+    ]
+
+
+def _missing(requires: Iterable[str]) -> List[str]:
+    return [module for module in requires if importlib.util.find_spec(module) is None]
+
+
+def _timed(run: Callable[[], Any]) -> float:
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter_ns()
+        run()
+        return (time.perf_counter_ns() - start) / 1e9
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def run_case(case: Case, repeat: int = 5, warmup: int = 1) -> Dict[str, Any]:
+    """Mesure un cas ; un setup est refait avant chaque exécution (état neuf)."""
+    missing = _missing(case.requires)
+    if missing:
+        return {"status": "skipped", "reason": f"module(s) absent(s): {', '.join(missing)}"}
+
+    calibration = calibrate()
+    for _ in range(warmup):
+        case.setup()()
+    samples = [_timed(case.setup()) for _ in range(repeat)]
+
+    median = statistics.median(samples)
+    return {
+        "status": "ok",
+        "ops": case.ops,
+        "repeat": repeat,
+        "min_s": min(samples),
+        "median_s": median,
+        "mean_s": statistics.fmean(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "ops_per_s": case.ops / median if median > 0 else float("inf"),
+        "calibration_s": calibration,
+    }
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Meilleure durée d'une charge Python fixe (dict, boucles)."""
+
+    def workload() -> None:
+        table: Dict[int, int] = {}
+        for i in range(200_000):
+            table[i & 1023] = table.get(i & 1023, 0) + i
+
+    return min(_timed(workload) for _ in range(repeat))
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": _git_commit(),
+        "argv": sys.argv[1:],
+    }
+
+
+def run_all(
+    cases: Iterable[Case],
+    repeat: int = 5,
+    warmup: int = 1,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Exécute les cas ; retourne le document JSON {"environment", "results"}."""
+    report: Dict[str, Any] = {"environment": environment(), "results": {}}
+    for case in cases:
+        result = run_case(case, repeat=repeat, warmup=warmup)
+        report["results"][case.name] = result
+        if progress is not None:
+            progress(case.name, result)
+    return report
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.25,
+    normalize: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Compare les meilleurs temps (min_s) aux cas communs de la baseline.
+    normalize : corrige par le rapport des calibrations du cas.
+    Chaque ligne : name, baseline_s, current_s, ratio, noise, threshold, regression
+    (ratio > threshold = 1 + tolerance + noise).
+    """
+    if tolerance < 0:
+        raise ValueError("tolerance doit être >= 0.")
+
+    rows = []
+    for name, result in current.get("results", {}).items():
+        reference = baseline.get("results", {}).get(name)
+        if result.get("status") != "ok" or not reference or reference.get("status") != "ok":
+            continue
+        scale = 1.0
+        if normalize and result.get("calibration_s") and reference.get("calibration_s"):
+            scale = result["calibration_s"] / reference["calibration_s"]
+        ratio = result["min_s"] / (reference["min_s"] * scale)
+        noise = max(_spread(result), _spread(reference))
+        threshold = 1.0 + tolerance + noise
+        rows.append(
+            {
+                "name": name,
+                "baseline_s": reference["min_s"],
+                "current_s": result["min_s"],
+                "ratio": ratio,
+                "noise": noise,
+                "threshold": threshold,
+                "regression": ratio > threshold,
+            }
+        )
+    return rows
+
+
+def _spread(result: Dict[str, Any]) -> float:
+    """Dispersion relative d'une mesure : (médiane - min) / min (0 sans médiane)."""
+    best, median = result.get("min_s"), result.get("median_s")
+    if not best or median is None:
+        return 0.0
+    return max(0.0, (median - best) / best)
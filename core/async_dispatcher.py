@@ -0,0 +1,97 @@
+"""
+core/async_dispatcher.py
+
+AsyncDispatcher :
+- même file de priorité et même API schedule / schedule_audience que Dispatcher
+- dispatch() est une coroutine : les envois sont des tâches asyncio
+- au plus max_in_flight envois simultanés ; un job n'est dépilé que lorsqu'une
+  place se libère (URGENT reste prioritaire sur LOW)
+- les retries différés (RetryPolicy) sont attendus avec asyncio.sleep
+- traces : mêmes spans que Dispatcher (chaque tâche hérite du contexte de trace)
+- les variantes synchrones héritées (run_job, dispatch_iter, dispatch_to,
+  dispatch_concurrent) lèvent TypeError : notifier.send y serait une coroutine
+  jamais attendue
+
+Les notifiers doivent respecter le contrat asyncio (AsyncBaseNotifier).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, List, NoReturn, Set
+
+from core import tracing
+from core.dispatcher import DispatchJob, Dispatcher
+from core.models import DeliveryResult
+
+
+def _sync_only(name: str, replacement: str) -> Any:
+    def method(self: "AsyncDispatcher", *args: Any, **kwargs: Any) -> NoReturn:
+        raise TypeError(f"AsyncDispatcher.{name} n'est pas disponible : utiliser {replacement}.")
+
+    method.__name__ = name
+    method.__doc__ = f"Indisponible sur AsyncDispatcher (voir {replacement})."
+    return method
+
+
+class AsyncDispatcher(Dispatcher):
+    run_job = _sync_only("run_job", "await arun_job(job)")
+    dispatch_iter = _sync_only("dispatch_iter", "await dispatch()")
+    dispatch_to = _sync_only("dispatch_to", "await dispatch()")
+    dispatch_concurrent = _sync_only("dispatch_concurrent", "await dispatch(max_in_flight)")
+
+    async def arun_job(self, job: DispatchJob) -> List[DeliveryResult]:
+        """Variante asyncio de run_job (échéance vérifiée au démarrage de la tâche)."""
+        if job.is_expired():
+            return self._expired(job)  # résultat SKIPPED, sans appel au notifier
+        with self._job_span(job) as trace:
+            start = time.perf_counter()
+            results = await job.notifier.send(job.notification, job.user)
+            self._record_job(job, results, time.perf_counter() - start, trace)
+        return results
+
+    async def dispatch(self, max_in_flight: int = 1000) -> List[DeliveryResult]:
+        """
+        Traite la file par priorité sur la boucle d'événements courante.
+        Agrège tous les DeliveryResult (ordre de fin des envois).
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight doit être >= 1.")
+
+        with tracing.span("dispatcher.dispatch", max_in_flight=max_in_flight) as trace:
+            all_results = await self._dispatch(max_in_flight)
+            if trace is not None:
+                trace.set(results=len(all_results))
+        return all_results
+
+    async def _dispatch(self, max_in_flight: int) -> List[DeliveryResult]:
+        all_results: List[DeliveryResult] = []
+        jobs = self.iter_jobs(wait_retries=False)
+        in_flight: Set[asyncio.Task] = set()
+        pending: Dict[asyncio.Task, DispatchJob] = {}
+
+        while True:
+            while len(in_flight) < max_in_flight:
+                job = next(jobs, None)
+                if job is None:
+                    jobs = self.iter_jobs(wait_retries=False)
+                    break
+                task = asyncio.ensure_future(self.arun_job(job))
+                pending[task] = job
+                in_flight.add(task)
+
+            if not in_flight:
+                if not len(self.retry_wheel):
+                    return all_results
+                # Attente des retries programmés sans bloquer la boucle
+                await asyncio.sleep(self.retry_wheel.time_to_next_tick())
+                continue
+
+            timeout = self.retry_wheel.time_to_next_tick() if len(self.retry_wheel) else None
+            done, in_flight = await asyncio.wait(in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results = task.result()
+                job = pending.pop(task)
+                all_results.extend(results)
+                self._ack(job)
+                self._maybe_retry(job, results)
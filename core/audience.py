@@ -0,0 +1,214 @@
+"""
+core/audience.py
+
+Index d'audience par zone (en mémoire).
+
+- Zones hiérarchiques séparées par "/" : "campus/B/2" (campus > bâtiment > étage)
+  Un utilisateur est placé dans une zone ; il appartient aussi à tous ses
+  ancêtres ("campus/B", "campus"). Résoudre "campus/B" = une seule lecture.
+- Identifiants compacts : chaque user_id reçoit un entier ; les zones stockent
+  des ensembles d'entiers (et non des User ou des chaînes)
+- Opérations ensemblistes : union de zones, exclusion (minus), opt-out
+  (global, par type d'urgence, et UserPreferences.opt_out_types)
+- Les opt-out manuels (opt_out) sont gardés à part de ceux des préférences :
+  ré-ajouter un utilisateur (add) ne réindexe que ses préférences
+- Mises à jour incrémentales : move() ne touche que les ancêtres de l'ancienne
+  et de la nouvelle zone (coût proportionnel à la profondeur)
+
+Utilisation avec le Dispatcher :
+
+    dispatcher.schedule_audience(notification, index.users_for(notification), notifier)
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from core.emergencies import EmergencyType
+from core.models import Notification, User
+
+
+SEPARATOR = "/"
+
+
+def normalize_zone(zone: str) -> str:
+    """'Campus / B /2/' -> 'campus/B/2' (casse conservée sauf espaces et séparateurs superflus)."""
+    parts = [p.strip() for p in zone.split(SEPARATOR)]
+    return SEPARATOR.join(p for p in parts if p)
+
+
+def zone_ancestors(zone: str) -> List[str]:
+    """'campus/B/2' -> ['campus', 'campus/B', 'campus/B/2']."""
+    parts = normalize_zone(zone).split(SEPARATOR)
+    return [SEPARATOR.join(parts[: i + 1]) for i in range(len(parts)) if parts[0]]
+
+
+class ZoneIndex:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._ids: Dict[str, int] = {}
+        self._users: List[Optional[User]] = []
+        self._free: List[int] = []
+        self._zone_of: Dict[int, str] = {}
+        # zone (et chacun de ses ancêtres) -> ids
+        self._members: Dict[str, Set[int]] = {}
+        # Opt-out : global et par type d'urgence (manuels / issus des préférences)
+        self._opt_out_all: Set[int] = set()
+        self._opt_out_types: Dict[EmergencyType, Set[int]] = {}
+        self._pref_opt_out: Dict[EmergencyType, Set[int]] = {}
+
+    # ------------------------------------------------------------
+    # Mises à jour
+    # ------------------------------------------------------------
+
+    def add(self, user: User, zone: str) -> None:
+        """Ajoute (ou met à jour) un utilisateur dans une zone."""
+        with self._lock:
+            uid = self._ids.get(user.user_id)
+            if uid is None:
+                uid = self._free.pop() if self._free else len(self._users)
+                if uid == len(self._users):
+                    self._users.append(user)
+                else:
+                    self._users[uid] = user
+                self._ids[user.user_id] = uid
+            else:
+                self._users[uid] = user
+                self._unindex_prefs(uid)
+
+            for etype in user.preferences.opt_out_types:
+                self._pref_opt_out.setdefault(etype, set()).add(uid)
+            self._place(uid, zone)
+
+    def add_many(self, users: Iterable[User], zone: str) -> None:
+        for user in users:
+            self.add(user, zone)
+
+    def move(self, user_id: str, zone: str) -> None:
+        """Déplace un utilisateur vers une autre zone (mise à jour incrémentale)."""
+        with self._lock:
+            uid = self._ids.get(user_id)
+            if uid is None:
+                raise KeyError(f"Utilisateur inconnu de l'index: {user_id}")
+            self._place(uid, zone)
+
+    def remove(self, user_id: str) -> None:
+        with self._lock:
+            uid = self._ids.pop(user_id, None)
+            if uid is None:
+                return
+            self._unplace(uid)
+            self._unindex_prefs(uid)
+            self._opt_out_all.discard(uid)
+            for ids in self._opt_out_types.values():
+                ids.discard(uid)
+            self._users[uid] = None
+            self._free.append(uid)
+
+    def opt_out(self, user_id: str, emergency_type: Optional[EmergencyType] = None) -> None:
+        """Exclut un utilisateur de toutes les diffusions (ou d'un type d'urgence)."""
+        with self._lock:
+            uid = self._ids[user_id]
+            if emergency_type is None:
+                self._opt_out_all.add(uid)
+            else:
+                self._opt_out_types.setdefault(emergency_type, set()).add(uid)
+
+    def opt_in(self, user_id: str, emergency_type: Optional[EmergencyType] = None) -> None:
+        """Annule un opt_out manuel (les opt-out des préférences restent, voir add)."""
+        with self._lock:
+            uid = self._ids[user_id]
+            if emergency_type is None:
+                self._opt_out_all.discard(uid)
+            else:
+                self._opt_out_types.get(emergency_type, set()).discard(uid)
+
+    def _place(self, uid: int, zone: str) -> None:
+        zone = normalize_zone(zone)
+        if not zone:
+            raise ValueError("ZoneIndex: zone vide.")
+        old = self._zone_of.get(uid)
+        if old == zone:
+            return
+        if old is not None:
+            self._unplace(uid)
+        for z in zone_ancestors(zone):
+            self._members.setdefault(z, set()).add(uid)
+        self._zone_of[uid] = zone
+
+    def _unplace(self, uid: int) -> None:
+        old = self._zone_of.pop(uid, None)
+        if old is None:
+            return
+        for z in zone_ancestors(old):
+            members = self._members[z]
+            members.discard(uid)
+            if not members:
+                del self._members[z]
+
+    def _unindex_prefs(self, uid: int) -> None:
+        for ids in self._pref_opt_out.values():
+            ids.discard(uid)
+
+    # ------------------------------------------------------------
+    # Résolution
+    # ------------------------------------------------------------
+
+    def resolve_ids(
+        self,
+        zones: Iterable[str],
+        exclude: Iterable[str] = (),
+        emergency_type: Optional[EmergencyType] = None,
+    ) -> Set[int]:
+        """
+        Ids compacts de l'audience : union(zones) - union(exclude) - opt-outs.
+        Une zone inconnue est vide.
+        """
+        with self._lock:
+            result: Set[int] = set()
+            for zone in zones:
+                result |= self._members.get(normalize_zone(zone), set())
+            for zone in exclude:
+                result -= self._members.get(normalize_zone(zone), set())
+            result -= self._opt_out_all
+            if emergency_type is not None:
+                result -= self._opt_out_types.get(emergency_type, set())
+                result -= self._pref_opt_out.get(emergency_type, set())
+            return result
+
+    def resolve(
+        self,
+        zones: Iterable[str],
+        exclude: Iterable[str] = (),
+        emergency_type: Optional[EmergencyType] = None,
+    ) -> List[User]:
+        ids = self.resolve_ids(zones, exclude=exclude, emergency_type=emergency_type)
+        users = self._users
+        return [users[uid] for uid in ids]
+
+    def users_for(self, notification: Notification, exclude: Iterable[str] = ()) -> List[User]:
+        """Audience d'une notification : sa zone (et sous-zones), opt-outs du type retirés."""
+        if not notification.zone:
+            return []
+        return self.resolve([notification.zone], exclude=exclude, emergency_type=notification.emergency_type)
+
+    # ------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------
+
+    def zone_of(self, user_id: str) -> Optional[str]:
+        uid = self._ids.get(user_id)
+        return None if uid is None else self._zone_of.get(uid)
+
+    def size(self, zone: str) -> int:
+        return len(self._members.get(normalize_zone(zone), ()))
+
+    def zones(self) -> List[str]:
+        return sorted(self._members)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._ids
@@ -5,15 +5,106 @@ Dispatcher :
 - Maintient une file de priorité basée sur Notification.priority
 - Traite dans l'ordre URGENT -> LOW
 - Appelle le notifier concret qui gère canaux + retry + fallback
+- Diffusion (audience) : une notification pour beaucoup d'utilisateurs,
+  stockée une seule fois dans la file et déroulée paresseusement ; les jobs
+  plus prioritaires (et retries échus) arrivés pendant le déroulement passent
+  devant la suite de l'audience
+- Mode concurrent : pool de threads (envois I/O-bound), la file reste
+  consultée par priorité à chaque fois qu'un worker se libère
+- Streaming : dispatch_iter() produit les résultats au fil de l'eau
+- Échéances : à priorité égale, l'échéance la plus proche passe d'abord (EDF) ;
+  un job expiré n'est pas envoyé, il est rapporté SKIPPED
+- Nouvelles tentatives différées (RetryPolicy) : un job sans succès est remis en
+  file après un backoff exponentiel + jitter, via une roue temporelle ;
+  le worker continue de servir les autres jobs pendant l'attente
+- Suppression des doublons (CoalescingIndex) : un même message pour un même
+  utilisateur, planifié deux fois dans la fenêtre, n'est mis en file qu'une fois
+- Métriques (core.metrics.REGISTRY) : jobs planifiés / traités, durée des jobs,
+  retries ; profondeur des files calculée à la collecte
+- Traces (core.tracing) : spans dispatcher.schedule / dispatcher.dispatch /
+  dispatcher.job / dispatcher.retry ; le job garde le span de sa planification
+  (trace) pour rattacher l'exécution à la même trace, avec le temps d'attente
 """
-from dataclasses import dataclass
-from typing import List
+import random
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
 
-from core.models import Notification, User, DeliveryResult
+from core import tracing
+from core.metrics import REGISTRY, Gauge
+from core.models import Notification, Priority, User, DeliveryResult, DeliveryStatus
+from priority.coalescing import CoalescingIndex
 from priority.priority_handler import PriorityQueue
+from priority.timer_wheel import TimerWheel
+
+
+_JOBS_SCHEDULED = REGISTRY.counter("notify_jobs_scheduled_total", "Jobs mis en file.", ["priority"])
+_JOBS_COALESCED = REGISTRY.counter("notify_jobs_coalesced_total", "Doublons rejetés avant la file.")
+_JOBS_PROCESSED = REGISTRY.counter("notify_jobs_processed_total", "Jobs traités.", ["priority", "outcome"])
+_JOB_DURATION = REGISTRY.histogram("notify_job_duration_seconds", "Durée d'un job (notifier.send).", ["priority"])
+_RETRIES = REGISTRY.counter("notify_retries_scheduled_total", "Nouvelles tentatives programmées.", ["priority"])
+
+# Séries pré-résolues (pas de recherche de labels sur le chemin chaud)
+_SCHEDULED_BY_PRIORITY = {p: _JOBS_SCHEDULED.labels(p.name.lower()) for p in Priority}
+_DURATION_BY_PRIORITY = {p: _JOB_DURATION.labels(p.name.lower()) for p in Priority}
+_PROCESSED = {
+    (p, outcome): _JOBS_PROCESSED.labels(p.name.lower(), outcome)
+    for p in Priority
+    for outcome in ("sent", "failed", "expired")
+}
+
+# Dispatchers vivants : profondeur des files calculée au moment de la collecte
+_DISPATCHERS: "weakref.WeakSet[Dispatcher]" = weakref.WeakSet()
+
+
+def _collect_queue_metrics() -> List[Gauge]:
+    depth = Gauge("notify_queue_depth", "Jobs en file par priorité.", ["priority"])
+    pending = Gauge("notify_retries_pending", "Nouvelles tentatives en attente d'échéance.")
+    totals = {p: 0 for p in Priority}
+    waiting = 0
+    for dispatcher in list(_DISPATCHERS):
+        depths = getattr(dispatcher.priority_queue, "depths", None)
+        if depths is not None:
+            for p, n in depths().items():
+                totals[Priority(p)] += n
+        waiting += len(dispatcher.retry_wheel)
+    for p in sorted(Priority, reverse=True):
+        depth.labels(p.name.lower()).set(totals[p])
+    pending.set(waiting)
+    return [depth, pending]
+
+
+REGISTRY.add_collector(_collect_queue_metrics)
+
+
+def _no_success(results: List[DeliveryResult]) -> bool:
+    return not any(r.status == DeliveryStatus.SENT for r in results)
 
 
 @dataclass
+class RetryPolicy:
+    """
+    Politique de nouvelle tentative au niveau du dispatcher.
+
+    - max_attempts : nombre total de tentatives par job (1 = pas de retry)
+    - base_delay / max_delay : backoff exponentiel base_delay * 2^(tentative-1), plafonné
+    - jitter : part aléatoire retirée du délai (0 = délai exact, 0.5 = entre 50% et 100%)
+    - should_retry : décide à partir des résultats (défaut : aucun canal SENT)
+    """
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    jitter: float = 0.5
+    should_retry: Callable[[List[DeliveryResult]], bool] = _no_success
+
+    def delay(self, attempt: int) -> float:
+        d = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return d * (1.0 - self.jitter * random.random())
+
+
+@dataclass(slots=True)
 class DispatchJob:
     """
     Un job = une notification à livrer à un user avec un notifier.
@@ -21,33 +112,404 @@ class DispatchJob:
     notification: Notification
     user: User
     notifier: object  # EmergencyNotifier ou autre
+    expires_at: Optional[float] = None  # surcharge notification.expires_at
+    attempt: int = 1  # numéro de tentative (RetryPolicy)
+    trace: Optional[tracing.Span] = None  # span de planification (None = non tracé)
+    audience: Optional["AudienceJob"] = None  # diffusion d'origine (acquittement)
+
+    @property
+    def deadline(self) -> Optional[float]:
+        return self.expires_at if self.expires_at is not None else self.notification.expires_at
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """Échéance du job dépassée (expires_at du job, sinon Notification.is_expired)."""
+        if self.expires_at is None:
+            return self.notification.is_expired(now)
+        return (time.time() if now is None else now) >= self.expires_at
+
+
+@dataclass(slots=True)
+class AudienceJob:
+    """
+    Un job de diffusion = une notification à livrer à une audience.
+
+    - users : itérable quelconque (liste, générateur, curseur DB...)
+      Il n'est parcouru qu'au moment du dispatch, un utilisateur à la fois :
+      aucun DispatchJob n'est créé à l'avance.
+    - outstanding : jobs déroulés pas encore acquittés (+1 tant que le
+      déroulement n'est pas terminé) ; la diffusion est acquittée à 0
+    """
+    notification: Notification
+    users: Iterable[User]
+    notifier: object
+    trace: Optional[tracing.Span] = None
+    outstanding: int = field(default=0, repr=False, compare=False)
+
+    @property
+    def deadline(self) -> Optional[float]:
+        return self.notification.expires_at
+
+    def iter_jobs(self) -> Iterator[DispatchJob]:
+        for user in self.users:
+            yield DispatchJob(
+                notification=self.notification, user=user, notifier=self.notifier, trace=self.trace, audience=self
+            )
 
 
 class Dispatcher:
-    def __init__(self) -> None:
-        self.priority_queue = PriorityQueue()
+    def __init__(
+        self,
+        priority_queue: Optional[PriorityQueue] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_wheel: Optional[TimerWheel] = None,
+        coalescer: Optional[CoalescingIndex] = None,
+        preempt_every: int = 256,
+    ) -> None:
+        """
+        priority_queue : file à utiliser (ex: PriorityQueue(fairness_every=20)
+        pour l'anti-famine, ou SQLitePriorityQueue pour une file durable).
+        Par défaut, une PriorityQueue simple.
+
+        retry_policy : nouvelles tentatives différées (désactivées par défaut).
+        Les jobs en attente de retry sont gardés en mémoire (retry_wheel).
+
+        coalescer : index de déduplication (ex: CoalescingIndex(window=300)) ;
+        les doublons sont rejetés avant la file (désactivé par défaut).
+
+        preempt_every : pendant le déroulement d'une diffusion, tous les
+        preempt_every utilisateurs, les retries échus sont promus et les jobs
+        plus prioritaires que la diffusion passent devant la suite de l'audience.
 
-    def schedule(self, notification: Notification, user: User, notifier: object) -> None:
+        Chaque job est acquitté (priority_queue.task_done) une fois envoyé ;
+        une diffusion l'est quand tous ses envois sont terminés (y compris ceux
+        encore en vol dans le pool de threads ou la boucle asyncio).
+        """
+        self.priority_queue = priority_queue if priority_queue is not None else PriorityQueue()
+        self.retry_policy = retry_policy
+        if preempt_every < 1:
+            raise ValueError("preempt_every doit être >= 1.")
+        self.preempt_every = preempt_every
+        self.retry_wheel = retry_wheel if retry_wheel is not None else TimerWheel()
+        self.retries_scheduled = 0
+        self.coalescer = coalescer
+        _DISPATCHERS.add(self)
+
+    def schedule(
+        self,
+        notification: Notification,
+        user: User,
+        notifier: object,
+        expires_at: Optional[float] = None,
+    ) -> bool:
         """
         Ajoute un job dans la file en utilisant notification.priority.
+        expires_at : échéance propre au job (sinon notification.expires_at).
+
+        Retourne False si le job est un doublon rejeté par le coalescer.
         """
-        job = DispatchJob(notification=notification, user=user, notifier=notifier)
-        self.priority_queue.add(job, priority=notification.priority)
+        with tracing.span(
+            "dispatcher.schedule",
+            notification_id=notification.notification_id,
+            user_id=user.user_id,
+            priority=notification.priority.name,
+        ) as trace:
+            if self.coalescer is not None and not self.coalescer.admit(notification, user):
+                _JOBS_COALESCED.inc()
+                if trace is not None:
+                    trace.set(coalesced=True)
+                return False
+            job = DispatchJob(
+                notification=notification, user=user, notifier=notifier, expires_at=expires_at, trace=trace
+            )
+            self.priority_queue.add(job, priority=notification.priority, deadline=job.deadline)
+            _SCHEDULED_BY_PRIORITY[notification.priority].inc()
+            return True
 
-    def dispatch(self) -> List[DeliveryResult]:
+    def schedule_many(
+        self,
+        notification: Notification,
+        users: Iterable[User],
+        notifier: object,
+        expires_at: Optional[float] = None,
+    ) -> int:
         """
-        Traite la file par priorité.
-        Agrège tous les DeliveryResult.
+        Planifie un job unitaire par utilisateur en un seul ajout (priority_queue.add_many) :
+        une seule transaction pour une file SQLite, au lieu d'une par job.
+        Retourne le nombre de jobs planifiés (doublons rejetés par le coalescer exclus).
+        """
+        with tracing.span(
+            "dispatcher.schedule",
+            notification_id=notification.notification_id,
+            priority=notification.priority.name,
+            batch=True,
+        ) as trace:
+            coalescer = self.coalescer
+            jobs = [
+                DispatchJob(notification=notification, user=user, notifier=notifier, expires_at=expires_at, trace=trace)
+                for user in users
+                if coalescer is None or self._admit(notification, user)
+            ]
+            deadline = expires_at if expires_at is not None else notification.expires_at
+            self.priority_queue.add_many(jobs, priority=notification.priority, deadline=deadline)
+            _SCHEDULED_BY_PRIORITY[notification.priority].inc(len(jobs))
+            if trace is not None:
+                trace.set(jobs=len(jobs))
+            return len(jobs)
+
+    def schedule_audience(self, notification: Notification, users: Iterable[User], notifier: object) -> None:
         """
-        all_results: List[DeliveryResult] = []
+        Ajoute une diffusion (une notification -> plusieurs users) dans la file.
 
+        Un seul élément est ajouté à la file, quel que soit le nombre d'utilisateurs :
+        la liste est parcourue paresseusement pendant dispatch().
+        Avec un coalescer, les doublons sont filtrés au moment du déroulement.
+        """
+        with tracing.span(
+            "dispatcher.schedule",
+            notification_id=notification.notification_id,
+            priority=notification.priority.name,
+            audience=True,
+        ) as trace:
+            job = AudienceJob(notification=notification, users=users, notifier=notifier, trace=trace)
+            self.priority_queue.add(job, priority=notification.priority, deadline=job.deadline)
+            _SCHEDULED_BY_PRIORITY[notification.priority].inc()
+
+    def iter_jobs(self, wait_retries: bool = True) -> Iterator[DispatchJob]:
+        """
+        Dépile la file par priorité et produit les jobs unitaires.
+        Les diffusions sont déroulées au fil de l'eau (un user à la fois).
+
+        wait_retries : si la file est vide mais que des retries sont programmés,
+        attendre leur échéance (sinon, rendre la main immédiatement).
+        """
         while True:
+            self.promote_due_retries()
             job = self.priority_queue.get_next()
             if job is None:
-                break
+                if wait_retries and len(self.retry_wheel):
+                    time.sleep(self.retry_wheel.time_to_next_tick())
+                    continue
+                return
+            yield from self._expand(job)
+
+    def _expand(self, job: object) -> Iterator[DispatchJob]:
+        if not isinstance(job, AudienceJob):
+            yield job
+            return
+        # Jeton de déroulement : la diffusion n'est acquittée qu'une fois
+        # déroulée entièrement et tous ses jobs acquittés (_ack)
+        job.outstanding += 1
+        priority = job.notification.priority
+        for count, j in enumerate(job.iter_jobs(), 1):
+            if self.coalescer is None or self._admit(j.notification, j.user):
+                job.outstanding += 1
+                yield j
+            if count % self.preempt_every == 0:
+                yield from self._preempting(priority)
+        self._ack(job)
+
+    def _preempting(self, priority: Priority) -> Iterator[DispatchJob]:
+        """Jobs plus prioritaires (nouveaux ou retries échus) arrivés pendant une diffusion."""
+        get_next_above = getattr(self.priority_queue, "get_next_above", None)
+        if get_next_above is None:
+            return
+        self.promote_due_retries()
+        while True:
+            job = get_next_above(priority)
+            if job is None:
+                return
+            yield from self._expand(job)
+
+    def _ack(self, job: object) -> None:
+        """Acquitte un job traité ; un job de diffusion décompte sa diffusion."""
+        audience = job.audience if isinstance(job, DispatchJob) else job
+        if isinstance(audience, AudienceJob):
+            audience.outstanding -= 1
+            if audience.outstanding > 0:
+                return
+            job = audience
+        self.priority_queue.task_done(job)
+
+    def _admit(self, notification: Notification, user: User) -> bool:
+        if self.coalescer.admit(notification, user):
+            return True
+        _JOBS_COALESCED.inc()
+        return False
 
-            # notifier.send retourne une liste (tentatives fallback)
+    def promote_due_retries(self) -> int:
+        """Remet dans la file de priorité les retries arrivés à échéance."""
+        if not len(self.retry_wheel):
+            return 0
+        due = self.retry_wheel.advance()
+        for job in due:
+            self.priority_queue.add(job, priority=job.notification.priority, deadline=job.deadline)
+        return len(due)
+
+    def _maybe_retry(self, job: DispatchJob, results: List[DeliveryResult]) -> None:
+        policy = self.retry_policy
+        if policy is None or job.attempt >= policy.max_attempts or not policy.should_retry(results):
+            return
+        # Un job expiré ne sera pas retenté (il serait SKIPPED)
+        if job.is_expired():
+            return
+        delay = policy.delay(job.attempt)
+        # Span court, parent de la tentative suivante (son wait_ms inclut le backoff)
+        trace = tracing.start_span(
+            "dispatcher.retry",
+            job.trace,
+            notification_id=job.notification.notification_id,
+            user_id=job.user.user_id,
+            attempt=job.attempt + 1,
+            delay_ms=round(delay * 1000, 3),
+        )
+        tracing.end_span(trace)
+        # La nouvelle tentative est un job autonome (acquitté pour elle-même)
+        self.retry_wheel.schedule(replace(job, attempt=job.attempt + 1, trace=trace, audience=None), delay)
+        self.retries_scheduled += 1
+        _RETRIES.labels(job.notification.priority.name.lower()).inc()
+
+    def run_job(self, job: DispatchJob) -> List[DeliveryResult]:
+        """
+        Exécute un job : SKIPPED (sans appel au notifier) si l'échéance est dépassée,
+        sinon notifier.send (tentatives fallback).
+        """
+        if job.is_expired():
+            return self._expired(job)
+        with self._job_span(job) as trace:
+            start = time.perf_counter()
             results = job.notifier.send(job.notification, job.user)
-            all_results.extend(results)
+            self._record_job(job, results, time.perf_counter() - start, trace)
+        return results
+
+    @staticmethod
+    def _expired(job: DispatchJob) -> List[DeliveryResult]:
+        """Résultat d'un job dont l'échéance est dépassée (sans appel au notifier)."""
+        _PROCESSED[(job.notification.priority, "expired")].inc()
+        return [
+            DeliveryResult(
+                notification_id=job.notification.notification_id,
+                user_id=job.user.user_id,
+                channel="none",
+                status=DeliveryStatus.SKIPPED,
+                error="Notification expirée avant envoi",
+            )
+        ]
+
+    @staticmethod
+    def _job_span(job: DispatchJob) -> object:
+        """Span d'exécution, enfant du span de planification (même trace)."""
+        if job.trace is None:
+            return tracing.span("dispatcher.job", None)
+        return tracing.span(
+            "dispatcher.job",
+            job.trace,
+            notification_id=job.notification.notification_id,
+            user_id=job.user.user_id,
+            attempt=job.attempt,
+            wait_ms=round((time.time_ns() - job.trace.end_ns) / 1e6, 3),
+        )
+
+    @staticmethod
+    def _record_job(
+        job: DispatchJob,
+        results: List[DeliveryResult],
+        seconds: float,
+        trace: Optional[tracing.Span] = None,
+    ) -> None:
+        priority = job.notification.priority
+        _DURATION_BY_PRIORITY[priority].observe(seconds)
+        outcome = "failed" if _no_success(results) else "sent"
+        _PROCESSED[(priority, outcome)].inc()
+        if trace is not None:
+            trace.set(outcome=outcome, delivery_ids=[r.delivery_id for r in results])
+
+    def dispatch_iter(self, max_workers: Optional[int] = None) -> Iterator[DeliveryResult]:
+        """
+        Générateur : produit chaque DeliveryResult dès qu'il est disponible.
+        Mémoire constante (rien n'est accumulé), utile pour les grosses diffusions.
+
+        max_workers : None = séquentiel, sinon pool de threads (voir dispatch_concurrent).
+        """
+        if max_workers is None:
+            for job in self.iter_jobs():
+                results = self.run_job(job)
+                self._ack(job)
+                self._maybe_retry(job, results)
+                yield from results
+        else:
+            for results in self._iter_concurrent(max_workers):
+                yield from results
+
+    def dispatch_to(self, on_result: Callable[[DeliveryResult], None], max_workers: Optional[int] = None) -> int:
+        """
+        Variante "sink" : chaque résultat est passé à on_result (ex: persistance DB).
+        Retourne le nombre de résultats traités.
+        """
+        count = 0
+        for r in self.dispatch_iter(max_workers=max_workers):
+            on_result(r)
+            count += 1
+        return count
+
+    def dispatch(self) -> List[DeliveryResult]:
+        """
+        Traite la file par priorité.
+        Agrège tous les DeliveryResult.
+        """
+        with tracing.span("dispatcher.dispatch") as trace:
+            results = list(self.dispatch_iter())
+            if trace is not None:
+                trace.set(results=len(results))
+        return results
+
+    def dispatch_concurrent(self, max_workers: int = 4) -> List[DeliveryResult]:
+        """
+        Variante concurrente de dispatch() (pool de threads de taille max_workers).
+
+        Au plus max_workers envois sont en vol : un nouveau job n'est dépilé
+        que lorsqu'un worker se libère, donc les jobs URGENT présents dans la file
+        passent toujours avant les LOW.
+        Les résultats sont agrégés dans l'ordre de fin des envois.
+        """
+        with tracing.span("dispatcher.dispatch", max_workers=max_workers) as trace:
+            results = list(self.dispatch_iter(max_workers=max_workers))
+            if trace is not None:
+                trace.set(results=len(results))
+        return results
+
+    def _iter_concurrent(self, max_workers: int) -> Iterator[List[DeliveryResult]]:
+        if max_workers < 1:
+            raise ValueError("max_workers doit être >= 1.")
+
+        jobs = self.iter_jobs(wait_retries=False)
+        in_flight: Set[Future] = set()
+        pending: Dict[Future, DispatchJob] = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while True:
+                # Remplir les slots libres dans l'ordre de priorité
+                while len(in_flight) < max_workers:
+                    job = next(jobs, None)
+                    if job is None:
+                        # File vide pour l'instant : un nouvel itérateur reprendra
+                        # les retries qui arriveront à échéance
+                        jobs = self.iter_jobs(wait_retries=False)
+                        break
+                    future = pool.submit(self.run_job, job)
+                    pending[future] = job
+                    in_flight.add(future)
+
+                if not in_flight:
+                    if not len(self.retry_wheel):
+                        return
+                    time.sleep(self.retry_wheel.time_to_next_tick())
+                    continue
 
-        return all_results
+                timeout = self.retry_wheel.time_to_next_tick() if len(self.retry_wheel) else None
+                done, in_flight = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results = future.result()
+                    job = pending.pop(future)
+                    self._ack(job)
+                    self._maybe_retry(job, results)
+                    yield results
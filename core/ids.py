@@ -0,0 +1,89 @@
+"""
+core/ids.py
+
+Générateur d'identifiants (notification_id, delivery_id).
+
+Par défaut : identifiant triable dans le temps, style ULID, 32 caractères hex
+(même longueur que uuid4().hex) :
+- 12 hex : millisecondes depuis l'epoch (48 bits)
+- 20 hex : séquence 80 bits, tirée au hasard une fois par processus puis
+  incrémentée à chaque identifiant
+
+Propriétés :
+- monotone dans un processus (même si l'horloge recule, le préfixe ne régresse pas)
+- unique entre processus avec une probabilité écrasante (graine aléatoire de 80 bits,
+  renouvelée après fork)
+- un seul appel à la source aléatoire de l'OS par processus (au lieu d'un par id)
+- insertions en index B-tree groupées en fin d'index ; les requêtes par plage
+  de temps sont possibles (id_timestamp / id_lower_bound)
+
+Générateur remplaçable : set_id_generator(lambda: uuid.uuid4().hex)
+"""
+
+from __future__ import annotations
+
+import os
+import secrets
+import threading
+import time
+import uuid
+from typing import Callable
+
+_SEQ_BITS = 80
+_SEQ_MASK = (1 << _SEQ_BITS) - 1
+
+
+class MonotonicIdGenerator:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self.reseed()
+
+    def reseed(self) -> None:
+        """Nouvelle graine aléatoire (appelé automatiquement après fork)."""
+        self._seq = secrets.randbits(_SEQ_BITS)
+
+    def __call__(self) -> str:
+        with self._lock:
+            ms = time.time_ns() // 1_000_000
+            if ms < self._last_ms:
+                ms = self._last_ms
+            self._last_ms = ms
+            self._seq = (self._seq + 1) & _SEQ_MASK
+            return f"{ms:012x}{self._seq:020x}"
+
+
+def uuid4_hex() -> str:
+    """Ancien comportement (aléatoire, non triable)."""
+    return uuid.uuid4().hex
+
+
+_default_generator = MonotonicIdGenerator()
+_generator: Callable[[], str] = _default_generator
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_default_generator.reseed)
+
+
+def new_id() -> str:
+    """Nouvel identifiant avec le générateur courant."""
+    return _generator()
+
+
+def set_id_generator(generator: Callable[[], str]) -> Callable[[], str]:
+    """Remplace le générateur ; retourne le précédent (pour le restaurer)."""
+    global _generator
+    previous, _generator = _generator, generator
+    return previous
+
+
+def id_timestamp(identifier: str) -> float:
+    """Horodatage (secondes epoch) d'un identifiant du générateur par défaut."""
+    if len(identifier) != 32:
+        raise ValueError(f"Identifiant non reconnu: {identifier!r}")
+    return int(identifier[:12], 16) / 1000.0
+
+
+def id_lower_bound(timestamp: float) -> str:
+    """Plus petit identifiant possible à cet instant (bornes de requêtes par plage)."""
+    return f"{int(timestamp * 1000):012x}" + "0" * 20
@@ -0,0 +1,570 @@
+"""
+core/metrics.py
+
+Histogrammes de latence (style HDR, buckets fixes log-linéaires).
+
+- valeurs en nanosecondes ; 16 sous-buckets par puissance de 2
+  (erreur relative <= 6.25 % sur les percentiles), mémoire bornée par fragment
+- enregistrement sans verrou : chaque thread ajoute la mesure brute à son
+  propre fragment (shard), réparti dans les buckets par lots de _FLUSH ;
+  les lectures fusionnent les fragments. Le fragment d'un thread
+  terminé est replié dans un fragment commun puis retiré : le nombre de
+  fragments suit les threads vivants, pas tous les threads ayant existé
+- fusionnables : merge() additionne deux histogrammes (processus, instances...)
+
+    h = LatencyHistogram()
+    h.record_ns(1_250_000)
+    h.percentiles()  # {"p50_ms": ..., "p90_ms": ..., "p99_ms": ..., "p999_ms": ...}
+
+Registre de métriques (MetricsRegistry, instance partagée REGISTRY) :
+- Counter (fragments par thread, repliés à la fin du thread), Gauge (valeur ou
+  fonction évaluée à la collecte), Histogram (latences : buckets cumulés "le",
+  _sum et _count calculés depuis un LatencyHistogram)
+- rendu au format texte Prometheus (vue web /metrics)
+- les coûts sont sur le chemin de collecte, pas sur le chemin d'envoi
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SUB_BITS = 4
+_SUB = 1 << SUB_BITS
+MAX_SHIFT = 40  # au-delà de ~2^45 ns (~9 h) les valeurs sont regroupées dans le dernier bucket
+BUCKETS = (MAX_SHIFT + 2) * _SUB
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+# Bornes "le" (secondes) des Histogram exportés
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_NO_MIN = 1 << 62
+
+
+def bucket_index(value: int) -> int:
+    shift = value.bit_length() - SUB_BITS - 1
+    if shift <= 0:
+        return value
+    if shift > MAX_SHIFT:
+        return BUCKETS - 1
+    return (shift << SUB_BITS) + (value >> shift)
+
+
+def bucket_bounds(index: int) -> tuple:
+    """[borne basse, borne haute[ du bucket, en nanosecondes."""
+    shift = (index >> SUB_BITS) - 1
+    if shift <= 0:
+        return index, index + 1
+    low = (index - (shift << SUB_BITS)) << shift
+    return low, low + (1 << shift)
+
+
+# Borne haute (exclue) de chaque bucket : bucket d'une valeur = bisect_right(_UPPER, v)
+_UPPER: List[int] = [bucket_bounds(i)[1] for i in range(BUCKETS)]
+
+# Mesures gardées brutes par thread avant répartition dans les buckets :
+# l'enregistrement n'est qu'un list.append, la répartition se fait par lots
+_FLUSH = 512
+
+
+class _Shard:
+    __slots__ = ("counts", "count", "total", "min", "max", "pending")
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = _NO_MIN
+        self.max = -1
+        self.pending: List[int] = []  # mesures brutes pas encore réparties
+
+
+class _ShardOwner:
+    """
+    Objet propre à un thread (threading.local) : sa collecte signale la fin du thread.
+    Le rappel weakref.finalize peut survenir pendant un ramasse-miettes, verrou tenu :
+    il se contente de signaler le fragment (deque.append est atomique).
+    """
+    __slots__ = ("__weakref__",)
+
+
+def _bucket_values(target: _Shard, values: List[int]) -> None:
+    """
+    Répartit des mesures brutes (ns) dans les buckets de target.
+    Tri (en C) puis une recherche par bucket occupé : le coût suit le nombre de
+    buckets distincts, pas le nombre de mesures (les latences sont groupées).
+    """
+    if not values:
+        return
+    values = sorted(values)
+    if values[0] < 0:
+        values = [v if v > 0 else 0 for v in values]
+    counts = target.counts
+    upper = _UPPER
+    i, n = 0, len(values)
+    while i < n:
+        index = bisect_right(upper, values[i])
+        if index >= BUCKETS - 1:
+            counts[-1] += n - i
+            break
+        j = bisect_left(values, upper[index], i)
+        counts[index] += j - i
+        i = j
+    target.count += n
+    target.total += sum(values)
+    target.min = min(target.min, values[0])
+    target.max = max(target.max, values[-1])
+
+
+def _fold(target: _Shard, shard: _Shard) -> None:
+    target.counts = [a + b for a, b in zip(target.counts, shard.counts)]
+    target.count += shard.count
+    target.total += shard.total
+    target.min = min(target.min, shard.min)
+    target.max = max(target.max, shard.max)
+    _bucket_values(target, list(shard.pending))
+
+
+class LatencyHistogram:
+    def __init__(self) -> None:
+        self._local = threading.local()
+        # _shards[0] : mesures des threads terminés et des histogrammes fusionnés
+        self._shards: List[_Shard] = [_Shard()]
+        self._retired: Deque[_Shard] = deque()
+        self._lock = threading.Lock()
+
+    def _new_shard(self) -> _Shard:
+        shard = _Shard()
+        owner = _ShardOwner()
+        with self._lock:
+            self._collect_retired()
+            self._shards.append(shard)
+        local = self._local
+        local.shard = shard
+        local.pending = shard.pending
+        local.owner = owner
+        weakref.finalize(owner, self._retired.append, shard)
+        return shard
+
+    def _collect_retired(self) -> None:
+        """Replie dans _shards[0] les fragments des threads terminés (verrou tenu)."""
+        retired = self._retired
+        shards = self._shards
+        while retired:
+            shard = retired.popleft()
+            for i in range(1, len(shards)):
+                if shards[i] is shard:
+                    del shards[i]
+                    _fold(shards[0], shard)
+                    break
+            # Absent : déjà retiré par reset()
+
+    def record_ns(self, value: int) -> None:
+        """Enregistre une mesure (ns) ; sans verrou, utilisable depuis n'importe quel thread."""
+        try:
+            pending = self._local.pending
+        except AttributeError:
+            pending = self._new_shard().pending
+        pending.append(value)
+        if len(pending) >= _FLUSH:
+            self._flush_local()
+
+    def _flush_local(self) -> None:
+        local = self._local
+        shard = local.shard
+        values = shard.pending
+        # Nouvelle liste d'abord : une lecture concurrente voit au pire un lot manquant, jamais un doublon
+        shard.pending = local.pending = []
+        _bucket_values(shard, values)
+
+    def record_ms(self, value: float) -> None:
+        self.record_ns(int(value * 1_000_000))
+
+    # ------------------------------------------------------------
+    # Lecture / fusion
+    # ------------------------------------------------------------
+
+    def _merged(self) -> _Shard:
+        merged = _Shard()
+        with self._lock:
+            self._collect_retired()
+            shards = list(self._shards)
+        for shard in shards:
+            _fold(merged, shard)
+        return merged
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """Ajoute les mesures de other dans cet histogramme (other inchangé)."""
+        snapshot = other._merged()
+        with self._lock:
+            self._collect_retired()
+            _fold(self._shards[0], snapshot)
+        return self
+
+    @classmethod
+    def merged(cls, histograms: Iterable["LatencyHistogram"]) -> "LatencyHistogram":
+        out = cls()
+        for h in histograms:
+            out.merge(h)
+        return out
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            self._collect_retired()
+            return sum(shard.count + len(shard.pending) for shard in self._shards)
+
+    def fragments(self) -> int:
+        """Nombre de fragments : un par thread vivant ayant enregistré, plus le fragment commun."""
+        with self._lock:
+            self._collect_retired()
+            return len(self._shards)
+
+    def quantile_ns(self, q: float, _merged: Optional[_Shard] = None) -> Optional[float]:
+        merged = _merged or self._merged()
+        if not merged.count:
+            return None
+        rank = max(1, int(q * merged.count + 0.5))
+        seen = 0
+        for index, n in enumerate(merged.counts):
+            seen += n
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                value = (low + high - 1) / 2
+                return float(min(max(value, merged.min), merged.max))
+        return float(merged.max)
+
+    def percentiles(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, Optional[float]]:
+        return self._percentiles(self._merged(), quantiles)
+
+    def _percentiles(self, merged: _Shard, quantiles: Iterable[float]) -> Dict[str, Optional[float]]:
+        out: Dict[str, Optional[float]] = {}
+        for q in quantiles:
+            name = "p" + f"{q * 100:g}".replace(".", "")
+            value = self.quantile_ns(q, merged)
+            out[f"{name}_ms"] = None if value is None else value / 1_000_000
+        return out
+
+    def snapshot(self) -> Dict[str, Any]:
+        """count, avg/min/max et percentiles (millisecondes)."""
+        merged = self._merged()
+        ms = 1_000_000
+        out: Dict[str, Any] = {
+            "count": merged.count,
+            "avg_ms": (merged.total / merged.count / ms) if merged.count else 0.0,
+            "min_ms": merged.min / ms if merged.count else None,
+            "max_ms": merged.max / ms if merged.count else None,
+        }
+        out.update(self._percentiles(merged, DEFAULT_QUANTILES))
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shards = [_Shard()]
+            self._local = threading.local()
+
+
+# ============================================================
+# Registre de métriques (format texte Prometheus)
+# ============================================================
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        """Série pour ces valeurs de labels (à garder en référence sur les chemins chauds)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: labels attendus {self.labelnames}, reçus {key}.")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """(suffixe, labels texte, valeur)."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_number(value)}")
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    """
+    Compteur à fragments par thread : inc() sans verrou.
+    La cellule d'un thread terminé est ajoutée à _base puis retirée (comme les
+    fragments de LatencyHistogram).
+    """
+    __slots__ = ("_local", "_cells", "_retired", "_base", "_lock")
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._cells: List[List[float]] = []
+        self._retired: Deque[List[float]] = deque()
+        self._base: float = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        try:
+            self._local.cell[0] += amount
+        except AttributeError:
+            self._new_cell()[0] += amount
+
+    def _new_cell(self) -> List[float]:
+        cell: List[float] = [0]
+        owner = _ShardOwner()
+        with self._lock:
+            self._collect_retired()
+            self._cells.append(cell)
+        self._local.cell = cell
+        self._local.owner = owner
+        weakref.finalize(owner, self._retired.append, cell)
+        return cell
+
+    def _collect_retired(self) -> None:
+        """Ajoute à _base les cellules des threads terminés (verrou tenu)."""
+        cells = self._cells
+        while self._retired:
+            cell = self._retired.popleft()
+            for i, c in enumerate(cells):
+                if c is cell:
+                    del cells[i]
+                    self._base += cell[0]
+                    break
+
+    def get(self) -> float:
+        with self._lock:
+            self._collect_retired()
+            return self._base + sum(cell[0] for cell in self._cells)
+
+    def cells(self) -> int:
+        """Nombre de cellules : une par thread vivant ayant incrémenté."""
+        with self._lock:
+            self._collect_retired()
+            return len(self._cells)
+
+    def reset(self) -> None:
+        """Remet à zéro en place (les références gardées par les appelants restent valides)."""
+        with self._lock:
+            self._collect_retired()
+            for cell in self._cells:
+                cell[0] = 0
+            self._base = 0
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for key, child in self._series():
+            yield "", _labels_text(self.labelnames, key), child.get()
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Valeur calculée au moment de la collecte (ex: profondeur de file)."""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+    def reset(self) -> None:
+        self.value = 0.0
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.labels().set_function(function)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for key, child in self._series():
+            yield "", _labels_text(self.labelnames, key), child.get()
+
+
+class _LatencyChild(LatencyHistogram):
+    def observe(self, seconds: float) -> None:
+        self.record_ns(int(seconds * 1_000_000_000))
+
+
+class Histogram(_Metric):
+    """
+    Latences (secondes) au format histogramme Prometheus : _bucket{le=...}
+    cumulés, _sum et _count, agrégeables entre instances (histogram_quantile).
+
+    Les mesures restent dans un LatencyHistogram (enregistrement sans verrou) ;
+    les buckets "le" sont calculés à la collecte. Un bucket interne n'est compté
+    sous "le" que s'il est entièrement en dessous : sous-estimation bornée par
+    la résolution de l'histogramme (6.25 %) autour de chaque borne.
+    """
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        if not self.buckets or self.buckets[0] <= 0:
+            raise ValueError(f"{name}: bornes de buckets > 0 attendues.")
+        # Nombre de buckets internes entièrement sous chaque borne
+        self._cuts = [bisect_right(_UPPER, int(le * 1e9)) for le in self.buckets]
+
+    def _new_child(self) -> _LatencyChild:
+        return _LatencyChild()
+
+    def observe(self, seconds: float) -> None:
+        self.labels().observe(seconds)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for key, child in self._series():
+            merged = child._merged()
+            counts = merged.counts
+            seen, start = 0, 0
+            for le, cut in zip(self.buckets, self._cuts):
+                seen += sum(counts[start:cut])
+                start = cut
+                yield "_bucket", _labels_text(self.labelnames, key, f'le="{le:g}"'), seen
+            labels = _labels_text(self.labelnames, key)
+            yield "_bucket", _labels_text(self.labelnames, key, 'le="+Inf"'), merged.count
+            yield "_sum", labels, merged.total / 1e9
+            yield "_count", labels, merged.count
+
+
+class MetricsRegistry:
+    """
+    Registre de métriques du processus.
+
+    - counter / gauge / histogram : créés une fois (idempotent par nom)
+    - add_collector(fn) : métriques calculées à la collecte (fn() -> itérable de _Metric)
+    - render() : format texte Prometheus (exposé par la vue /metrics)
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, help: str, labelnames: Iterable[str], **options: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **options)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrique {name} déjà enregistrée avec un autre type.")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for collector in collectors:
+            metrics.extend(collector())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+    def clear(self) -> None:
+        """
+        Remet les séries à zéro en place (utile en tests) : les séries pré-résolues
+        gardées par les modules (dispatcher, canaux) restent celles du registre.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            for _, child in metric._series():
+                child.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
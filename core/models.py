@@ -5,14 +5,18 @@ Modèles métier minimalistes pour la phase POO (sans Web/Docker).
 Objectifs :
 - structures stables pour Mixins / Notifiers / Dispatcher
 - démonstration : priorité, canaux, fallback, confirmation de livraison
+- dataclasses à __slots__ (pas de __dict__ par instance) : empreinte mémoire
+  réduite pour les campagnes à millions de résultats
+  (voir aussi core/results.py : DeliveryResultBatch, stockage en colonnes)
 """
 from dataclasses import dataclass, field
 from enum import Enum, IntEnum
 from typing import Any, Dict, List, Optional
+import logging
 import time
-import uuid
 
 from core.emergencies import EmergencyType
+from core.ids import new_id
 
 
 class Priority(IntEnum):
@@ -43,7 +47,7 @@ class DeliveryStatus(str, Enum):
     SKIPPED = "skipped"
 
 
-@dataclass
+@dataclass(slots=True)
 class Notification:
     """
     Notification à livrer.
@@ -52,16 +56,24 @@ class Notification:
     - message : contenu
     - zone : zone ciblée (optionnel)
     - meta : données additionnelles (optionnel)
+    - expires_at : horodatage (time.time()) après lequel le message n'a plus
+      d'utilité (optionnel) ; les livraisons en retard sont SKIPPED
     """
     emergency_type: EmergencyType
     priority: Priority
     message: str
     zone: Optional[str] = None
     meta: Dict[str, Any] = field(default_factory=dict)
-    notification_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    notification_id: str = field(default_factory=new_id)
+    expires_at: Optional[float] = None
 
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        if self.expires_at is None:
+            return False
+        return (time.time() if now is None else now) >= self.expires_at
 
-@dataclass
+
+@dataclass(slots=True)
 class UserPreferences:
     """
     Préférences utilisateur :
@@ -74,7 +86,7 @@ class UserPreferences:
     language: str = "fr"
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """
     Utilisateur cible.
@@ -89,7 +101,7 @@ class User:
     preferences: UserPreferences = field(default_factory=UserPreferences)
 
 
-@dataclass
+@dataclass(slots=True)
 class DeliveryResult:
     """
     Résultat d'une tentative d'envoi.
@@ -103,7 +115,7 @@ class DeliveryResult:
     user_id: str
     channel: str
     status: DeliveryStatus
-    delivery_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    delivery_id: str = field(default_factory=new_id)
     error: Optional[str] = None
     timestamp: float = field(default_factory=time.time)
 
@@ -131,9 +143,34 @@ class BaseNotifier:
     """
     __abstract__ = True
 
-    def log(self, message: str) -> None:
-        # Implémentation par défaut, enrichissable par LoggingMixin
-        print(message)
+    def log(self, message: str, *args: Any, level: int = logging.INFO, **fields: Any) -> None:
+        # Implémentation par défaut (print), remplacée par LoggingMixin (logs structurés)
+        # message au style paresseux : log("Trying channel=%s", channel)
+        print(message % args if args else message)
 
     def send(self, notification: Notification, user: User) -> List[DeliveryResult]:
         raise NotImplementedError("BaseNotifier.send doit être fourni par un notificateur concret.")
+
+
+class AsyncChannel:
+    """
+    Variante asyncio de Channel : send est une coroutine.
+    Permet de garder des milliers d'envois en vol sur une seule boucle d'événements.
+    """
+    name: str = "channel"
+
+    async def send(self, notification: Notification, user: User) -> DeliveryResult:
+        raise NotImplementedError("AsyncChannel.send doit être implémentée.")
+
+
+class AsyncBaseNotifier(BaseNotifier):
+    """
+    Classe de base des notificateurs asyncio.
+
+    Contrat :
+    - async send(notification, user) -> List[DeliveryResult]
+    """
+    __abstract__ = True
+
+    async def send(self, notification: Notification, user: User) -> List[DeliveryResult]:
+        raise NotImplementedError("AsyncBaseNotifier.send doit être fourni par un notificateur concret.")
@@ -6,18 +6,37 @@ Notificateur concret qui combine :
 - Registry canaux
 - Retry
 - Fallback
+- Limitation de débit par canal (token bucket)
+- Disjoncteurs par canal (circuit breaker)
 - Mixins canaux SMS/Email/Push
+
+AsyncEmergencyNotifier : même composition, version asyncio
+(sémaphores par canal + fallback awaité).
+
+Chaque envoi est un span "notifier.send" (core.tracing), parent des tentatives canal.
+
+CampusSecurityNotifier : spécialisation "Sécurité Campus" (canaux redondants) :
+les alertes SECURITY et toutes les alertes URGENT partent sur tous les canaux à la fois.
 """
+import logging
 from typing import List
 
 from mixins.channels import LoggingMixin, ChannelRegistryMixin, SMSMixin, EmailMixin, PushMixin
 from mixins.retry import RetryMixin, FallbackMixin
-from core.models import BaseNotifier, Notification, User, DeliveryResult
+from mixins.rate_limit import RateLimitMixin
+from mixins.circuit_breaker import CircuitBreakerMixin
+from mixins.async_channels import ChannelConcurrencyMixin, AsyncSMSMixin, AsyncEmailMixin, AsyncPushMixin
+from mixins.async_retry import AsyncFallbackMixin
+from core import tracing
+from core.emergencies import EmergencyType
+from core.models import AsyncBaseNotifier, BaseNotifier, Notification, Priority, User, DeliveryResult
 
 
 class EmergencyNotifier(
     LoggingMixin,
     ChannelRegistryMixin,
+    CircuitBreakerMixin,
+    RateLimitMixin,
     RetryMixin,
     FallbackMixin,
     SMSMixin,
@@ -32,5 +51,46 @@ class EmergencyNotifier(
         Point d'entrée appelé par le Dispatcher.
         Retourne une liste de DeliveryResult (tentatives).
         """
-        self.log("EmergencyNotifier.send called")
-        return self.send_with_fallback(notification, user)
+        self.log("EmergencyNotifier.send called", level=logging.DEBUG)
+        with tracing.span(
+            "notifier.send",
+            notifier=type(self).__name__,
+            notification_id=notification.notification_id,
+            user_id=user.user_id,
+        ):
+            return self.send_with_fallback(notification, user)
+
+
+class CampusSecurityNotifier(EmergencyNotifier):
+    """Canaux redondants : fan-out pour SECURITY et pour toute priorité URGENT."""
+    fanout_priorities = frozenset({Priority.URGENT})
+    fanout_types = frozenset({EmergencyType.SECURITY})
+
+
+class AsyncEmergencyNotifier(
+    LoggingMixin,
+    ChannelRegistryMixin,
+    CircuitBreakerMixin,
+    RateLimitMixin,
+    ChannelConcurrencyMixin,
+    AsyncFallbackMixin,
+    AsyncSMSMixin,
+    AsyncEmailMixin,
+    AsyncPushMixin,
+    AsyncBaseNotifier,
+):
+    __abstract__ = False
+
+    async def send(self, notification: Notification, user: User) -> List[DeliveryResult]:
+        """
+        Point d'entrée appelé par l'AsyncDispatcher.
+        Retourne une liste de DeliveryResult (tentatives).
+        """
+        self.log("AsyncEmergencyNotifier.send called", level=logging.DEBUG)
+        with tracing.span(
+            "notifier.send",
+            notifier=type(self).__name__,
+            notification_id=notification.notification_id,
+            user_id=user.user_id,
+        ):
+            return await self.send_with_fallback(notification, user)
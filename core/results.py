@@ -0,0 +1,140 @@
+"""
+core/results.py
+
+Stockage en colonnes des résultats de livraison (campagnes à gros volume).
+
+DeliveryResultBatch garde un résultat par ligne, sans objet par résultat :
+- canal + statut : un octet (array "B"), code = canal * 8 + statut
+- horodatage : array "d" (8 octets)
+- notification_id / user_id / delivery_id : références vers les chaînes
+  (les identifiants répétés sont partagés)
+- erreurs : dictionnaire creux {ligne: message} (la plupart des envois n'en ont pas)
+
+Les DeliveryResult ne sont recréés qu'à la demande (batch[i], itération).
+Les agrégations (par statut, par canal) travaillent directement sur les codes.
+
+    batch = DeliveryResultBatch()
+    dispatcher.dispatch_to(batch.append)
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from core.models import DeliveryResult, DeliveryStatus
+
+
+_STATUSES: List[DeliveryStatus] = list(DeliveryStatus)
+_STATUS_CODES: Dict[DeliveryStatus, int] = {s: i for i, s in enumerate(_STATUSES)}
+_MAX_CHANNELS = 256 // 8
+
+
+class DeliveryResultBatch:
+    def __init__(self, results: Iterable[DeliveryResult] = ()) -> None:
+        self._codes = array("B")
+        self._timestamps = array("d")
+        self._notification_ids: List[str] = []
+        self._user_ids: List[str] = []
+        self._delivery_ids: List[str] = []
+        self._errors: Dict[int, str] = {}
+        self._channels: List[str] = []
+        self._channel_codes: Dict[str, int] = {}
+        self.extend(results)
+
+    def _channel_code(self, channel: str) -> int:
+        code = self._channel_codes.get(channel)
+        if code is None:
+            code = len(self._channels)
+            if code >= _MAX_CHANNELS:
+                raise ValueError(f"DeliveryResultBatch: au plus {_MAX_CHANNELS} canaux distincts.")
+            self._channels.append(channel)
+            self._channel_codes[channel] = code
+        return code
+
+    # ------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------
+
+    def append(self, result: DeliveryResult) -> None:
+        index = len(self._codes)
+        self._codes.append(self._channel_code(result.channel) * 8 + _STATUS_CODES[result.status])
+        self._timestamps.append(result.timestamp)
+        self._notification_ids.append(result.notification_id)
+        self._user_ids.append(result.user_id)
+        self._delivery_ids.append(result.delivery_id)
+        if result.error is not None:
+            self._errors[index] = result.error
+
+    def extend(self, results: Iterable[DeliveryResult]) -> None:
+        for result in results:
+            self.append(result)
+
+    # ------------------------------------------------------------
+    # Lecture (objets recréés à la demande)
+    # ------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __getitem__(self, index: int) -> DeliveryResult:
+        if index < 0:
+            index += len(self._codes)
+        code = self._codes[index]
+        return DeliveryResult(
+            notification_id=self._notification_ids[index],
+            user_id=self._user_ids[index],
+            channel=self._channels[code >> 3],
+            status=_STATUSES[code & 7],
+            delivery_id=self._delivery_ids[index],
+            error=self._errors.get(index),
+            timestamp=self._timestamps[index],
+        )
+
+    def __iter__(self) -> Iterator[DeliveryResult]:
+        for index in range(len(self._codes)):
+            yield self[index]
+
+    def where(self, status: Optional[DeliveryStatus] = None, channel: Optional[str] = None) -> Iterator[DeliveryResult]:
+        """Résultats filtrés (seules les lignes retenues sont matérialisées)."""
+        for index, code in enumerate(self._codes):
+            if status is not None and _STATUSES[code & 7] != status:
+                continue
+            if channel is not None and self._channels[code >> 3] != channel:
+                continue
+            yield self[index]
+
+    # ------------------------------------------------------------
+    # Agrégations
+    # ------------------------------------------------------------
+
+    def counts(self) -> Dict[str, Dict[DeliveryStatus, int]]:
+        """{canal: {statut: nombre}} en un seul passage sur les codes."""
+        out: Dict[str, Dict[DeliveryStatus, int]] = {}
+        for code, n in Counter(self._codes).items():
+            out.setdefault(self._channels[code >> 3], {})[_STATUSES[code & 7]] = n
+        return out
+
+    def counts_by_status(self) -> Dict[DeliveryStatus, int]:
+        totals: Dict[DeliveryStatus, int] = {}
+        for code, n in Counter(self._codes).items():
+            status = _STATUSES[code & 7]
+            totals[status] = totals.get(status, 0) + n
+        return totals
+
+    def counts_by_channel(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for code, n in Counter(self._codes).items():
+            channel = self._channels[code >> 3]
+            totals[channel] = totals.get(channel, 0) + n
+        return totals
+
+    def success_rate(self) -> float:
+        """Part des utilisateurs ayant au moins un canal SENT."""
+        if not self._codes:
+            return 0.0
+        sent = _STATUS_CODES[DeliveryStatus.SENT]
+        user_ids = self._user_ids
+        delivered = {user_ids[i] for i, code in enumerate(self._codes) if code & 7 == sent}
+        return len(delivered) / len(set(user_ids))
@@ -0,0 +1,276 @@
+"""
+core/sharding.py
+
+ShardedDispatcher : dispatch multi-processus (contourne le GIL).
+
+- Les jobs sont partitionnés par hash(user_id) entre N processus (shards) :
+  tous les jobs d'un même utilisateur vont dans le même shard, qui les traite
+  séquentiellement par priorité -> l'ordre par utilisateur est préservé.
+- Les échanges parent <-> shards utilisent des tuples compacts (types natifs),
+  pas les dataclasses : notifications dédupliquées, users aplatis,
+  notifier transmis par son chemin de classe (module:Classe).
+- Chaque shard renvoie ses résultats par paquets ; le parent fusionne les flux
+  au fil de l'eau et tient la progression par priorité (self.progress).
+- Un job de la file parent n'est acquitté (task_done) qu'une fois ses résultats
+  reçus du shard : un shard en échec laisse ses jobs non acquittés (repris par
+  une file durable).
+- Un shard arrêté sans paquet de fin (crash, kill) est détecté par le parent
+  (attente bornée + is_alive) : RuntimeError au lieu d'une attente infinie.
+- limites de débit (RateLimitMixin) : chaque shard reçoit 1 / N du débit,
+  le total reste celui configuré
+- retry_policy est transmise aux shards (nouvelles tentatives dans le shard) ;
+  la suppression des doublons (coalescer) est appliquée par le parent, à la
+  planification et au déroulement des diffusions, avant le partitionnement.
+
+Contrainte : le notifier doit pouvoir être recréé sans argument dans le shard.
+"""
+from __future__ import annotations
+
+import importlib
+import multiprocessing as mp
+import os
+import queue
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from core.dispatcher import DispatchJob, Dispatcher, RetryPolicy
+from core.emergencies import EmergencyType
+from core.models import DeliveryResult, DeliveryStatus, Notification, Priority, User, UserPreferences
+from mixins.rate_limit import set_process_share
+
+
+# ------------------------------------------------------------
+# Sérialisation compacte
+# ------------------------------------------------------------
+
+def _pack_notification(n: Notification) -> tuple:
+    return (n.notification_id, n.emergency_type.value, int(n.priority), n.message, n.zone, n.meta, n.expires_at)
+
+
+def _unpack_notification(t: tuple) -> Notification:
+    nid, etype, priority, message, zone, meta, expires_at = t
+    return Notification(
+        emergency_type=EmergencyType(etype),
+        priority=Priority(priority),
+        message=message,
+        zone=zone,
+        meta=meta,
+        notification_id=nid,
+        expires_at=expires_at,
+    )
+
+
+def _pack_user(u: User) -> tuple:
+    p = u.preferences
+    return (
+        u.user_id, u.email, u.phone, u.push_token,
+        tuple(p.enabled_channels), tuple(e.value for e in p.opt_out_types), p.language,
+    )
+
+
+def _unpack_user(t: tuple) -> User:
+    user_id, email, phone, push_token, channels, opt_out, language = t
+    prefs = UserPreferences(
+        enabled_channels=list(channels),
+        opt_out_types=[EmergencyType(e) for e in opt_out],
+        language=language,
+    )
+    return User(user_id=user_id, email=email, phone=phone, push_token=push_token, preferences=prefs)
+
+
+def _pack_result(r: DeliveryResult, priority: int) -> tuple:
+    return (r.notification_id, r.user_id, r.channel, r.status.value, r.delivery_id, r.error, r.timestamp, priority)
+
+
+def _unpack_result(t: tuple) -> DeliveryResult:
+    nid, user_id, channel, status, delivery_id, error, timestamp, _ = t
+    return DeliveryResult(
+        notification_id=nid,
+        user_id=user_id,
+        channel=channel,
+        status=DeliveryStatus(status),
+        delivery_id=delivery_id,
+        error=error,
+        timestamp=timestamp,
+    )
+
+
+def _class_path(obj: object) -> str:
+    cls = type(obj)
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _load_class(path: str) -> type:
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def shard_of(user_id: str, shards: int) -> int:
+    """Shard d'un utilisateur (hash stable entre processus, contrairement à hash())."""
+    return zlib.crc32(user_id.encode("utf-8")) % shards
+
+
+# ------------------------------------------------------------
+# Processus shard
+# ------------------------------------------------------------
+
+def _run_shard(
+    shard_id: int,
+    notifications: Dict[str, tuple],
+    jobs: List[Tuple[str, tuple, str, Optional[float]]],
+    out: Any,
+    chunk_size: int,
+    retry_policy: Optional[RetryPolicy] = None,
+    rate_share: float = 1.0,
+) -> None:
+    """
+    Traite les jobs d'un shard et pousse des paquets
+    (shard_id, résultats, faits par priorité, positions des jobs terminés).
+    Un paquet (shard_id, None, erreur|None, None) signale la fin du shard.
+    """
+    error = None
+    try:
+        set_process_share(rate_share)
+        notifs = {nid: _unpack_notification(t) for nid, t in notifications.items()}
+        notifiers: Dict[str, object] = {}
+
+        local = Dispatcher(retry_policy=retry_policy)
+        # id(job) -> position dans `jobs` (acquittement côté parent)
+        positions: Dict[int, int] = {}
+        for position, (nid, user_t, notifier_path, expires_at) in enumerate(jobs):
+            notifier = notifiers.get(notifier_path)
+            if notifier is None:
+                notifier = notifiers[notifier_path] = _load_class(notifier_path)()
+            job = DispatchJob(notification=notifs[nid], user=_unpack_user(user_t), notifier=notifier, expires_at=expires_at)
+            positions[id(job)] = position
+            local.priority_queue.add(job, priority=job.notification.priority, deadline=job.deadline)
+
+        chunk: List[tuple] = []
+        done: Dict[int, int] = {}
+        finished: List[int] = []
+        for job in local.iter_jobs():
+            priority = int(job.notification.priority)
+            results = local.run_job(job)
+            for r in results:
+                chunk.append(_pack_result(r, priority))
+            local._maybe_retry(job, results)
+            # Les nouvelles tentatives restent dans le shard (comme la roue du Dispatcher)
+            position = positions.pop(id(job), None)
+            if position is not None:
+                done[priority] = done.get(priority, 0) + 1
+                finished.append(position)
+
+            if len(chunk) >= chunk_size:
+                out.put((shard_id, chunk, done, finished))
+                chunk, done, finished = [], {}, []
+
+        if chunk or done:
+            out.put((shard_id, chunk, done, finished))
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        out.put((shard_id, None, error, None))
+
+
+# ------------------------------------------------------------
+# Dispatcher parent
+# ------------------------------------------------------------
+
+class ShardedDispatcher(Dispatcher):
+    def __init__(
+        self,
+        shards: Optional[int] = None,
+        chunk_size: int = 256,
+        priority_queue=None,
+        retry_policy: Optional[RetryPolicy] = None,
+        coalescer=None,
+        poll_interval: float = 1.0,
+    ) -> None:
+        """
+        shards : nombre de processus (défaut : nombre de cœurs)
+        chunk_size : nombre de résultats par paquet renvoyé au parent
+        retry_policy : transmise à chaque shard
+        coalescer : appliqué par le parent avant le partitionnement
+        poll_interval : attente maximale (s) d'un paquet avant de vérifier
+        que les shards sont toujours vivants
+        """
+        if poll_interval <= 0:
+            raise ValueError("poll_interval doit être > 0.")
+        super().__init__(priority_queue=priority_queue, retry_policy=retry_policy, coalescer=coalescer)
+        self.shards = shards or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.progress: Dict[Priority, Dict[str, int]] = {}
+
+    def dispatch_iter(self, max_workers: Optional[int] = None) -> Iterator[DeliveryResult]:
+        """
+        Partitionne la file entre les shards puis fusionne leurs flux de résultats.
+
+        max_workers : nombre de processus (défaut : self.shards)
+        """
+        shards = max_workers or self.shards
+        notifications: List[Dict[str, tuple]] = [{} for _ in range(shards)]
+        jobs: List[List[Tuple[str, tuple, str, Optional[float]]]] = [[] for _ in range(shards)]
+        # Jobs parent par shard, même position que dans jobs[s] (acquittement)
+        owned: List[List[DispatchJob]] = [[] for _ in range(shards)]
+        self.progress = {p: {"scheduled": 0, "done": 0} for p in sorted(Priority, reverse=True)}
+
+        # 1) Partition (la file parent est vidée dans l'ordre de priorité)
+        for job in self.iter_jobs():
+            n = job.notification
+            s = shard_of(job.user.user_id, shards)
+            if n.notification_id not in notifications[s]:
+                notifications[s][n.notification_id] = _pack_notification(n)
+            jobs[s].append((n.notification_id, _pack_user(job.user), _class_path(job.notifier), job.expires_at))
+            owned[s].append(job)
+            self.progress[n.priority]["scheduled"] += 1
+
+        active = [s for s in range(shards) if jobs[s]]
+        if not active:
+            return
+
+        # 2) Lancement des shards
+        ctx = mp.get_context()
+        out = ctx.Queue()
+        procs = {
+            s: ctx.Process(
+                target=_run_shard,
+                args=(s, notifications[s], jobs[s], out, self.chunk_size, self.retry_policy, 1.0 / len(active)),
+                daemon=True,
+            )
+            for s in active
+        }
+        del notifications, jobs
+        for p in procs.values():
+            p.start()
+
+        # 3) Fusion des flux
+        running = dict(procs)
+        suspects: Set[int] = set()
+        try:
+            while running:
+                try:
+                    shard_id, chunk, done, finished = out.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    # Un shard mort depuis un intervalle complet n'enverra plus rien
+                    dead = {s for s, p in running.items() if not p.is_alive()}
+                    for s in dead & suspects:
+                        raise RuntimeError(f"Shard {s} arrêté sans paquet de fin (exitcode {running[s].exitcode}).")
+                    suspects = dead
+                    continue
+                if chunk is None:
+                    running.pop(shard_id, None)
+                    if done is not None:
+                        raise RuntimeError(f"Shard {shard_id} en échec: {done}")
+                    continue
+                for priority, count in done.items():
+                    self.progress[Priority(priority)]["done"] += count
+                for position in finished:
+                    self._ack(owned[shard_id][position])
+                for t in chunk:
+                    yield _unpack_result(t)
+        finally:
+            for p in procs.values():
+                p.join(timeout=5)
+                if p.is_alive():
+                    p.terminate()
@@ -0,0 +1,196 @@
+"""
+core/structured_logging.py
+
+Backend de logs des notificateurs (logger "notifications").
+
+- Niveau vérifié avant tout formatage : un log DEBUG désactivé ne coûte
+  qu'un appel à isEnabledFor (les messages utilisent le style paresseux "%s")
+- Écriture asynchrone : file -> QueueListener (thread de fond) ; côté appelant,
+  un log n'est qu'un tuple mis en file : construction du LogRecord, formatage
+  (JSON) et écriture sur le flux se font dans le thread de fond
+- File bornée : au-delà de queue_size, les logs sont abandonnés (compteur dropped)
+- Format JSON (une ligne par enregistrement) avec les champs structurés passés
+  au log : notifier.log("Delivered via %s", "sms", event="delivered", channel="sms")
+
+Configuration explicite :
+
+    configure_logging(level="WARNING")          # campagne de masse
+    configure_logging(level="DEBUG", json_format=False)
+
+Sans configuration, le premier log des notificateurs installe la configuration par
+défaut (INFO, JSON sur stdout), sauf si le logger "notifications" a déjà des
+handlers (ex: LOGGING de Django) : ils sont alors respectés.
+
+Après un fork (shards multi-processus), le thread de fond n'existe pas dans
+l'enfant : l'enfant repasse en écriture synchrone sur les mêmes handlers
+(aucun log ne reste bloqué dans une file que personne ne lit).
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO, Any, Dict, Optional, Union
+
+LOGGER_NAME = "notifications"
+
+_logger = logging.getLogger(LOGGER_NAME)
+_listener: Optional[QueueListener] = None
+# File du backend asynchrone (None si le logger est configuré par ailleurs)
+_records: Optional["queue.SimpleQueue[Any]"] = None
+_queue_size = 0
+_lock = threading.RLock()
+
+dropped = 0  # enregistrements abandonnés (file pleine)
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON : ts, level, logger, notifier, msg + champs structurés."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        notifier = getattr(record, "notifier", None)
+        if notifier is not None:
+            payload["notifier"] = notifier
+        payload.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler qui ne formate pas dans le thread appelant :
+    l'enregistrement est transmis tel quel (file en mémoire, même processus).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        _put(record)
+
+
+class _RecordListener(QueueListener):
+    """Construit dans le thread de fond les LogRecord des logs rapides (tuples)."""
+
+    def prepare(self, item: Any) -> logging.LogRecord:
+        if not isinstance(item, tuple):
+            return item
+        level, message, args, created, notifier, fields, thread = item
+        record = logging.LogRecord(LOGGER_NAME, level, "", 0, message, args, None)
+        record.created = created
+        record.msecs = (created - int(created)) * 1000
+        record.thread = thread
+        record.notifier = notifier
+        record.fields = fields
+        return record
+
+
+def _put(item: Any) -> None:
+    global dropped
+    records = _records
+    if records is None:
+        return
+    if records.qsize() >= _queue_size:
+        dropped += 1
+        return
+    records.put(item)
+
+
+def configure_logging(
+    level: Union[int, str] = logging.INFO,
+    stream: Optional[IO[str]] = None,
+    json_format: bool = True,
+    queue_size: int = 100_000,
+) -> logging.Logger:
+    """
+    (Re)configure le logger "notifications" avec une écriture en arrière-plan.
+    queue_size : au-delà, les nouveaux enregistrements sont perdus plutôt que de bloquer l'envoi.
+    """
+    global _listener, _records, _queue_size
+    with _lock:
+        _stop_listener()
+        for handler in list(_logger.handlers):
+            _logger.removeHandler(handler)
+
+        target = logging.StreamHandler(stream if stream is not None else sys.stdout)
+        target.setFormatter(JsonFormatter() if json_format else logging.Formatter("[LOG] %(message)s"))
+
+        _records = queue.SimpleQueue()
+        _queue_size = queue_size
+        _logger.addHandler(_DeferredQueueHandler(_records))
+        _logger.setLevel(level)
+        _logger.propagate = False
+
+        _listener = _RecordListener(_records, target, respect_handler_level=True)
+        _listener.start()
+        return _logger
+
+
+def _stop_listener() -> None:
+    global _listener, _records
+    _records = None
+    if _listener is not None:
+        _listener.stop()  # vide la file avant de rendre la main
+        _listener = None
+
+
+def shutdown_logging() -> None:
+    """Écrit les enregistrements en attente et arrête le thread de fond."""
+    with _lock:
+        _stop_listener()
+        for handler in list(_logger.handlers):
+            if isinstance(handler, _DeferredQueueHandler):
+                _logger.removeHandler(handler)
+
+
+def notifier_logger() -> logging.Logger:
+    """Logger des notificateurs (configuration par défaut à la première utilisation)."""
+    if not _logger.handlers:
+        with _lock:
+            if not _logger.handlers:
+                configure_logging()
+    return _logger
+
+
+def emit(level: int, message: str, args: tuple, notifier: Optional[str], fields: Dict[str, Any]) -> None:
+    """
+    Log déjà filtré par niveau (notifier_logger().isEnabledFor).
+    Backend asynchrone actif : un simple tuple est mis en file, le LogRecord est
+    construit et formaté par le thread de fond. Sinon : logger standard.
+    """
+    if _records is not None:
+        _put((level, message, args, time.time(), notifier, fields, threading.get_ident()))
+    else:
+        _logger.log(level, message, *args, extra={"notifier": notifier, "fields": fields})
+
+
+def _after_fork_in_child() -> None:
+    """Enfant d'un fork : handlers du listener branchés directement sur le logger."""
+    global _listener, _records, _lock
+    _lock = threading.RLock()  # a pu être copié verrouillé
+    listener, _listener, _records = _listener, None, None
+    if listener is None:
+        return
+    for handler in list(_logger.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            _logger.removeHandler(handler)
+    for handler in listener.handlers:
+        _logger.addHandler(handler)
+
+
+atexit.register(shutdown_logging)
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,277 @@
+"""
+core/tracing.py
+
+Traces légères (spans) du parcours d'une alerte :
+dispatcher.schedule -> dispatcher.job -> notifier.send -> channel.attempt / channel.retry
+
+- span courant porté par un contextvars.ContextVar : suit les appels imbriqués,
+  les tâches asyncio (contexte copié à la création) et les pools de threads
+  via bind()
+- échantillonnage en tête (head sampling) : la décision est prise à la racine
+  de la trace (sample_rate) et héritée par tous les spans enfants ; une trace
+  non retenue ne coûte qu'une lecture de ContextVar par span
+- désactivé par défaut : sans configure_tracing(), span() retourne un contexte
+  vide partagé (aucun span créé, aucun ContextVar modifié)
+- exporteurs : RingBufferExporter (mémoire bornée, défaut) ou JsonlFileExporter
+  (une ligne JSON par span)
+
+Le lien entre planification et envoi (file d'attente, autre thread) est
+explicite : le job garde le span de sa planification (DispatchJob.trace) et le
+span d'exécution en est l'enfant, avec le temps d'attente en attribut (wait_ms).
+
+    exporter = configure_tracing(sample_rate=0.05)
+    ...
+    for s in exporter.trace(trace_id):
+        print(s.name, s.duration_ms, s.attributes)
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Deque, Dict, List, Optional
+
+from core.ids import new_id
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int = 0  # time.time_ns()
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"  # "ok" | "error"
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else 0.0
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class RingBufferExporter:
+    """Garde les `capacity` derniers spans terminés (les plus anciens sont écrasés)."""
+
+    def __init__(self, capacity: int = 10_000) -> None:
+        if capacity < 1:
+            raise ValueError("capacity doit être >= 1.")
+        self._spans: Deque[Span] = deque(maxlen=capacity)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)  # deque.append est atomique
+
+    def spans(self) -> List[Span]:
+        return list(self._spans)
+
+    def trace(self, trace_id: str) -> List[Span]:
+        """Spans d'une trace, par ordre de début."""
+        return sorted((s for s in list(self._spans) if s.trace_id == trace_id), key=lambda s: s.start_ns)
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlFileExporter:
+    """Une ligne JSON par span (fichier ouvert en ajout, écriture tamponnée)."""
+
+    def __init__(self, path: str) -> None:
+        self._file: IO[str] = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class _Tracer:
+    __slots__ = ("sample_rate", "exporter")
+
+    def __init__(self, sample_rate: float, exporter: Any) -> None:
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+
+# Marqueur "trace non échantillonnée" : les enfants ne redécident pas
+_UNSAMPLED: Any = object()
+# Valeur par défaut de parent : hériter du span courant
+_INHERIT: Any = object()
+
+_current: contextvars.ContextVar[Any] = contextvars.ContextVar("notifications_span", default=None)
+_tracer: Optional[_Tracer] = None
+_lock = threading.Lock()
+
+
+def configure_tracing(sample_rate: float = 1.0, exporter: Any = None) -> Any:
+    """
+    Active les traces. sample_rate : part des traces racines retenues (0..1).
+    exporter : objet avec export(span) (défaut : RingBufferExporter()). Retourne l'exporteur.
+    """
+    global _tracer
+    if not 0.0 <= sample_rate <= 1.0:
+        raise ValueError("sample_rate doit être entre 0 et 1.")
+    if exporter is None:
+        exporter = RingBufferExporter()
+    with _lock:
+        previous, _tracer = _tracer, _Tracer(sample_rate, exporter)
+    if previous is not None and previous.exporter is not exporter:
+        previous.exporter.close()
+    return exporter
+
+
+def shutdown_tracing() -> None:
+    """Désactive les traces et ferme l'exporteur."""
+    global _tracer
+    with _lock:
+        previous, _tracer = _tracer, None
+    if previous is not None:
+        previous.exporter.close()
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def current_span() -> Optional[Span]:
+    span = _current.get()
+    return None if span is _UNSAMPLED else span
+
+
+def _span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def start_span(name: str, parent: Any = _INHERIT, **attributes: Any) -> Optional[Span]:
+    """
+    Crée un span sans l'activer (à terminer avec end_span).
+    parent : span parent explicite (None = trace non retenue) ; par défaut le span courant,
+    ou une nouvelle trace racine (décision d'échantillonnage) s'il n'y en a pas.
+    Retourne None si la trace n'est pas échantillonnée.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return None
+    if parent is _INHERIT:
+        parent = _current.get()
+        if parent is None:
+            if tracer.sample_rate < 1.0 and random.random() >= tracer.sample_rate:
+                return None
+            return Span(name, new_id(), _span_id(), None, time.time_ns(), attributes=attributes)
+    if parent is None or parent is _UNSAMPLED:
+        return None
+    return Span(name, parent.trace_id, _span_id(), parent.span_id, time.time_ns(), attributes=attributes)
+
+
+def end_span(span: Optional[Span], error: Optional[BaseException] = None) -> None:
+    """Termine et exporte un span (sans effet sur None)."""
+    if span is None:
+        return
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.status = "error"
+        span.attributes["error"] = repr(error)
+    tracer = _tracer
+    if tracer is not None:
+        tracer.exporter.export(span)
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+
+_NOOP = _NoopScope()
+
+
+class _Scope:
+    """Active un span (ou le marqueur non échantillonné) pendant un bloc with."""
+
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Any) -> None:
+        self.span = span
+
+    def __enter__(self) -> Optional[Span]:
+        self.token = _current.set(self.span)
+        return None if self.span is _UNSAMPLED else self.span
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> bool:
+        _current.reset(self.token)
+        if self.span is not _UNSAMPLED:
+            end_span(self.span, exc)
+        return False
+
+
+def span(name: str, parent: Any = _INHERIT, **attributes: Any) -> Any:
+    """
+    Contexte with : crée et active un span, le termine en sortie.
+    Produit le Span (pour span.set(...)) ou None si la trace n'est pas retenue.
+
+        with span("channel.attempt", channel="sms") as s:
+            ...
+            if s is not None:
+                s.set(status="sent")
+    """
+    if _tracer is None:
+        return _NOOP
+    if parent is _INHERIT and _current.get() is _UNSAMPLED:
+        return _NOOP
+    new = start_span(name, parent, **attributes)
+    # Trace non retenue : les enfants héritent de la décision
+    return _Scope(new if new is not None else _UNSAMPLED)
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Propage le contexte de trace courant dans fn (pour pool.submit) ;
+    retourne fn tel quel si aucune trace n'est en cours.
+    """
+    if _current.get() is None:
+        return fn
+    return _bound(contextvars.copy_context(), fn)
+
+
+def _bound(context: contextvars.Context, fn: Callable[..., Any]) -> Callable[..., Any]:
+    def run(*args: Any, **kwargs: Any) -> Any:
+        # Un Context ne peut être actif que dans un thread à la fois : copie par appel
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+atexit.register(shutdown_tracing)
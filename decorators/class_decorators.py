@@ -1,7 +1,7 @@
 # decorators/class_decorators.py
 """
 Décorateur de classe : ajoute un suivi automatique des performances
-sans modifier la logique métier.
+sans modifier la logique métier (histogrammes de latence, percentiles).
 
 But pédagogique :
 - cross-cutting concern
@@ -10,77 +10,149 @@ But pédagogique :
 
 from __future__ import annotations
 
-import time
-from typing import Any, Dict, List, Callable
+import functools
+import inspect
+import threading
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+from core.metrics import LatencyHistogram
 
-def add_performance_tracking(cls):
+
+def add_performance_tracking(
+    cls=None,
+    *,
+    methods: Optional[Iterable[str]] = None,
+    label: Optional[Callable[[Any], Optional[str]]] = None,
+):
     """
     Décorateur de classe.
 
     Il wrappe une méthode cible :
     - prioritaire: send_notification()
     - sinon: send()
+    ou les méthodes listées (ex: methods=("send", "send_sms", "send_email", "send_push")
+    pour une latence par canal).
 
-    Il mesure le temps d'exécution et stocke des métriques sur la classe/instance.
-    """
+    Chaque méthode (et chaque label) a son histogramme de latence
+    (core.metrics.LatencyHistogram : percentiles, fragments par thread, sans verrou).
+    label : fonction optionnelle self -> str (ex: lambda n: n.name) pour des
+    séries par instance.
 
-    # Déterminer la méthode à wrapper
-    target_name = None
-    if hasattr(cls, "send_notification") and callable(getattr(cls, "send_notification")):
-        target_name = "send_notification"
+    Utilisable avec ou sans arguments :
+        @add_performance_tracking
+        @add_performance_tracking(methods=("send", "send_sms"), label=lambda self: self.region)
+    """
+    if cls is None:
+        return lambda c: add_performance_tracking(c, methods=methods, label=label)
+
+    # Déterminer la (les) méthode(s) à wrapper
+    if methods is not None:
+        targets = list(methods)
+        missing = [m for m in targets if not callable(getattr(cls, m, None))]
+        if missing:
+            raise TypeError(f"{cls.__name__} ne définit pas: {', '.join(missing)}.")
+    elif hasattr(cls, "send_notification") and callable(getattr(cls, "send_notification")):
+        targets = ["send_notification"]
     elif hasattr(cls, "send") and callable(getattr(cls, "send")):
-        target_name = "send"
-
-    if target_name is None:
+        targets = ["send"]
+    else:
         raise TypeError(
             f"{cls.__name__} doit définir send_notification() ou send() pour activer add_performance_tracking."
         )
 
-    original: Callable[..., Any] = getattr(cls, target_name)
-
-    # Espace métriques (par classe)
-    if not hasattr(cls, "_perf_stats"):
-        cls._perf_stats = {
-            "count": 0,
-            "total_ms": 0.0,
-            "min_ms": None,
-            "max_ms": None,
-            "last_ms": None,
-        }
-
-    def tracked(self, *args, **kwargs):
-        start = time.perf_counter()
-        try:
-            return original(self, *args, **kwargs)
-        finally:
-            elapsed_ms = (time.perf_counter() - start) * 1000.0
-
-            stats = cls._perf_stats
-            stats["count"] += 1
-            stats["total_ms"] += elapsed_ms
-            stats["last_ms"] = elapsed_ms
-
-            if stats["min_ms"] is None or elapsed_ms < stats["min_ms"]:
-                stats["min_ms"] = elapsed_ms
-            if stats["max_ms"] is None or elapsed_ms > stats["max_ms"]:
-                stats["max_ms"] = elapsed_ms
-
-    # Remplacer la méthode par la version trackée
-    setattr(cls, target_name, tracked)
+    # Espace métriques (par classe) : (méthode, label) -> histogramme
+    histograms: Dict[Tuple[str, Optional[str]], LatencyHistogram] = {}
+    last_ns: Dict[str, int] = {}
+    lock = threading.Lock()
+    cls._perf_histograms = histograms
+
+    def histogram(name: str, key_label: Optional[str]) -> LatencyHistogram:
+        key = (name, key_label)
+        h = histograms.get(key)
+        if h is None:
+            with lock:
+                h = histograms.setdefault(key, LatencyHistogram())
+        return h
+
+    def wrap(name: str, original: Callable[..., Any]) -> Callable[..., Any]:
+        if label is None:
+            record = histogram(name, None).record_ns
+
+            def finish(self: Any, start: int) -> None:
+                elapsed = perf_counter_ns() - start
+                record(elapsed)
+                last_ns[name] = elapsed
+        else:
+            def finish(self: Any, start: int) -> None:
+                elapsed = perf_counter_ns() - start
+                histogram(name, label(self)).record_ns(elapsed)
+                last_ns[name] = elapsed
+
+        if inspect.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def tracked_async(self, *args, **kwargs):
+                start = perf_counter_ns()
+                try:
+                    return await original(self, *args, **kwargs)
+                finally:
+                    finish(self, start)
+
+            return tracked_async
+
+        if label is None:
+            # Chemin le plus fréquent : enregistrement en ligne (pas d'appel intermédiaire)
+            record = histogram(name, None).record_ns
+
+            @functools.wraps(original)
+            def tracked(self, *args, **kwargs):
+                start = perf_counter_ns()
+                try:
+                    return original(self, *args, **kwargs)
+                finally:
+                    elapsed = perf_counter_ns() - start
+                    record(elapsed)
+                    last_ns[name] = elapsed
+
+            return tracked
+
+        @functools.wraps(original)
+        def tracked_labelled(self, *args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return original(self, *args, **kwargs)
+            finally:
+                finish(self, start)
+
+        return tracked_labelled
+
+    # Remplacer les méthodes par les versions trackées
+    for name in targets:
+        setattr(cls, name, wrap(name, getattr(cls, name)))
 
     # Ajouter un getter de métriques (pratique pour la démo)
     def get_metrics(self) -> Dict[str, Any]:
-        stats = cls._perf_stats
-        avg = (stats["total_ms"] / stats["count"]) if stats["count"] else 0.0
-        return {
-            "method": target_name,
-            "count": stats["count"],
-            "avg_ms": avg,
-            "min_ms": stats["min_ms"],
-            "max_ms": stats["max_ms"],
-            "last_ms": stats["last_ms"],
-        }
+        """
+        Métriques de la méthode principale (toutes séries fusionnées) :
+        count, avg/min/max, p50/p90/p99/p999 (ms), last_ms.
+        "series" détaille chaque (méthode, label) si plusieurs séries existent.
+        """
+        primary = targets[0]
+        with lock:
+            items = list(histograms.items())
+        merged = LatencyHistogram.merged(h for (m, _), h in items if m == primary)
+        last = last_ns.get(primary)
+        metrics: Dict[str, Any] = {"method": primary}
+        metrics.update(merged.snapshot())
+        metrics["last_ms"] = None if last is None else last / 1_000_000
+        if len(items) > 1:
+            series: List[Dict[str, Any]] = []
+            for (m, key_label), h in sorted(items, key=lambda kv: (kv[0][0], kv[0][1] or "")):
+                entry: Dict[str, Any] = {"method": m, "label": key_label}
+                entry.update(h.snapshot())
+                series.append(entry)
+            metrics["series"] = series
+        return metrics
 
     setattr(cls, "get_metrics", get_metrics)
 
@@ -0,0 +1,61 @@
+"""
+mixins/async_channels.py
+
+Variantes asyncio des mixins de canaux (simulation).
+
+- ChannelConcurrencyMixin : un asyncio.Semaphore par canal, pour borner
+  le nombre d'envois simultanés sur chaque fournisseur (SMS, Email, Push)
+- AsyncSMSMixin / AsyncEmailMixin / AsyncPushMixin : send_* devient une coroutine
+
+Les règles de simulation restent celles de mixins/channels.py :
+les variantes async réutilisent la logique synchrone via super().
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Dict
+
+from core.models import DeliveryResult, Notification, User
+from mixins.channels import SMSMixin, EmailMixin, PushMixin
+
+
+class ChannelConcurrencyMixin:
+    """
+    Sémaphores par canal.
+
+    channel_concurrency : nombre maximal d'envois en vol par canal.
+    Un canal absent du dict utilise default_channel_concurrency.
+    Les sémaphores sont créés paresseusement (dans la boucle qui les utilise).
+    """
+    channel_concurrency: Dict[str, int] = {"sms": 100, "email": 200, "push": 500}
+    default_channel_concurrency = 100
+
+    def channel_semaphore(self, channel: str) -> asyncio.Semaphore:
+        semaphores = self.__dict__.setdefault("_channel_semaphores", {})
+        sem = semaphores.get(channel)
+        if sem is None:
+            limit = self.channel_concurrency.get(channel, self.default_channel_concurrency)
+            sem = semaphores[channel] = asyncio.Semaphore(limit)
+        return sem
+
+
+class AsyncSMSMixin(SMSMixin):
+    """Canal SMS simulé (asyncio)."""
+    async def send_sms(self, notification: Notification, user: User) -> DeliveryResult:
+        async with self.channel_semaphore("sms"):
+            return super().send_sms(notification, user)
+
+
+class AsyncEmailMixin(EmailMixin):
+    """Canal Email simulé (asyncio)."""
+    async def send_email(self, notification: Notification, user: User) -> DeliveryResult:
+        async with self.channel_semaphore("email"):
+            return super().send_email(notification, user)
+
+
+class AsyncPushMixin(PushMixin):
+    """Canal Push simulé (asyncio)."""
+    async def send_push(self, notification: Notification, user: User) -> DeliveryResult:
+        async with self.channel_semaphore("push"):
+            return super().send_push(notification, user)
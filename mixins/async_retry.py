@@ -0,0 +1,233 @@
+"""
+mixins/async_retry.py
+
+Fallback asyncio (simulation).
+- AsyncFallbackMixin : même règle que FallbackMixin (sms -> email -> push,
+  préférences utilisateur, arrêt au premier SENT) mais les canaux sont awaités.
+  Le mode fan-out (fanout_priorities / fanout_types) lance tous les canaux
+  en parallèle avec asyncio.gather.
+  Le mode hedged (channel_budgets_ms) démarre le canal suivant quand un canal
+  dépasse son budget ; ici les perdants sont réellement annulés.
+  Spans "channel.attempt" comme FallbackMixin (contexte hérité par les tâches).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from core import tracing
+from core.models import DeliveryResult, DeliveryStatus, Notification, Priority, User
+from mixins.retry import FallbackMixin, count_attempt, observe_channel_latency, trace_attempt
+
+
+class AsyncFallbackMixin(FallbackMixin):
+    """
+    Fallback coopératif asyncio :
+    - essaye les canaux dans un ordre
+    - retourne la liste des résultats (un résultat par tentative)
+    - s'arrête au premier SENT
+    """
+    _acquire_hook = "acquire_channel_async"
+
+    async def attempt_channel(
+        self,
+        channel: str,
+        notification: Notification,
+        user: User,
+        send: Optional[Callable[[Notification, User], Awaitable[DeliveryResult]]] = None,
+    ) -> DeliveryResult:
+        with tracing.span("channel.attempt", channel=channel) as trace:
+            r = await self._attempt_channel(channel, notification, user, send)
+            if trace is not None:
+                trace_attempt(trace, r)
+        return count_attempt(r)
+
+    async def _attempt_channel(
+        self,
+        channel: str,
+        notification: Notification,
+        user: User,
+        send: Optional[Callable[[Notification, User], Awaitable[DeliveryResult]]],
+    ) -> DeliveryResult:
+        breaker_allows, record, acquire = self.fallback_hooks()
+
+        # Disjoncteur (CircuitBreakerMixin) : canal en panne -> ignoré immédiatement
+        if breaker_allows is not None and not breaker_allows(channel):
+            return DeliveryResult(
+                notification_id=notification.notification_id,
+                user_id=user.user_id,
+                channel=channel,
+                status=DeliveryStatus.SKIPPED,
+                error="Circuit ouvert: canal ignoré",
+            )
+
+        # Tâche annulée (hedge perdant) pendant un await : issue neutre, sinon
+        # l'essai HALF_OPEN autorisé ci-dessus ne serait jamais libéré
+        try:
+            return await self._attempt_admitted(channel, notification, user, send, record, acquire)
+        except asyncio.CancelledError:
+            if record is not None:
+                record(channel, None)
+            raise
+
+    async def _attempt_admitted(
+        self,
+        channel: str,
+        notification: Notification,
+        user: User,
+        send: Optional[Callable[[Notification, User], Awaitable[DeliveryResult]]],
+        record: Optional[Callable[[str, Optional[bool]], None]],
+        acquire: Optional[Callable[[str, Priority], Awaitable[bool]]],
+    ) -> DeliveryResult:
+        # Limitation de débit (RateLimitMixin) : canal saturé -> canal suivant
+        if acquire is not None and not await acquire(channel, notification.priority):
+            self.log(
+                "Rate limit on channel %s, skipping", channel,
+                level=logging.WARNING, event="rate_limited", channel=channel,
+            )
+            if record is not None:
+                record(channel, None)
+            return DeliveryResult(
+                notification_id=notification.notification_id,
+                user_id=user.user_id,
+                channel=channel,
+                status=DeliveryStatus.SKIPPED,
+                error="Rate limit: canal saturé",
+            )
+
+        self.log("Trying channel=%s", channel, level=logging.DEBUG)
+
+        start = time.perf_counter()
+        try:
+            r = await (send or getattr(self, f"send_{channel}"))(notification, user)
+
+        except Exception as e:
+            observe_channel_latency(channel, time.perf_counter() - start)
+            self.log(
+                "Exception on channel %s: %s", channel, e,
+                level=logging.WARNING, event="channel_error", channel=channel,
+            )
+            if record is not None:
+                record(channel, False)
+            return DeliveryResult(
+                notification_id=notification.notification_id,
+                user_id=user.user_id,
+                channel=channel,
+                status=DeliveryStatus.FAILED,
+                error=str(e),
+            )
+
+        observe_channel_latency(channel, time.perf_counter() - start)
+
+        # Seul SENT compte comme succès ; un FAILED "contact manquant" est neutre
+        if record is not None:
+            record(channel, True if r.status == DeliveryStatus.SENT else None)
+        return r
+
+    async def send_with_fallback(self, notification: Notification, user: User) -> List[DeliveryResult]:
+        if self.use_fanout(notification):
+            return await self.send_fanout(notification, user)
+        if self.channel_budgets_ms:
+            return await self.send_hedged(notification, user)
+
+        results: List[DeliveryResult] = []
+
+        for channel, send in self.channel_plan(user):
+            r = await self.attempt_channel(channel, notification, user, send)
+            results.append(r)
+
+            if r.status == DeliveryStatus.SENT:
+                self.log("Delivered successfully via %s", channel, event="delivered", channel=channel)
+                return results
+
+        return results
+
+    async def send_fanout(self, notification: Notification, user: User) -> List[DeliveryResult]:
+        """Envoi simultané sur tous les canaux activés (une tâche par canal)."""
+        plan = self.channel_plan(user)
+        results = list(await asyncio.gather(*(self.attempt_channel(c, notification, user, send) for c, send in plan)))
+
+        sent = [r.channel for r in results if r.status == DeliveryStatus.SENT]
+        if sent:
+            self.log("Delivered successfully via %s (fan-out)", ", ".join(sent), event="delivered", channel=sent)
+        return results
+
+    async def send_hedged(self, notification: Notification, user: User) -> List[DeliveryResult]:
+        """
+        Fallback avec couverture (hedging) asyncio.
+        Un canal en échec démarre aussitôt le suivant (même si d'autres sont en vol).
+        Le premier SENT gagne ; les tâches perdantes sont annulées et rapportées SKIPPED
+        (ou attendues et marquées redondantes si hedge_wait_losers=True).
+        """
+        plan = self.channel_plan(user)
+        results: List[DeliveryResult] = []
+        if not plan:
+            return results
+
+        pending: Dict[asyncio.Task, str] = {}
+        next_index = 0
+        last_channel = ""
+        last_start = 0.0
+
+        def start_next() -> None:
+            nonlocal next_index, last_channel, last_start
+            last_channel, send = plan[next_index]
+            next_index += 1
+            last_start = time.monotonic()
+            task = asyncio.ensure_future(self.attempt_channel(last_channel, notification, user, send))
+            pending[task] = last_channel
+
+        start_next()
+        while pending:
+            timeout = None
+            budget_ms = self.channel_budgets_ms.get(last_channel)
+            if next_index < len(plan) and budget_ms is not None:
+                timeout = max(0.0, budget_ms / 1000.0 - (time.monotonic() - last_start))
+
+            done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                self.log(
+                    "Channel %s over budget (%s ms), hedging", last_channel, budget_ms,
+                    event="hedge", channel=last_channel,
+                )
+                start_next()
+                continue
+
+            winner: Optional[DeliveryResult] = None
+            for task in done:
+                pending.pop(task)
+                r = task.result()
+                results.append(r)
+                if winner is None and r.status == DeliveryStatus.SENT:
+                    winner = r
+
+            if winner is not None:
+                self.log("Delivered successfully via %s", winner.channel, event="delivered", channel=winner.channel)
+                note = f"Redondant (hedge gagné par {winner.channel})"
+                for task, channel in pending.items():
+                    if self.hedge_wait_losers:
+                        r = await task
+                        r.error = f"{note}: {r.error}" if r.error else note
+                        results.append(r)
+                    else:
+                        task.cancel()
+                        results.append(
+                            DeliveryResult(
+                                notification_id=notification.notification_id,
+                                user_id=user.user_id,
+                                channel=channel,
+                                status=DeliveryStatus.SKIPPED,
+                                error=f"Annulé ({note})",
+                            )
+                        )
+                return results
+
+            # Un canal suivant par échec, sans attendre les canaux encore en vol
+            for _ in done:
+                if next_index < len(plan):
+                    start_next()
+
+        return results
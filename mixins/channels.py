@@ -14,16 +14,32 @@ Chaque mixin renvoie un DeliveryResult.
 
 from __future__ import annotations
 
-from typing import List
+import logging
+import random
+from typing import Any, List
 
 from core.models import DeliveryResult, DeliveryStatus, Notification, User
+from core.structured_logging import emit, notifier_logger
 
 
 class LoggingMixin:
-    """Ajoute un log simple. Peut être combiné avec d'autres mixins."""
-    def log(self, message: str) -> None:
-        print(f"[LOG] {message}")
-        super().log(message)  # coopération MRO
+    """
+    Logs structurés (core/structured_logging.py) à la place du print de BaseNotifier.
+
+    - le niveau est vérifié avant le formatage (message au style "%s" paresseux)
+    - écriture par un thread de fond
+    - log_success_sample_rate : part des logs de livraison réussie (event="delivered")
+      conservés ; les échecs et avertissements ne sont jamais échantillonnés
+    """
+    log_success_sample_rate = 1.0
+
+    def log(self, message: str, *args: Any, level: int = logging.INFO, **fields: Any) -> None:
+        if not notifier_logger().isEnabledFor(level):
+            return
+        rate = self.log_success_sample_rate
+        if rate < 1.0 and fields.get("event") == "delivered" and random.random() >= rate:
+            return
+        emit(level, message, args, type(self).__name__, fields)
 
 
 class ChannelRegistryMixin:
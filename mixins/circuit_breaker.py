@@ -0,0 +1,246 @@
+"""
+mixins/circuit_breaker.py
+
+Disjoncteur (circuit breaker) par canal.
+
+États :
+- CLOSED : fonctionnement normal, les issues sont comptées dans une fenêtre glissante
+- OPEN : taux d'erreur trop élevé -> le canal est ignoré immédiatement
+  (plus de latence d'échec payée par chaque utilisateur)
+- HALF_OPEN : après open_seconds, quelques appels d'essai ; un succès referme,
+  un échec rouvre
+
+Le registre des disjoncteurs est partagé par toutes les instances de notificateurs
+du processus (même principe que RateLimitMixin).
+
+Seules les vraies pannes fournisseur comptent comme échec (exception levée par le
+canal) ; un contact manquant (FAILED "Phone manquant") est neutre.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from core.metrics import REGISTRY, Counter, Gauge
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    - window : nombre d'appels de la fenêtre glissante
+    - failure_threshold : taux d'erreur (0..1) qui ouvre le circuit
+    - min_calls : nombre minimal d'appels dans la fenêtre avant de juger
+    - open_seconds : durée d'ouverture avant l'essai (HALF_OPEN)
+    - half_open_max_calls : appels d'essai autorisés simultanément en HALF_OPEN
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        failure_threshold: float = 0.5,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if window < 1 or min_calls < 1 or half_open_max_calls < 1:
+            raise ValueError("CircuitBreaker: window, min_calls et half_open_max_calls doivent être >= 1.")
+        if not 0 < failure_threshold <= 1:
+            raise ValueError("CircuitBreaker: failure_threshold doit être dans ]0, 1].")
+
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._outcomes: Deque[bool] = deque(maxlen=window)  # True = échec
+        self._failures = 0
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {}
+        self.last_transition: Optional[Tuple[float, str, str]] = None
+
+    @property
+    def state(self) -> BreakerState:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _transition(self, new_state: BreakerState) -> None:
+        old = self._state
+        if old == new_state:
+            return
+        self._state = new_state
+        key = f"{old.value}->{new_state.value}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.last_transition = (time.time(), old.value, new_state.value)
+
+        if new_state == BreakerState.OPEN:
+            self._opened_at = self._clock()
+        if new_state == BreakerState.CLOSED:
+            self._outcomes.clear()
+            self._failures = 0
+        self._half_open_in_flight = 0
+
+    def _maybe_half_open(self) -> None:
+        if self._state == BreakerState.OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(BreakerState.HALF_OPEN)
+
+    def allow(self) -> bool:
+        """True si un appel peut passer (compte un rejet sinon)."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == BreakerState.CLOSED:
+                return True
+            if self._state == BreakerState.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success: Optional[bool]) -> Optional[str]:
+        """
+        Enregistre l'issue d'un appel autorisé.
+        success=None : issue neutre (ex: contact manquant), libère seulement l'essai HALF_OPEN.
+        Retourne la transition provoquée ("closed->open"...) ou None.
+        """
+        with self._lock:
+            before = self._state
+            if success is None:
+                if self._state == BreakerState.HALF_OPEN and self._half_open_in_flight:
+                    self._half_open_in_flight -= 1
+                return None
+            if self._state == BreakerState.HALF_OPEN:
+                self._transition(BreakerState.CLOSED if success else BreakerState.OPEN)
+                return f"{before.value}->{self._state.value}"
+            if self._state == BreakerState.OPEN:
+                return None
+
+            if len(self._outcomes) == self._outcomes.maxlen and self._outcomes[0]:
+                self._failures -= 1
+            self._outcomes.append(not success)
+            if not success:
+                self._failures += 1
+
+            if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_threshold:
+                self._transition(BreakerState.OPEN)
+                return f"{before.value}->{self._state.value}"
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            calls = len(self._outcomes)
+            return {
+                "state": self._state.value,
+                "calls": calls,
+                "failure_rate": (self._failures / calls) if calls else 0.0,
+                "rejected": self.rejected,
+                "transitions": dict(self.transitions),
+                "last_transition": self.last_transition,
+            }
+
+
+# Registre partagé : (canal, scope) -> CircuitBreaker
+_BREAKERS: Dict[Tuple[str, Optional[str]], CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+_STATE_VALUES = {BreakerState.CLOSED: 0, BreakerState.HALF_OPEN: 1, BreakerState.OPEN: 2}
+
+
+def _collect_breaker_metrics() -> List[Any]:
+    """Métriques calculées à la collecte (aucun coût sur le chemin d'envoi)."""
+    state = Gauge("notify_circuit_state", "État du disjoncteur (0=closed, 1=half_open, 2=open).", ["channel"])
+    rejected = Counter("notify_circuit_rejected_total", "Appels rejetés par un circuit ouvert.", ["channel"])
+    transitions = Counter(
+        "notify_circuit_transitions_total", "Changements d'état du disjoncteur.", ["channel", "from", "to"]
+    )
+    with _BREAKERS_LOCK:
+        items = list(_BREAKERS.items())
+    for (channel, scope), breaker in items:
+        name = channel if scope is None else f"{channel}@{scope}"
+        state.labels(name).set(_STATE_VALUES[breaker.state])
+        rejected.labels(name).inc(breaker.rejected)
+        with breaker._lock:
+            counts = list(breaker.transitions.items())
+        for transition, n in counts:
+            before, _, after = transition.partition("->")
+            transitions.labels(name, before, after).inc(n)
+    return [state, rejected, transitions]
+
+
+REGISTRY.add_collector(_collect_breaker_metrics)
+
+
+class CircuitBreakerMixin:
+    """
+    Disjoncteurs coopératifs par canal.
+
+    circuit_breaker_settings : paramètres CircuitBreaker (communs à tous les canaux),
+      surchargeables par canal via circuit_breaker_overrides = {"sms": {...}}
+    circuit_breaker_scope : sépare les disjoncteurs (ex: par compte fournisseur)
+    """
+    circuit_breaker_settings: Dict[str, Any] = {}
+    circuit_breaker_overrides: Dict[str, Dict[str, Any]] = {}
+    circuit_breaker_scope: Optional[str] = None
+
+    def channel_breaker(self, channel: str) -> CircuitBreaker:
+        key = (channel, self.circuit_breaker_scope)
+        breaker = _BREAKERS.get(key)
+        if breaker is None:
+            with _BREAKERS_LOCK:
+                breaker = _BREAKERS.get(key)
+                if breaker is None:
+                    settings = dict(self.circuit_breaker_settings)
+                    settings.update(self.circuit_breaker_overrides.get(channel, {}))
+                    breaker = _BREAKERS[key] = CircuitBreaker(**settings)
+        return breaker
+
+    def breaker_allows(self, channel: str) -> bool:
+        allowed = self.channel_breaker(channel).allow()
+        if not allowed:
+            self.log(
+                "Circuit open on channel %s, skipping", channel,
+                level=logging.WARNING, event="circuit_open", channel=channel,
+            )
+        return allowed
+
+    def record_channel_outcome(self, channel: str, success: Optional[bool]) -> None:
+        transition = self.channel_breaker(channel).record(success)
+        if transition is not None:
+            self.log(
+                "Circuit breaker %s: %s", channel, transition,
+                level=logging.WARNING, event="circuit_transition", channel=channel,
+            )
+
+    @staticmethod
+    def circuit_stats() -> Dict[str, Dict[str, Any]]:
+        """État de tous les disjoncteurs : {"canal" ou "canal@scope": stats}."""
+        with _BREAKERS_LOCK:
+            items = list(_BREAKERS.items())
+        return {
+            (channel if scope is None else f"{channel}@{scope}"): breaker.stats()
+            for (channel, scope), breaker in items
+        }
+
+    @staticmethod
+    def reset_circuit_breakers() -> None:
+        """Vide le registre des disjoncteurs (utile en tests)."""
+        with _BREAKERS_LOCK:
+            _BREAKERS.clear()
@@ -0,0 +1,228 @@
+"""
+mixins/rate_limit.py
+
+Limitation de débit par canal (token bucket).
+
+- TokenBucket : seau à jetons thread-safe (rate jetons/s, capacité = rafale max)
+- RateLimitMixin : un seau par (canal, compte fournisseur), partagé par toutes
+  les instances de notificateurs du processus (registre module-level)
+
+Utilisation par FallbackMixin : avant chaque canal, acquire_channel(channel, priority).
+Si le seau est vide (et que l'attente maximale est dépassée), le canal est
+marqué SKIPPED et le fallback passe au canal suivant : un canal saturé
+ne bloque pas la boucle de dispatch.
+Les alertes URGENT / HIGH attendent un jeton un peu plus longtemps
+(rate_limit_priority_waits) plutôt que d'être abandonnées par une rafale.
+
+Les seaux sont propres au processus : sous ShardedDispatcher, chaque shard
+reçoit une part des limites (set_process_share(1 / shards)), le débit total
+reste celui configuré.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.metrics import REGISTRY, Counter, Gauge
+from core.models import Priority
+
+
+class TokenBucket:
+    """
+    Seau à jetons.
+    - rate : jetons ajoutés par seconde
+    - capacity : nombre maximal de jetons (taille de rafale)
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("TokenBucket: rate et capacity doivent être > 0.")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+        self.acquired = 0
+        self.throttled = 0
+        self.waited_s = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Prend des jetons sans attendre. Retourne False si le seau est insuffisant."""
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self.acquired += 1
+                return True
+            return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Secondes avant que `tokens` jetons soient disponibles (0 si déjà disponibles)."""
+        with self._lock:
+            self._refill(self._clock())
+            missing = tokens - self._tokens
+            return max(0.0, missing / self.rate)
+
+    def acquire(self, tokens: float = 1.0, max_wait: float = 0.0) -> bool:
+        """
+        Prend des jetons en attendant au plus max_wait secondes.
+        Retourne False (et compte un "throttled") si ce n'est pas possible.
+        """
+        if self.try_acquire(tokens):
+            return True
+
+        wait = self.wait_time(tokens)
+        if wait > max_wait:
+            self.note_throttled()
+            return False
+
+        time.sleep(wait)
+        self.note_wait(wait)
+        if self.try_acquire(tokens):
+            return True
+        self.note_throttled()
+        return False
+
+    def note_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waited_s += seconds
+
+    def note_throttled(self) -> None:
+        with self._lock:
+            self.throttled += 1
+
+    def fill_level(self) -> float:
+        """Remplissage courant (0.0 .. 1.0)."""
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens / self.capacity
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "fill_level": self.fill_level(),
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "waited_s": self.waited_s,
+        }
+
+
+# Registre partagé : (canal, compte) -> TokenBucket
+_BUCKETS: Dict[Tuple[str, Optional[str]], TokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+# Part des limites accordée à ce processus (ShardedDispatcher : 1 / nombre de shards)
+_PROCESS_SHARE = 1.0
+
+
+def set_process_share(share: float) -> None:
+    """
+    Accorde à ce processus la part `share` (0 < share <= 1) du débit et de la rafale
+    de chaque limite. Les seaux existants (copiés du parent au fork) sont recréés.
+    """
+    global _PROCESS_SHARE
+    if not 0 < share <= 1:
+        raise ValueError("share doit être dans ]0, 1].")
+    with _BUCKETS_LOCK:
+        _PROCESS_SHARE = share
+        _BUCKETS.clear()
+
+
+def _collect_rate_limit_metrics() -> List[Any]:
+    """Métriques calculées à la collecte (aucun coût sur le chemin d'envoi)."""
+    fill = Gauge("notify_rate_limit_fill_ratio", "Remplissage du seau à jetons (0..1).", ["channel"])
+    throttled = Counter("notify_rate_limit_throttled_total", "Tentatives abandonnées (seau vide).", ["channel"])
+    with _BUCKETS_LOCK:
+        items = list(_BUCKETS.items())
+    for (channel, account), bucket in items:
+        name = channel if account is None else f"{channel}@{account}"
+        fill.labels(name).set(bucket.fill_level())
+        throttled.labels(name).inc(bucket.throttled)
+    return [fill, throttled]
+
+
+REGISTRY.add_collector(_collect_rate_limit_metrics)
+
+
+class RateLimitMixin:
+    """
+    Limitation de débit coopérative.
+
+    rate_limits : {canal: (jetons/s, rafale)} ; un canal absent n'est pas limité
+    rate_limit_account : compte fournisseur (seaux distincts par compte)
+    rate_limit_max_wait : attente maximale (s) avant d'abandonner le canal
+    rate_limit_priority_waits : attente maximale par priorité (la plus grande des deux
+      s'applique) ; défaut : URGENT 2 s, HIGH 0.5 s, les autres basculent sans attendre
+    """
+    rate_limits: Dict[str, Tuple[float, float]] = {}
+    rate_limit_account: Optional[str] = None
+    rate_limit_max_wait = 0.0
+    rate_limit_priority_waits: Dict[Priority, float] = {Priority.URGENT: 2.0, Priority.HIGH: 0.5}
+
+    def channel_bucket(self, channel: str) -> Optional[TokenBucket]:
+        limit = self.rate_limits.get(channel)
+        if limit is None:
+            return None
+        key = (channel, self.rate_limit_account)
+        bucket = _BUCKETS.get(key)
+        if bucket is None:
+            with _BUCKETS_LOCK:
+                bucket = _BUCKETS.get(key)
+                if bucket is None:
+                    # Rafale d'au moins un jeton, sinon le canal serait bloqué
+                    bucket = _BUCKETS[key] = TokenBucket(
+                        rate=limit[0] * _PROCESS_SHARE, capacity=max(1.0, limit[1] * _PROCESS_SHARE)
+                    )
+        return bucket
+
+    def max_wait_for(self, priority: Optional[Priority]) -> float:
+        return max(self.rate_limit_max_wait, self.rate_limit_priority_waits.get(priority, 0.0))
+
+    def acquire_channel(self, channel: str, priority: Optional[Priority] = None) -> bool:
+        bucket = self.channel_bucket(channel)
+        if bucket is None:
+            return True
+        return bucket.acquire(max_wait=self.max_wait_for(priority))
+
+    async def acquire_channel_async(self, channel: str, priority: Optional[Priority] = None) -> bool:
+        """Variante asyncio : l'attente éventuelle libère la boucle d'événements."""
+        bucket = self.channel_bucket(channel)
+        if bucket is None or bucket.try_acquire():
+            return True
+
+        wait = bucket.wait_time()
+        if wait <= self.max_wait_for(priority):
+            await asyncio.sleep(wait)
+            bucket.note_wait(wait)
+            if bucket.try_acquire():
+                return True
+        bucket.note_throttled()
+        return False
+
+    @staticmethod
+    def rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+        """Statistiques de tous les seaux : {"canal" ou "canal@compte": stats}."""
+        with _BUCKETS_LOCK:
+            items = list(_BUCKETS.items())
+        return {
+            (channel if account is None else f"{channel}@{account}"): bucket.stats()
+            for (channel, account), bucket in items
+        }
+
+    @staticmethod
+    def reset_rate_limits() -> None:
+        """Vide le registre des seaux (utile en tests)."""
+        with _BUCKETS_LOCK:
+            _BUCKETS.clear()
@@ -4,38 +4,123 @@ mixins/retry.py
 Retry + fallback (simulation) pour la démo.
 - RetryMixin : re-tente un même canal N fois en cas d'exception.
 - FallbackMixin : essaye les canaux dans un ordre (sms -> email -> push)
-  en respectant les préférences de l'utilisateur.
+  en respectant les préférences de l'utilisateur,
+  ou tous en parallèle (fan-out) pour les priorités / types configurés,
+  ou en spéculatif quand un canal dépasse son budget de latence (hedging).
+  Les plans de canaux (canal + méthode d'envoi liée) sont compilés une fois
+  par signature de préférences puis réutilisés.
+- Traces (core.tracing) : un span "channel.attempt" par tentative de canal,
+  un span "channel.retry" par essai de RetryMixin.
 """
 
 from __future__ import annotations
 
-from typing import Callable, List
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
-from core.models import DeliveryResult, DeliveryStatus, Notification, User
+from core import tracing
+from core.emergencies import EmergencyType
+from core.metrics import REGISTRY
+from core.models import DeliveryResult, DeliveryStatus, Notification, Priority, User
+
+
+KNOWN_CHANNELS: Tuple[str, ...] = ("sms", "email", "push")
+
+# Plan de canaux : ((canal, send_<canal> lié), ...) dans l'ordre de préférence
+ChannelPlan = Tuple[Tuple[str, Callable[[Notification, User], DeliveryResult]], ...]
+
+
+# Métriques par canal (core.metrics.REGISTRY)
+_CHANNEL_ATTEMPTS = REGISTRY.counter(
+    "notify_channel_attempts_total", "Tentatives par canal et statut.", ["channel", "status"]
+)
+_CHANNEL_LATENCY = REGISTRY.histogram("notify_channel_latency_seconds", "Latence des appels canal.", ["channel"])
+_ATTEMPT_SERIES: Dict[Tuple[str, DeliveryStatus], Any] = {}
+_LATENCY_SERIES: Dict[str, Any] = {}
+
+
+def count_attempt(result: DeliveryResult) -> DeliveryResult:
+    """Compte une tentative (canal, statut) et retourne le résultat inchangé."""
+    key = (result.channel, result.status)
+    series = _ATTEMPT_SERIES.get(key)
+    if series is None:
+        series = _ATTEMPT_SERIES[key] = _CHANNEL_ATTEMPTS.labels(result.channel, result.status.value)
+    series.inc()
+    return result
+
+
+def trace_attempt(trace: tracing.Span, result: DeliveryResult) -> None:
+    """Renseigne le span d'une tentative canal à partir de son résultat."""
+    trace.set(status=result.status.value, delivery_id=result.delivery_id)
+    if result.error:
+        trace.set(error=result.error)
+    if result.status == DeliveryStatus.FAILED:
+        trace.status = "error"
+
+
+def observe_channel_latency(channel: str, seconds: float) -> None:
+    series = _LATENCY_SERIES.get(channel)
+    if series is None:
+        series = _LATENCY_SERIES[channel] = _CHANNEL_LATENCY.labels(channel)
+    series.observe(seconds)
+
+
+# Pool de threads partagé pour les envois simultanés sur plusieurs canaux
+_CHANNEL_POOL: Optional[ThreadPoolExecutor] = None
+_CHANNEL_POOL_LOCK = threading.Lock()
+CHANNEL_POOL_SIZE = 32
+
+
+def channel_executor() -> ThreadPoolExecutor:
+    """Pool partagé (créé à la première utilisation) pour les envois multi-canaux."""
+    global _CHANNEL_POOL
+    if _CHANNEL_POOL is None:
+        with _CHANNEL_POOL_LOCK:
+            if _CHANNEL_POOL is None:
+                _CHANNEL_POOL = ThreadPoolExecutor(max_workers=CHANNEL_POOL_SIZE, thread_name_prefix="channel")
+    return _CHANNEL_POOL
 
 
 class RetryMixin:
     """
     Retry coopératif.
     Utilisé quand un canal lève une exception (échec temporaire).
+
+    Si channel est fourni et que le notificateur a des disjoncteurs
+    (CircuitBreakerMixin), un circuit ouvert court-circuite toutes les tentatives
+    et chaque issue alimente le disjoncteur du canal.
     """
     max_retries = 2
 
-    def run_with_retry(self, fn: Callable[[], DeliveryResult]) -> DeliveryResult:
+    def run_with_retry(self, fn: Callable[[], DeliveryResult], channel: Optional[str] = None) -> DeliveryResult:
         last_error = None
+        breaker_allows = getattr(self, "breaker_allows", None) if channel else None
+        record = getattr(self, "record_channel_outcome", None) if channel else None
 
         for attempt in range(1, self.max_retries + 1):
+            if breaker_allows is not None and not breaker_allows(channel):
+                last_error = "Circuit ouvert"
+                break
             try:
-                return fn()
+                with tracing.span("channel.retry", channel=channel, attempt=attempt):
+                    r = fn()
+                if record is not None:
+                    record(channel, True if r.status == DeliveryStatus.SENT else None)
+                return r
             except Exception as e:
                 last_error = str(e)
-                self.log(f"Retry attempt {attempt}/{self.max_retries} failed: {last_error}")
+                if record is not None:
+                    record(channel, False)
+                self.log("Retry attempt %d/%d failed: %s", attempt, self.max_retries, last_error, level=logging.WARNING)
 
         # Si tout échoue, on retourne un résultat FAILED générique
         return DeliveryResult(
             notification_id="unknown",
             user_id="unknown",
-            channel="unknown",
+            channel=channel or "unknown",
             status=DeliveryStatus.FAILED,
             error=f"Retry exhausted: {last_error}",
         )
@@ -47,48 +132,299 @@ class FallbackMixin:
     - essaye les canaux dans un ordre
     - retourne la liste des résultats (un résultat par tentative)
     - s'arrête au premier SENT
+
+    Mode fan-out (canaux redondants) :
+    - si la priorité est dans fanout_priorities ou le type dans fanout_types,
+      tous les canaux activés sont tentés en parallèle et tous les résultats
+      sont retournés (ordre des préférences)
+
+    Mode hedged (budgets de latence) :
+    - channel_budgets_ms = {"sms": 500, ...} : si un canal n'a pas répondu dans
+      son budget, le canal suivant démarre en spéculatif (le premier continue)
+    - un canal en échec démarre aussitôt le canal suivant, même si d'autres
+      canaux sont encore en vol
+    - le premier SENT gagne ; chaque perdant encore en vol est rapporté SKIPPED
+      "Redondant" (hedge_wait_losers=True pour attendre et retourner son vrai résultat)
     """
+    fanout_priorities: FrozenSet[Priority] = frozenset()
+    fanout_types: FrozenSet[EmergencyType] = frozenset()
+    channel_budgets_ms: Dict[str, float] = {}
+    hedge_wait_losers = False
+    channel_plan_cache_size = 256
+
+    def channel_plan(self, user: User) -> ChannelPlan:
+        """
+        Plan de canaux de l'utilisateur, mis en cache par signature de préférences
+        (tuple enabled_channels) : une préférence modifiée donne une autre clé.
+        """
+        preferred = getattr(user.preferences, "enabled_channels", None)
+        key = tuple(preferred) if preferred else KNOWN_CHANNELS
+        plans = self.__dict__.get("_channel_plans")
+        if plans is None:
+            plans = self._channel_plans = {}
+        plan = plans.get(key)
+        if plan is None:
+            if len(plans) >= self.channel_plan_cache_size:
+                plans.clear()
+            plan = plans[key] = self.compile_channel_plan(key)
+        return plan
+
+    def compile_channel_plan(self, channels: Tuple[str, ...]) -> ChannelPlan:
+        """Canaux connus uniquement (doublons retirés), méthodes d'envoi résolues une fois."""
+        plan = []
+        for channel in dict.fromkeys(channels):
+            if channel in KNOWN_CHANNELS:
+                plan.append((channel, getattr(self, f"send_{channel}")))
+        return tuple(plan)
+
+    def invalidate_channel_plans(self) -> None:
+        """À appeler si les méthodes send_* (ou les hooks) de l'instance sont remplacées."""
+        self.__dict__.pop("_channel_plans", None)
+        self.__dict__.pop("_fallback_hooks", None)
+
+    # Nom de la méthode de limitation de débit (variante asyncio : acquire_channel_async)
+    _acquire_hook = "acquire_channel"
+
+    def fallback_hooks(self) -> Tuple[Optional[Callable], Optional[Callable], Optional[Callable]]:
+        """
+        Hooks optionnels résolus une fois par instance :
+        (breaker_allows, record_channel_outcome, acquire_channel) ou None si absents.
+        """
+        hooks = self.__dict__.get("_fallback_hooks")
+        if hooks is None:
+            hooks = self._fallback_hooks = (
+                getattr(self, "breaker_allows", None),
+                getattr(self, "record_channel_outcome", None),
+                getattr(self, self._acquire_hook, None),
+            )
+        return hooks
+
+    def preferred_channels(self, user: User) -> List[str]:
+        # Ordre préféré de l'utilisateur (sinon ordre par défaut), canaux connus uniquement
+        return [channel for channel, _ in self.channel_plan(user)]
+
+    def use_fanout(self, notification: Notification) -> bool:
+        return notification.priority in self.fanout_priorities or notification.emergency_type in self.fanout_types
+
+    def attempt_channel(
+        self,
+        channel: str,
+        notification: Notification,
+        user: User,
+        send: Optional[Callable[[Notification, User], DeliveryResult]] = None,
+    ) -> DeliveryResult:
+        """
+        Une tentative sur un canal -> toujours un DeliveryResult
+        (SKIPPED si circuit ouvert ou rate limit, FAILED si exception).
+        send : méthode d'envoi déjà résolue (plan de canaux), sinon send_<canal>.
+        """
+        with tracing.span("channel.attempt", channel=channel) as trace:
+            r = self._attempt_channel(channel, notification, user, send)
+            if trace is not None:
+                trace_attempt(trace, r)
+        return count_attempt(r)
+
+    def _attempt_channel(
+        self,
+        channel: str,
+        notification: Notification,
+        user: User,
+        send: Optional[Callable[[Notification, User], DeliveryResult]],
+    ) -> DeliveryResult:
+        breaker_allows, record, acquire = self.fallback_hooks()
+
+        # Disjoncteur (CircuitBreakerMixin) : canal en panne -> ignoré immédiatement
+        if breaker_allows is not None and not breaker_allows(channel):
+            return DeliveryResult(
+                notification_id=notification.notification_id,
+                user_id=user.user_id,
+                channel=channel,
+                status=DeliveryStatus.SKIPPED,
+                error="Circuit ouvert: canal ignoré",
+            )
+
+        # Limitation de débit (RateLimitMixin) : canal saturé -> canal suivant
+        if acquire is not None and not acquire(channel, notification.priority):
+            self.log(
+                "Rate limit on channel %s, skipping", channel,
+                level=logging.WARNING, event="rate_limited", channel=channel,
+            )
+            if record is not None:
+                record(channel, None)
+            return DeliveryResult(
+                notification_id=notification.notification_id,
+                user_id=user.user_id,
+                channel=channel,
+                status=DeliveryStatus.SKIPPED,
+                error="Rate limit: canal saturé",
+            )
+
+        self.log("Trying channel=%s", channel, level=logging.DEBUG)
+
+        start = time.perf_counter()
+        try:
+            r = (send or getattr(self, f"send_{channel}"))(notification, user)
+
+        except Exception as e:
+            # Exception = cas où Retry aurait du sens
+            observe_channel_latency(channel, time.perf_counter() - start)
+            self.log(
+                "Exception on channel %s: %s", channel, e,
+                level=logging.WARNING, event="channel_error", channel=channel,
+            )
+            if record is not None:
+                record(channel, False)
+            return DeliveryResult(
+                notification_id=notification.notification_id,
+                user_id=user.user_id,
+                channel=channel,
+                status=DeliveryStatus.FAILED,
+                error=str(e),
+            )
+
+        observe_channel_latency(channel, time.perf_counter() - start)
+
+        # Seul SENT compte comme succès ; un FAILED "contact manquant" est neutre
+        if record is not None:
+            record(channel, True if r.status == DeliveryStatus.SENT else None)
+        return r
 
     def send_with_fallback(self, notification: Notification, user: User) -> List[DeliveryResult]:
+        if self.use_fanout(notification):
+            return self.send_fanout(notification, user)
+        if self.channel_budgets_ms:
+            return self.send_hedged(notification, user)
+
         results: List[DeliveryResult] = []
 
-        # Ordre préféré de l'utilisateur (sinon ordre par défaut)
-        preferred = getattr(user.preferences, "enabled_channels", None) or ["sms", "email", "push"]
+        for channel, send in self.channel_plan(user):
+            r = self.attempt_channel(channel, notification, user, send)
+            results.append(r)
 
-        for channel in preferred:
-            # Respecter uniquement les canaux connus
-            if channel not in ["sms", "email", "push"]:
-                continue
+            # Stop au premier succès
+            if r.status == DeliveryStatus.SENT:
+                self.log("Delivered successfully via %s", channel, event="delivered", channel=channel)
+                return results
 
-            self.log(f"Trying channel={channel}")
+        # Aucun canal n'a réussi
+        return results
 
-            try:
-                if channel == "sms":
-                    r = self.send_sms(notification, user)
-                elif channel == "email":
-                    r = self.send_email(notification, user)
-                else:
-                    r = self.send_push(notification, user)
+    def send_fanout(self, notification: Notification, user: User) -> List[DeliveryResult]:
+        """
+        Envoi simultané sur tous les canaux activés (pool de threads partagé).
+        Latence = le canal le plus lent, au lieu de la somme des canaux.
+        """
+        plan = self.channel_plan(user)
+        if len(plan) <= 1:
+            return [self.attempt_channel(c, notification, user, send) for c, send in plan]
+
+        pool = channel_executor()
+        attempt = tracing.bind(self.attempt_channel)
+        futures = [pool.submit(attempt, c, notification, user, send) for c, send in plan]
+        results = [f.result() for f in futures]
+
+        sent = [r.channel for r in results if r.status == DeliveryStatus.SENT]
+        if sent:
+            self.log("Delivered successfully via %s (fan-out)", ", ".join(sent), event="delivered", channel=sent)
+        return results
+
+    def send_hedged(self, notification: Notification, user: User) -> List[DeliveryResult]:
+        """
+        Fallback avec couverture (hedging) : un canal lent (au-delà de son budget)
+        ne bloque plus le canal suivant. Résultats dans l'ordre de fin, puis
+        les perdants (voir _handle_hedge_losers).
+        """
+        plan = self.channel_plan(user)
+        results: List[DeliveryResult] = []
+        if not plan:
+            return results
+
+        pool = channel_executor()
+        attempt = tracing.bind(self.attempt_channel)
+        pending: Dict[Future, str] = {}
+        next_index = 0
+        last_channel = ""
+        last_start = 0.0
+
+        def start_next() -> None:
+            nonlocal next_index, last_channel, last_start
+            last_channel, send = plan[next_index]
+            next_index += 1
+            last_start = time.monotonic()
+            pending[pool.submit(attempt, last_channel, notification, user, send)] = last_channel
 
+        start_next()
+        while pending:
+            timeout = None
+            budget_ms = self.channel_budgets_ms.get(last_channel)
+            if next_index < len(plan) and budget_ms is not None:
+                timeout = max(0.0, budget_ms / 1000.0 - (time.monotonic() - last_start))
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Budget dépassé : démarrage spéculatif du canal suivant
+                self.log(
+                    "Channel %s over budget (%s ms), hedging", last_channel, budget_ms,
+                    event="hedge", channel=last_channel,
+                )
+                start_next()
+                continue
+
+            winner: Optional[DeliveryResult] = None
+            for future in done:
+                pending.pop(future)
+                r = future.result()
                 results.append(r)
+                if winner is None and r.status == DeliveryStatus.SENT:
+                    winner = r
 
-                # Stop au premier succès
-                if r.status == DeliveryStatus.SENT:
-                    self.log(f"Delivered successfully via {channel}")
-                    return results
+            if winner is not None:
+                self.log("Delivered successfully via %s", winner.channel, event="delivered", channel=winner.channel)
+                self._handle_hedge_losers(pending, winner, results)
+                return results
 
-            except Exception as e:
-                # Exception = cas où Retry aurait du sens
-                self.log(f"Exception on channel {channel}: {e}")
+            # Un canal suivant par échec, sans attendre les canaux encore en vol
+            for _ in done:
+                if next_index < len(plan):
+                    start_next()
+
+        return results
+
+    def _handle_hedge_losers(
+        self,
+        pending: Dict[Future, str],
+        winner: DeliveryResult,
+        results: List[DeliveryResult],
+    ) -> None:
+        """
+        Canaux encore en vol après le SENT gagnant :
+        - hedge_wait_losers : résultat réel attendu, marqué redondant
+        - sinon : résultat SKIPPED "Redondant" ajouté tout de suite (le thread ne
+          s'annule pas, son issue réelle est seulement journalisée)
+        """
+        note = f"Redondant (hedge gagné par {winner.channel})"
+
+        def mark(r: DeliveryResult) -> DeliveryResult:
+            r.error = f"{note}: {r.error}" if r.error else note
+            return r
+
+        for future, channel in pending.items():
+            if self.hedge_wait_losers:
+                results.append(mark(future.result()))
+            else:
                 results.append(
                     DeliveryResult(
-                        notification_id=notification.notification_id,
-                        user_id=user.user_id,
+                        notification_id=winner.notification_id,
+                        user_id=winner.user_id,
                         channel=channel,
-                        status=DeliveryStatus.FAILED,
-                        error=str(e),
+                        status=DeliveryStatus.SKIPPED,
+                        error=f"{note}: encore en vol, non attendu",
+                    )
+                )
+                # Un thread ne s'annule pas : on trace le résultat quand il arrive
+                future.add_done_callback(
+                    lambda f, c=channel: self.log(
+                        "Hedge loser on channel %s: %s", c, mark(f.result()).status.value,
+                        level=logging.DEBUG,
                     )
                 )
-
-        # Aucun canal n'a réussi
-        return results
@@ -0,0 +1,108 @@
+"""
+priority/coalescing.py
+
+Suppression des doublons avant mise en file.
+
+Un même message peut être planifié plusieurs fois (double clic sur le tableau de
+bord, webhook rejoué par un système amont...). CoalescingIndex mémorise les
+envois récents par clé (utilisateur, type d'urgence, hash du contenu, zone)
+pendant `window` secondes : un doublon dans la fenêtre est rejeté en O(1),
+avant d'atteindre la file.
+
+Index borné LRU + TTL :
+- OrderedDict dans l'ordre d'insertion = ordre d'expiration (TTL unique),
+  purge des entrées expirées par la tête (coût amorti O(1))
+- au-delà de max_entries, les entrées les plus anciennes sont évincées
+  (un doublon très ancien peut alors repasser : on privilégie la mémoire bornée)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from core.models import Notification, User
+
+
+CoalesceKey = Tuple[str, Any, int, Optional[str]]
+
+
+def coalesce_key(notification: Notification, user: User) -> CoalesceKey:
+    """Clé de déduplication : (user_id, type d'urgence, hash du message, zone)."""
+    return (user.user_id, notification.emergency_type, hash(notification.message), notification.zone)
+
+
+class CoalescingIndex:
+    def __init__(
+        self,
+        window: float = 60.0,
+        max_entries: int = 1_000_000,
+        key: Callable[[Notification, User], Hashable] = coalesce_key,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if window <= 0:
+            raise ValueError("CoalescingIndex: window doit être > 0.")
+        if max_entries < 1:
+            raise ValueError("CoalescingIndex: max_entries doit être >= 1.")
+        self.window = window
+        self.max_entries = max_entries
+        self._key = key
+        self._clock = clock
+        self._lock = threading.Lock()
+        # clé -> instant d'expiration
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+
+        self.accepted = 0
+        self.duplicates = 0
+        self.evicted = 0
+
+    def _purge(self, now: float) -> None:
+        entries = self._entries
+        while entries:
+            key, expires = next(iter(entries.items()))
+            if expires > now:
+                break
+            del entries[key]
+
+    def admit(self, notification: Notification, user: User) -> bool:
+        """
+        True si le job doit être mis en file (et le mémorise),
+        False si c'est un doublon d'un envoi de la fenêtre courante.
+        """
+        key = self._key(notification, user)
+        with self._lock:
+            now = self._clock()
+            expires = self._entries.get(key)
+            if expires is not None and expires > now:
+                self.duplicates += 1
+                return False
+
+            self._purge(now)
+            # Une entrée expirée encore présente est remplacée (et repasse en queue)
+            self._entries.pop(key, None)
+            self._entries[key] = now + self.window
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+            self.accepted += 1
+            return True
+
+    def forget(self, notification: Notification, user: User) -> None:
+        """Retire une clé (ex: envoi annulé, le prochain ne doit pas être rejeté)."""
+        with self._lock:
+            self._entries.pop(self._key(notification, user), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window": self.window,
+                "entries": len(self._entries),
+                "accepted": self.accepted,
+                "duplicates": self.duplicates,
+                "evicted": self.evicted,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,34 +1,259 @@
 """
 priority/priority_handler.py
 
-File de priorité stable.
-- Utilise heapq
+File de priorité stable, à voies (lanes).
+- Une deque par valeur de Priority (4 voies) : add / get_next en O(1)
 - Ordre : URGENT (4) en premier, LOW (1) en dernier
+- FIFO à l'intérieur d'une même priorité
+- Échéances (deadline) : dans une même priorité, les éléments avec échéance
+  passent avant les autres, au plus tôt d'abord (EDF, petit tas par voie)
+
+Anti-famine (optionnel) :
+- fairness_every=N : au moins 1 sélection sur N vient d'une voie inférieure
+  (tourniquet entre les voies inférieures non vides)
+- aging_seconds=S : un élément qui attend depuis plus de S secondes est servi
+  avant la voie la plus haute (promotion par vieillissement)
+- track_wait=True : statistiques de temps d'attente par voie (wait_stats())
 """
 
 from __future__ import annotations
 
 import heapq
-from typing import Any, List, Tuple
+import itertools
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
 
 from core.models import Priority
 
 
-class PriorityQueue:
+class _Lane:
+    """
+    Voie d'une priorité :
+    - items / times : FIFO (times rempli seulement si la file est horodatée)
+    - edf : tas (deadline, seq, t_entrée, item) pour les éléments avec échéance
+    """
+    __slots__ = ("items", "times", "edf")
+
     def __init__(self) -> None:
-        self._heap: List[Tuple[int, int, Any]] = []
-        self._index = 0
+        self.items: Deque[Any] = deque()
+        self.times: Deque[float] = deque()
+        self.edf: List[Tuple[float, int, float, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.items) + len(self.edf)
+
+    def head_time(self) -> float:
+        """Heure d'entrée du prochain élément servi (file horodatée)."""
+        return self.edf[0][2] if self.edf else self.times[0]
+
+    def oldest_time(self) -> Optional[float]:
+        candidates = [t for _, _, t, _ in self.edf]
+        if self.times:
+            candidates.append(self.times[0])
+        return min(candidates) if candidates else None
+
+    def pop(self, timed: bool) -> Tuple[Any, float]:
+        if self.edf:
+            _, _, t, item = heapq.heappop(self.edf)
+            return item, t
+        item = self.items.popleft()
+        return item, (self.times.popleft() if timed else 0.0)
+
+
+class PriorityQueue:
+    # Voies parcourues de la plus urgente à la moins urgente
+    _ORDER = sorted(Priority, reverse=True)
+
+    def __init__(
+        self,
+        fairness_every: Optional[int] = None,
+        aging_seconds: Optional[float] = None,
+        track_wait: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if fairness_every is not None and fairness_every < 2:
+            raise ValueError("fairness_every doit être >= 2.")
+        if aging_seconds is not None and aging_seconds < 0:
+            raise ValueError("aging_seconds doit être >= 0.")
+
+        self._lanes: Dict[Priority, _Lane] = {p: _Lane() for p in Priority}
+        # Références directes dans l'ordre de service (évite un tri à chaque get_next)
+        self._ordered: List[_Lane] = [self._lanes[p] for p in self._ORDER]
+        self._fifo: List[Deque[Any]] = [lane.items for lane in self._ordered]
+        self._size = 0
+        self._edf_size = 0
+        self._seq = itertools.count()
+
+        self.fairness_every = fairness_every
+        self.aging_seconds = aging_seconds
+        self._clock = clock
+        self._streak = 0      # sélections consécutives dans la voie la plus haute
+        self._rr_cursor = 0   # tourniquet entre voies inférieures
+
+        # Horodatage d'entrée, seulement si nécessaire (aging ou stats)
+        self._timed = track_wait or aging_seconds is not None
+        self._wait: Dict[Priority, Dict[str, float]] = {
+            p: {"count": 0, "total_s": 0.0, "max_s": 0.0} for p in Priority
+        }
+        self._promotions = 0
+        self._fair_picks = 0
 
-    def add(self, item: Any, priority: Priority) -> None:
+    def _lane(self, priority: Priority) -> _Lane:
+        try:
+            return self._lanes[priority]
+        except KeyError:
+            raise ValueError(f"Priority invalide: {priority}") from None
+
+    def add(self, item: Any, priority: Priority, deadline: Optional[float] = None) -> None:
         """
-        heapq sort du plus petit au plus grand.
-        Comme Priority.URGENT=4 doit passer en premier,
-        on stocke la priorité négative.
+        Ajoute un élément dans la voie de sa priorité.
+        - sans deadline : fin de la FIFO (O(1))
+        - avec deadline : tas EDF de la voie (O(log k), k = éléments à échéance)
         """
-        heapq.heappush(self._heap, (-int(priority), self._index, item))
-        self._index += 1
+        lane = self._lane(priority)
+        if deadline is None:
+            lane.items.append(item)
+            if self._timed:
+                lane.times.append(self._clock())
+        else:
+            t = self._clock() if self._timed else 0.0
+            heapq.heappush(lane.edf, (deadline, next(self._seq), t, item))
+            self._edf_size += 1
+        self._size += 1
+
+    def add_many(self, items: Iterable[Any], priority: Priority, deadline: Optional[float] = None) -> None:
+        """Ajoute plusieurs éléments de même priorité (et même échéance) en une seule opération."""
+        if deadline is not None:
+            for item in items:
+                self.add(item, priority, deadline)
+            return
+        fifo = self._lane(priority).items
+        before = len(fifo)
+        fifo.extend(items)
+        added = len(fifo) - before
+        if self._timed and added:
+            now = self._clock()
+            self._lanes[priority].times.extend([now] * added)
+        self._size += added
+
+    def _simple(self) -> bool:
+        return not self._timed and self.fairness_every is None and not self._edf_size
+
+    def _pick_index(self) -> int:
+        """Indice (dans _ORDER) de la voie à servir. Suppose la file non vide."""
+        top = next(i for i, lane in enumerate(self._ordered) if lane)
+        lower = [i for i in range(top + 1, len(self._ordered)) if self._ordered[i]]
+        if not lower:
+            self._streak = 0
+            return top
+
+        # 1) Vieillissement : la tête la plus ancienne au-delà du seuil passe devant
+        if self.aging_seconds is not None:
+            now = self._clock()
+            oldest = min(lower, key=lambda i: self._ordered[i].head_time())
+            if now - self._ordered[oldest].head_time() >= self.aging_seconds:
+                self._promotions += 1
+                return oldest
+
+        # 2) Tourniquet pondéré : 1 sélection sur N pour une voie inférieure
+        if self.fairness_every is not None:
+            if self._streak >= self.fairness_every - 1:
+                self._streak = 0
+                self._fair_picks += 1
+                self._rr_cursor = (self._rr_cursor + 1) % len(lower)
+                return lower[self._rr_cursor]
+            self._streak += 1
+
+        return top
+
+    def _pop(self, index: int) -> Any:
+        lane = self._ordered[index]
+        if lane.edf:
+            self._edf_size -= 1
+        self._size -= 1
+        item, t = lane.pop(self._timed)
+        if self._timed:
+            waited = self._clock() - t
+            stats = self._wait[self._ORDER[index]]
+            stats["count"] += 1
+            stats["total_s"] += waited
+            if waited > stats["max_s"]:
+                stats["max_s"] = waited
+        return item
 
     def get_next(self) -> Any | None:
-        if not self._heap:
+        """Retire le prochain élément (le plus prioritaire, sauf règle anti-famine)."""
+        if self._simple():
+            for fifo in self._fifo:
+                if fifo:
+                    self._size -= 1
+                    return fifo.popleft()
             return None
-        return heapq.heappop(self._heap)[2]
+
+        if not self._size:
+            return None
+        return self._pop(self._pick_index())
+
+    def get_next_above(self, priority: Priority) -> Any | None:
+        """
+        Retire le prochain élément de priorité strictement supérieure à `priority`
+        (None s'il n'y en a pas) ; les règles anti-famine ne s'appliquent pas.
+        """
+        for index, p in enumerate(self._ORDER):
+            if p <= priority:
+                return None
+            if self._ordered[index]:
+                return self._pop(index)
+        return None
+
+    def task_done(self, item: Any) -> None:
+        """Acquittement (no-op en mémoire ; voir SQLitePriorityQueue)."""
+
+    def drain(self, n: int) -> List[Any]:
+        """Retire jusqu'à n éléments, dans l'ordre de service."""
+        if not self._simple():
+            out_fair: List[Any] = []
+            while self._size and len(out_fair) < n:
+                out_fair.append(self._pop(self._pick_index()))
+            return out_fair
+
+        out: List[Any] = []
+        for fifo in self._fifo:
+            while fifo and len(out) < n:
+                out.append(fifo.popleft())
+            if len(out) >= n:
+                break
+        self._size -= len(out)
+        return out
+
+    def depth(self, priority: Priority) -> int:
+        """Nombre d'éléments en attente dans une voie."""
+        return len(self._lane(priority))
+
+    def depths(self) -> Dict[Priority, int]:
+        """Profondeur de chaque voie (URGENT -> LOW)."""
+        return {p: len(self._lanes[p]) for p in self._ORDER}
+
+    def wait_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques de temps d'attente par voie (nécessite track_wait ou aging).
+        - lanes : {Priority: {count, avg_s, max_s, oldest_s}}
+        - promotions : sélections dues au vieillissement
+        - fair_picks : sélections dues au tourniquet
+        """
+        now = self._clock()
+        lanes: Dict[Priority, Dict[str, float]] = {}
+        for p in self._ORDER:
+            s = self._wait[p]
+            oldest = self._lanes[p].oldest_time() if self._timed else None
+            lanes[p] = {
+                "count": s["count"],
+                "avg_s": (s["total_s"] / s["count"]) if s["count"] else 0.0,
+                "max_s": s["max_s"],
+                "oldest_s": (now - oldest) if oldest is not None else 0.0,
+            }
+        return {"lanes": lanes, "promotions": self._promotions, "fair_picks": self._fair_picks}
+
+    def __len__(self) -> int:
+        return self._size
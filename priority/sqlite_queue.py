@@ -0,0 +1,278 @@
+"""
+priority/sqlite_queue.py
+
+File de priorité durable (SQLite, mode WAL).
+
+Même interface que PriorityQueue (add / get_next / get_next_above / __len__ / depths) :
+le Dispatcher peut l'utiliser directement :
+
+    Dispatcher(priority_queue=SQLitePriorityQueue("jobs.db", worker_id="w1"))
+
+Principes :
+- add() écrit le job avant de rendre la main (un commit) : un job planifié
+  survit à un crash ; add_many() écrit un lot en un seul commit
+- get_next() "réserve" (lease) les jobs pour lease_seconds : tant que le bail
+  court, aucun autre worker ne les prend
+- task_done(item) acquitte le job (suppression, par lots aussi)
+- au redémarrage, un worker reprend les jobs non acquittés dont le bail a expiré
+  (et immédiatement ceux qu'il détenait lui-même, s'il garde le même worker_id)
+
+Garantie : au-moins-une-fois. Aucun ajout n'est perdu ; après un crash, seuls
+les jobs envoyés mais dont l'acquittement n'était pas encore commité (au plus
+batch_size) peuvent être renvoyés.
+Une diffusion (AudienceJob) est découpée à l'ajout en tranches de audience_chunk
+utilisateurs, une ligne par tranche, acquittée quand tous ses envois sont
+terminés : après un crash, seules les tranches non acquittées sont renvoyées,
+pas toute l'audience.
+
+Les éléments sont sérialisés avec pickle (les notifiers doivent être picklables).
+Une audience fournie sous forme d'itérateur (générateur, curseur) est d'abord
+convertie en liste : elle est donc entièrement lue au moment de l'ajout.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from core.models import Priority
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dispatch_jobs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    priority    INTEGER NOT NULL,
+    payload     BLOB    NOT NULL,
+    enqueued_at REAL    NOT NULL,
+    lease_until REAL    NOT NULL DEFAULT 0,
+    owner       TEXT,
+    deadline    REAL
+);
+CREATE INDEX IF NOT EXISTS idx_dispatch_jobs_order ON dispatch_jobs (priority DESC, deadline IS NULL, deadline, id);
+"""
+
+
+class SQLitePriorityQueue:
+    def __init__(
+        self,
+        path: str,
+        worker_id: Optional[str] = None,
+        batch_size: int = 500,
+        prefetch: int = 32,
+        lease_seconds: float = 300.0,
+        audience_chunk: int = 1000,
+        dumps: Callable[[Any], bytes] = pickle.dumps,
+        loads: Callable[[bytes], Any] = pickle.loads,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if batch_size < 1 or prefetch < 1 or audience_chunk < 1:
+            raise ValueError("batch_size, prefetch et audience_chunk doivent être >= 1.")
+        if lease_seconds <= 0:
+            raise ValueError("lease_seconds doit être > 0.")
+
+        self.path = path
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.lease_seconds = lease_seconds
+        self.audience_chunk = audience_chunk
+        self._dumps = dumps
+        self._loads = loads
+        self._clock = clock
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        self._pending_acks: List[int] = []
+        # Jobs réservés, pas encore servis : (priority, id, item)
+        self._buffer: Deque[Tuple[int, int, Any]] = deque()
+        self._refetch = False
+        # Jobs servis, en attente d'acquittement : id(item) -> (row id, item)
+        self._claimed: Dict[int, Tuple[int, Any]] = {}
+
+        self.recover()
+
+    # ------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------
+
+    def add(self, item: Any, priority: Priority, deadline: Optional[float] = None) -> None:
+        """Ajout commité immédiatement ; à priorité égale, les échéances les plus proches sortent d'abord."""
+        with self._lock:
+            self._insert(self._rows(item, priority, deadline))
+
+    def add_many(self, items: Iterable[Any], priority: Priority, deadline: Optional[float] = None) -> None:
+        """Ajout d'un lot en une seule transaction."""
+        with self._lock:
+            self._insert([row for item in items for row in self._rows(item, priority, deadline)])
+
+    def _rows(self, item: Any, priority: Priority, deadline: Optional[float]) -> List[Tuple[int, bytes, float, Optional[float]]]:
+        now = self._clock()
+        return [(int(priority), self._dumps(part), now, deadline) for part in self._split(item)]
+
+    def _split(self, item: Any) -> List[Any]:
+        """Une diffusion (dataclass avec users) -> tranches de audience_chunk utilisateurs."""
+        users = getattr(item, "users", None)
+        if users is None or not dataclasses.is_dataclass(item):
+            return [item]
+        # Un générateur n'est pas picklable : l'audience est figée à l'ajout
+        users = list(users)
+        chunk = self.audience_chunk
+        return [dataclasses.replace(item, users=users[i:i + chunk]) for i in range(0, len(users), chunk)] or [
+            dataclasses.replace(item, users=users)
+        ]
+
+    def _insert(self, rows: List[Tuple[int, bytes, float, Optional[float]]]) -> None:
+        if not rows:
+            return
+        with self._transaction():
+            self._conn.executemany(
+                "INSERT INTO dispatch_jobs (priority, payload, enqueued_at, deadline) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        if self._buffer and any(
+            priority > self._buffer[-1][0] or (deadline is not None and priority == self._buffer[-1][0])
+            for priority, _, _, deadline in rows
+        ):
+            # Un job qui doit passer avant ceux déjà réservés : on re-trie au prochain get_next
+            self._refetch = True
+
+    def _flush_acks(self) -> None:
+        if not self._pending_acks:
+            return
+        with self._transaction():
+            self._conn.executemany("DELETE FROM dispatch_jobs WHERE id = ?", [(i,) for i in self._pending_acks])
+        self._pending_acks.clear()
+
+    def flush(self) -> None:
+        """Commit immédiat des acquittements bufferisés."""
+        with self._lock:
+            self._flush_acks()
+
+    # ------------------------------------------------------------
+    # Lecture / bail
+    # ------------------------------------------------------------
+
+    def get_next(self) -> Any | None:
+        with self._lock:
+            if self._refetch:
+                self._release_buffer()
+            if not self._buffer:
+                self._claim_batch()
+            if not self._buffer:
+                return None
+
+            _, row_id, item = self._buffer.popleft()
+            self._claimed[id(item)] = (row_id, item)
+            return item
+
+    def get_next_above(self, priority: Priority) -> Any | None:
+        """Comme get_next, seulement si le prochain job est strictement plus prioritaire que `priority`."""
+        with self._lock:
+            if self._refetch:
+                self._release_buffer()
+            if not self._buffer:
+                self._claim_batch()
+            if not self._buffer or self._buffer[0][0] <= priority:
+                return None
+
+            _, row_id, item = self._buffer.popleft()
+            self._claimed[id(item)] = (row_id, item)
+            return item
+
+    def task_done(self, item: Any) -> None:
+        """Acquitte un job servi par get_next (les objets inconnus sont ignorés)."""
+        with self._lock:
+            claimed = self._claimed.pop(id(item), None)
+            if claimed is None:
+                return
+            self._pending_acks.append(claimed[0])
+            if len(self._pending_acks) >= self.batch_size:
+                self._flush_acks()
+
+    def _claim_batch(self) -> None:
+        now = self._clock()
+        with self._transaction():
+            rows = self._conn.execute(
+                "SELECT id, priority, payload FROM dispatch_jobs WHERE lease_until < ? "
+                "ORDER BY priority DESC, deadline IS NULL, deadline, id LIMIT ?",
+                (now, self.prefetch),
+            ).fetchall()
+            if rows:
+                self._conn.executemany(
+                    "UPDATE dispatch_jobs SET lease_until = ?, owner = ? WHERE id = ?",
+                    [(now + self.lease_seconds, self.worker_id, r[0]) for r in rows],
+                )
+        for row_id, priority, payload in rows:
+            self._buffer.append((priority, row_id, self._loads(payload)))
+
+    def _release_buffer(self) -> None:
+        if self._buffer:
+            with self._transaction():
+                self._conn.executemany(
+                    "UPDATE dispatch_jobs SET lease_until = 0, owner = NULL WHERE id = ?",
+                    [(row_id,) for _, row_id, _ in self._buffer],
+                )
+            self._buffer.clear()
+        self._refetch = False
+
+    def recover(self) -> int:
+        """
+        Libère les baux encore détenus par ce worker_id (reprise après crash).
+        Retourne le nombre de jobs remis en file.
+        """
+        with self._lock, self._transaction():
+            cur = self._conn.execute(
+                "UPDATE dispatch_jobs SET lease_until = 0, owner = NULL WHERE owner = ?",
+                (self.worker_id,),
+            )
+            return cur.rowcount
+
+    # ------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------
+
+    def depths(self) -> Dict[Priority, int]:
+        """Jobs non acquittés par voie (URGENT -> LOW)."""
+        self.flush()
+        counts = dict(self._conn.execute("SELECT priority, COUNT(*) FROM dispatch_jobs GROUP BY priority"))
+        return {p: counts.get(int(p), 0) for p in sorted(Priority, reverse=True)}
+
+    def depth(self, priority: Priority) -> int:
+        return self.depths()[Priority(priority)]
+
+    def __len__(self) -> int:
+        """Jobs non acquittés (en attente, réservés ou en cours)."""
+        return sum(self.depths().values())
+
+    def close(self) -> None:
+        with self._lock:
+            self._release_buffer()
+            self.flush()
+            self._conn.close()
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._conn)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE / COMMIT (ROLLBACK en cas d'exception)."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -0,0 +1,82 @@
+"""
+priority/timer_wheel.py
+
+Roue temporelle hachée (hashed timer wheel) pour les éléments différés
+(ex: nouvelles tentatives avec backoff).
+
+- schedule(item, delay) : O(1) (ajout dans une case de la roue)
+- advance() : fait tourner la roue jusqu'à l'heure courante et retourne
+  les éléments échus ; coût proportionnel aux cases parcourues + éléments échus
+- Un délai plus long qu'un tour de roue est géré par un compteur de tours restants
+
+Précision : un élément n'échoit jamais avant son délai, et au plus tard un tick
+après (l'échéance exacte est arrondie au tick supérieur).
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Callable, List
+
+
+class TimerWheel:
+    def __init__(self, tick_seconds: float = 0.05, slots: int = 512, clock: Callable[[], float] = time.monotonic) -> None:
+        if tick_seconds <= 0 or slots < 1:
+            raise ValueError("TimerWheel: tick_seconds doit être > 0 et slots >= 1.")
+        self.tick_seconds = tick_seconds
+        self._clock = clock
+        # Chaque case : liste de [tours_restants, élément]
+        self._slots: List[List[list]] = [[] for _ in range(slots)]
+        self._start = clock()
+        self._tick = 0  # dernier tick traité
+        self._size = 0
+
+    def _now_tick(self) -> int:
+        return int((self._clock() - self._start) / self.tick_seconds)
+
+    def schedule(self, item: Any, delay: float) -> None:
+        """Programme item pour dans delay secondes."""
+        # Premier tick dont le début suit l'échéance exacte (jamais en avance), au
+        # moins le tick suivant celui déjà traité (la roue peut être en retard)
+        due_at = self._clock() - self._start + max(0.0, delay)
+        target = max(self._tick + 1, math.ceil(due_at / self.tick_seconds))
+        n = len(self._slots)
+        rounds = (target - self._tick - 1) // n
+        self._slots[target % n].append([rounds, item])
+        self._size += 1
+
+    def advance(self) -> List[Any]:
+        """Traite les ticks écoulés et retourne les éléments échus."""
+        due: List[Any] = []
+        now_tick = self._now_tick()
+        if not self._size:
+            self._tick = max(self._tick, now_tick)
+            return due
+
+        n = len(self._slots)
+        # Au-delà d'un tour complet, chaque case est visitée autant de fois que nécessaire
+        while self._tick < now_tick and self._size:
+            self._tick += 1
+            slot = self._slots[self._tick % n]
+            if not slot:
+                continue
+            keep = []
+            for entry in slot:
+                if entry[0] <= 0:
+                    due.append(entry[1])
+                else:
+                    entry[0] -= 1
+                    keep.append(entry)
+            self._slots[self._tick % n] = keep
+            self._size -= len(slot) - len(keep)
+        self._tick = max(self._tick, now_tick) if not self._size else self._tick
+        return due
+
+    def time_to_next_tick(self) -> float:
+        """Secondes avant le prochain tick (attente minimale utile avant advance())."""
+        elapsed = self._clock() - self._start
+        return max(0.0, (math.floor(elapsed / self.tick_seconds) + 1) * self.tick_seconds - elapsed)
+
+    def __len__(self) -> int:
+        return self._size
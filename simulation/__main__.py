@@ -0,0 +1,111 @@
+"""
+simulation/__main__.py
+
+Simulation de charge campus (depuis la racine du projet) :
+
+    python -m simulation                                   # 20 000 utilisateurs, 5 alertes, threads
+    python -m simulation --users 100000 --mode async --workers 2000 --time-scale 0.01
+    python -m simulation --error-rate sms=0.5 --throttle sms=20 --latency push=400 -o report.json
+
+Les canaux sans option gardent leur profil par défaut (simulation/channels.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from core.structured_logging import configure_logging
+from simulation.channels import (
+    DEFAULT_PROFILES,
+    AsyncSimulatedEmergencyNotifier,
+    ChannelProfile,
+    SimulatedEmergencyNotifier,
+    lognormal,
+)
+from simulation.population import AlertProfile, PopulationProfile, build_zone_index, generate_alerts, generate_population
+from simulation.runner import MODES, run_simulation
+
+
+def _channel_value(text: str) -> Tuple[str, float]:
+    channel, sep, value = text.partition("=")
+    if not sep or channel not in DEFAULT_PROFILES:
+        raise argparse.ArgumentTypeError(f"attendu canal=valeur avec canal parmi {', '.join(DEFAULT_PROFILES)}")
+    try:
+        return channel, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"valeur numérique attendue: {text}") from None
+
+
+def _profiles(args: argparse.Namespace) -> Dict[str, ChannelProfile]:
+    profiles = dict(DEFAULT_PROFILES)
+    for channel, median in args.latency:
+        profiles[channel] = replace(profiles[channel], latency=lognormal(median, args.sigma))
+    for channel, rate in args.error_rate:
+        profiles[channel] = replace(profiles[channel], error_rate=rate)
+    for channel, rate in args.throttle:
+        profiles[channel] = replace(profiles[channel], throttle_rate=rate if rate > 0 else None)
+    return profiles
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m simulation", description="Simulation de charge sur fournisseurs simulés.")
+    parser.add_argument("--users", type=int, default=20_000, help="taille de la population (défaut 20 000)")
+    parser.add_argument("--alerts", type=int, default=5, help="nombre d'alertes (défaut 5)")
+    parser.add_argument("--mode", choices=MODES, default="threads")
+    parser.add_argument("--workers", type=int, default=64, help="threads ou envois asyncio en vol (défaut 64)")
+    parser.add_argument("--seed", type=int, default=1, help="graine (population, alertes, fournisseurs)")
+    parser.add_argument("--time-scale", type=float, default=0.01, help="facteur sur les latences (défaut 0.01)")
+    parser.add_argument("--phone-ratio", type=float, default=0.85)
+    parser.add_argument("--email-ratio", type=float, default=0.95)
+    parser.add_argument("--push-ratio", type=float, default=0.5)
+    parser.add_argument("--opt-out-ratio", type=float, default=0.1)
+    parser.add_argument("--ttl", type=float, help="validité des alertes en secondes")
+    parser.add_argument("--latency", type=_channel_value, action="append", default=[], metavar="CANAL=MS",
+                        help="latence médiane (lognormale) d'un canal")
+    parser.add_argument("--sigma", type=float, default=0.5, help="dispersion des latences --latency (défaut 0.5)")
+    parser.add_argument("--error-rate", type=_channel_value, action="append", default=[], metavar="CANAL=TAUX")
+    parser.add_argument("--throttle", type=_channel_value, action="append", default=[], metavar="CANAL=APPELS_S",
+                        help="limite du fournisseur (0 = aucune)")
+    parser.add_argument("-o", "--output", help="rapport JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        population = PopulationProfile(
+            phone_ratio=args.phone_ratio,
+            email_ratio=args.email_ratio,
+            push_ratio=args.push_ratio,
+            opt_out_ratio=args.opt_out_ratio,
+        )
+        alerts = AlertProfile(ttl_seconds=args.ttl)
+        profiles = _profiles(args)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    # Les erreurs fournisseur simulées (WARNING) sont comptées dans le rapport
+    configure_logging(level="ERROR")
+    notifier = AsyncSimulatedEmergencyNotifier() if args.mode == "async" else SimulatedEmergencyNotifier()
+    notifier.channel_profiles = profiles
+    notifier.simulation_seed = args.seed
+    notifier.time_scale = args.time_scale
+
+    index = build_zone_index(generate_population(args.users, population, seed=args.seed))
+    report = run_simulation(
+        index,
+        generate_alerts(args.alerts, alerts, seed=args.seed + 1),
+        notifier=notifier,
+        mode=args.mode,
+        max_workers=args.workers,
+    )
+    print(report.format())
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""
+simulation/channels.py
+
+Fournisseurs simulés (SMS, Email, Push) avec pannes injectées, à la place de la
+logique "toujours SENT" de mixins/channels.py.
+
+Par canal (ChannelProfile) :
+- latence tirée d'une distribution (constant, uniform, exponential, lognormal,
+  with_tail pour une queue lente occasionnelle), en millisecondes
+- taux d'erreur : l'appel lève ProviderError après sa latence (timeout, 5xx)
+- limitation du fournisseur : au-delà de throttle_rate appels/s (rafale
+  throttle_burst), l'appel est rejeté immédiatement (ProviderThrottled, "429")
+
+Les exceptions suivent le chemin des vraies pannes : FallbackMixin les transforme
+en FAILED, les disjoncteurs les comptent comme échecs.
+
+time_scale : facteur appliqué aux latences et aux débits (0.01 = simulation
+100 fois plus rapide que le temps réel, mêmes proportions).
+
+Reproductibilité : les tirages (générateur partagé, sous verrou) sont
+reproductibles à graine égale en séquentiel et en asyncio (une seule boucle).
+Avec des threads, l'ordre des tirages dépend de l'ordonnanceur : les compteurs
+restent exacts, mais quel envoi reçoit quelle latence ou quelle erreur varie
+d'une exécution à l'autre.
+
+    class Sim(SimulatedEmergencyNotifier):
+        channel_profiles = {"sms": ChannelProfile(lognormal(800, 0.6), error_rate=0.05, throttle_rate=30)}
+        time_scale = 0.01
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.metrics import LatencyHistogram
+from core.models import DeliveryResult, Notification, User
+from core.notifiers import AsyncEmergencyNotifier, EmergencyNotifier
+from mixins.async_channels import AsyncEmailMixin, AsyncPushMixin, AsyncSMSMixin
+from mixins.channels import EmailMixin, PushMixin, SMSMixin
+from mixins.rate_limit import TokenBucket
+
+
+# Distribution de latence : rng -> millisecondes
+LatencyModel = Callable[[random.Random], float]
+
+
+def constant(ms: float) -> LatencyModel:
+    return lambda rng: ms
+
+
+def uniform(low_ms: float, high_ms: float) -> LatencyModel:
+    return lambda rng: rng.uniform(low_ms, high_ms)
+
+
+def exponential(mean_ms: float) -> LatencyModel:
+    if mean_ms <= 0:
+        raise ValueError("mean_ms doit être > 0.")
+    return lambda rng: rng.expovariate(1.0 / mean_ms)
+
+
+def lognormal(median_ms: float, sigma: float = 0.5) -> LatencyModel:
+    """Latence typique d'une API distante : médiane median_ms, queue à droite selon sigma."""
+    if median_ms <= 0:
+        raise ValueError("median_ms doit être > 0.")
+    mu = math.log(median_ms)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def with_tail(base: LatencyModel, probability: float, extra_ms: float) -> LatencyModel:
+    """Ajoute extra_ms à une part `probability` des appels (GC, retransmission, file fournisseur)."""
+    return lambda rng: base(rng) + (extra_ms if rng.random() < probability else 0.0)
+
+
+class ProviderError(ConnectionError):
+    """Panne simulée du fournisseur (levée après la latence de l'appel)."""
+
+
+class ProviderThrottled(ProviderError):
+    """Appel rejeté par la limitation du fournisseur (sans latence)."""
+
+
+@dataclass
+class ChannelProfile:
+    latency: LatencyModel = field(default_factory=lambda: constant(0.0))
+    error_rate: float = 0.0
+    throttle_rate: Optional[float] = None  # appels/s acceptés par le fournisseur
+    throttle_burst: Optional[float] = None  # défaut : throttle_rate (une seconde de rafale)
+
+    def __post_init__(self) -> None:
+        if not 0.0 <= self.error_rate <= 1.0:
+            raise ValueError("error_rate doit être entre 0 et 1.")
+        if self.throttle_rate is not None and self.throttle_rate <= 0:
+            raise ValueError("throttle_rate doit être > 0.")
+
+
+DEFAULT_PROFILES: Dict[str, ChannelProfile] = {
+    "sms": ChannelProfile(latency=lognormal(800.0, 0.6), error_rate=0.02, throttle_rate=100.0),
+    "email": ChannelProfile(latency=lognormal(300.0, 0.4), error_rate=0.01),
+    "push": ChannelProfile(latency=with_tail(lognormal(120.0, 0.5), 0.02, 2000.0), error_rate=0.05),
+}
+
+_CONTACT = {"sms": "phone", "email": "email", "push": "push_token"}
+
+
+class _ChannelState:
+    __slots__ = ("bucket", "latency", "calls", "errors", "throttled")
+
+    def __init__(self, bucket: Optional[TokenBucket]) -> None:
+        self.bucket = bucket
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+
+
+class _Simulation:
+    """État d'un notifier : générateur, canaux, et le verrou qui protège tirages et compteurs."""
+    __slots__ = ("rng", "channels", "lock")
+
+    def __init__(self, seed: Optional[int]) -> None:
+        self.rng = random.Random(seed)
+        self.channels: Dict[str, _ChannelState] = {}
+        self.lock = threading.Lock()
+
+
+class SimulatedProviderMixin:
+    """
+    Tirage des issues d'appels fournisseur (partagé par les variantes sync et asyncio).
+
+    channel_profiles : {canal: ChannelProfile} ; un canal absent n'est pas perturbé
+    simulation_seed : graine du générateur (None = aléatoire ; non reproductible
+    avec des threads, voir l'en-tête du module)
+    time_scale : facteur sur les latences et les débits
+    """
+    channel_profiles: Dict[str, ChannelProfile] = DEFAULT_PROFILES
+    simulation_seed: Optional[int] = None
+    time_scale = 1.0
+
+    _simulation_lock = threading.Lock()
+
+    def _simulation_state(self) -> _Simulation:
+        state = self.__dict__.get("_simulation")
+        if state is None:
+            with self._simulation_lock:
+                state = self.__dict__.get("_simulation")
+                if state is None:
+                    state = self._simulation = _Simulation(self.simulation_seed)
+        return state
+
+    def _channel_state(self, channel: str) -> _ChannelState:
+        channels = self._simulation_state().channels
+        state = channels.get(channel)
+        if state is None:
+            with self._simulation_lock:
+                state = channels.get(channel)
+                if state is None:
+                    profile = self.channel_profiles[channel]
+                    bucket = None
+                    if profile.throttle_rate is not None:
+                        scale = self.time_scale if self.time_scale > 0 else 1.0
+                        burst = profile.throttle_burst if profile.throttle_burst is not None else profile.throttle_rate
+                        bucket = TokenBucket(profile.throttle_rate / scale, max(1.0, burst))
+                    state = channels[channel] = _ChannelState(bucket)
+        return state
+
+    def provider_call(self, channel: str, user: User) -> Tuple[float, Optional[ProviderError]]:
+        """
+        Issue d'un appel : (délai en secondes, erreur à lever après le délai ou None).
+        Lève ProviderThrottled immédiatement si le fournisseur limite.
+        Sans contact pour ce canal, pas d'appel (le mixin de base retourne FAILED).
+        """
+        profile = self.channel_profiles.get(channel)
+        if profile is None or not getattr(user, _CONTACT[channel], None):
+            return 0.0, None
+        state = self._channel_state(channel)
+        simulation = self._simulation_state()
+        # random.Random et les compteurs (+=) ne sont pas sûrs entre threads
+        with simulation.lock:
+            state.calls += 1
+            throttled = state.bucket is not None and not state.bucket.try_acquire()
+            if throttled:
+                state.throttled += 1
+            else:
+                delay_ms = max(0.0, profile.latency(simulation.rng))
+                failed = simulation.rng.random() < profile.error_rate
+                if failed:
+                    state.errors += 1
+        if throttled:
+            raise ProviderThrottled(f"{channel}: 429 limite du fournisseur")
+
+        state.latency.record_ms(delay_ms)
+        if failed:
+            return delay_ms / 1000.0 * self.time_scale, ProviderError(f"{channel}: erreur fournisseur simulée")
+        return delay_ms / 1000.0 * self.time_scale, None
+
+    def simulate_call(self, channel: str, user: User) -> None:
+        delay, error = self.provider_call(channel, user)
+        if delay > 0:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+
+    async def asimulate_call(self, channel: str, user: User) -> None:
+        delay, error = self.provider_call(channel, user)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+
+    def simulation_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Par canal : appels, erreurs, rejets (429) et latence simulée (ms, non mise à l'échelle)."""
+        simulation = self._simulation_state()
+        with simulation.lock:
+            counters = {
+                channel: {"calls": state.calls, "errors": state.errors, "throttled": state.throttled}
+                for channel, state in simulation.channels.items()
+            }
+        return {
+            channel: {**counters[channel], **simulation.channels[channel].latency.percentiles()}
+            for channel in counters
+        }
+
+
+class SimulatedSMSMixin(SMSMixin):
+    """Canal SMS simulé avec latence / pannes (SimulatedProviderMixin)."""
+    def send_sms(self, notification: Notification, user: User) -> DeliveryResult:
+        self.simulate_call("sms", user)
+        return super().send_sms(notification, user)
+
+
+class SimulatedEmailMixin(EmailMixin):
+    """Canal Email simulé avec latence / pannes (SimulatedProviderMixin)."""
+    def send_email(self, notification: Notification, user: User) -> DeliveryResult:
+        self.simulate_call("email", user)
+        return super().send_email(notification, user)
+
+
+class SimulatedPushMixin(PushMixin):
+    """Canal Push simulé avec latence / pannes (SimulatedProviderMixin)."""
+    def send_push(self, notification: Notification, user: User) -> DeliveryResult:
+        self.simulate_call("push", user)
+        return super().send_push(notification, user)
+
+
+class AsyncSimulatedSMSMixin(AsyncSMSMixin):
+    """
+    Variante asyncio : la latence simulée est comptée dans le sémaphore du canal.
+
+    super(AsyncSMSMixin, self) saute la coroutine d'AsyncSMSMixin (qui reprendrait
+    le sémaphore) et rejoint la version synchrone suivante dans le MRO.
+    """
+    async def send_sms(self, notification: Notification, user: User) -> DeliveryResult:
+        async with self.channel_semaphore("sms"):
+            await self.asimulate_call("sms", user)
+            return super(AsyncSMSMixin, self).send_sms(notification, user)
+
+
+class AsyncSimulatedEmailMixin(AsyncEmailMixin):
+    """Variante asyncio (voir AsyncSimulatedSMSMixin)."""
+    async def send_email(self, notification: Notification, user: User) -> DeliveryResult:
+        async with self.channel_semaphore("email"):
+            await self.asimulate_call("email", user)
+            return super(AsyncEmailMixin, self).send_email(notification, user)
+
+
+class AsyncSimulatedPushMixin(AsyncPushMixin):
+    """Variante asyncio (voir AsyncSimulatedSMSMixin)."""
+    async def send_push(self, notification: Notification, user: User) -> DeliveryResult:
+        async with self.channel_semaphore("push"):
+            await self.asimulate_call("push", user)
+            return super(AsyncPushMixin, self).send_push(notification, user)
+
+
+class SimulatedEmergencyNotifier(
+    SimulatedProviderMixin,
+    SimulatedSMSMixin,
+    SimulatedEmailMixin,
+    SimulatedPushMixin,
+    EmergencyNotifier,
+):
+    """EmergencyNotifier sur fournisseurs simulés (disjoncteurs séparés de la production)."""
+    __abstract__ = False
+    circuit_breaker_scope = "simulation"
+
+
+class AsyncSimulatedEmergencyNotifier(
+    SimulatedProviderMixin,
+    AsyncSimulatedSMSMixin,
+    AsyncSimulatedEmailMixin,
+    AsyncSimulatedPushMixin,
+    AsyncEmergencyNotifier,
+):
+    __abstract__ = False
+    circuit_breaker_scope = "simulation"
@@ -0,0 +1,173 @@
+"""
+simulation/population.py
+
+Générateurs déterministes (graine fixe) de charge synthétique "campus".
+
+- PopulationProfile : complétude des contacts (part d'utilisateurs avec téléphone,
+  email, jeton push), mélange d'ordres de canaux préférés, opt-out par type
+  d'urgence, répartition par zone
+- generate_population(n, profile, seed) : générateur de (User, zone) ;
+  build_zone_index() alimente directement un ZoneIndex
+- AlertProfile : mélange pondéré de EmergencyType / Priority, zones ciblées,
+  durée de validité (expires_at)
+- generate_alerts(n, profile, seed) : générateur de Notification
+
+    index = build_zone_index(generate_population(50_000, PopulationProfile(), seed=1))
+    for alert in generate_alerts(20, AlertProfile(), seed=2):
+        dispatcher.schedule_audience(alert, index.users_for(alert), notifier)
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple, TypeVar
+
+from core.audience import ZoneIndex
+from core.emergencies import EmergencyType
+from core.models import Notification, Priority, User, UserPreferences
+
+T = TypeVar("T")
+
+
+def _weighted(weights: Dict[T, float]) -> Tuple[Sequence[T], Sequence[float]]:
+    if not weights or any(w < 0 for w in weights.values()) or sum(weights.values()) <= 0:
+        raise ValueError("Les poids doivent être positifs (au moins un non nul).")
+    return list(weights), list(weights.values())
+
+
+def _check_ratio(name: str, value: float) -> None:
+    if not 0.0 <= value <= 1.0:
+        raise ValueError(f"{name} doit être entre 0 et 1.")
+
+
+@dataclass
+class PopulationProfile:
+    """
+    Profil de population.
+
+    - phone_ratio / email_ratio / push_ratio : part des utilisateurs ayant ce contact
+    - channel_orders : {ordre de canaux préféré: poids}
+    - opt_out_ratio : part des utilisateurs avec au moins un opt-out ;
+      opt_out_types : {type: poids} des types désactivés (un à deux par utilisateur)
+    - zones : {zone: poids} (ex: {"campus/A": 3, "campus/B/1": 1})
+    """
+    phone_ratio: float = 0.85
+    email_ratio: float = 0.95
+    push_ratio: float = 0.5
+    channel_orders: Dict[Tuple[str, ...], float] = field(
+        default_factory=lambda: {
+            ("sms", "email", "push"): 6.0,
+            ("push", "sms", "email"): 2.0,
+            ("email", "sms"): 1.0,
+            ("sms",): 1.0,
+        }
+    )
+    opt_out_ratio: float = 0.1
+    opt_out_types: Dict[EmergencyType, float] = field(
+        default_factory=lambda: {EmergencyType.ACADEMIC: 3.0, EmergencyType.OTHER: 2.0, EmergencyType.WEATHER: 1.0}
+    )
+    zones: Dict[str, float] = field(
+        default_factory=lambda: {"campus/A": 3.0, "campus/B/1": 2.0, "campus/B/2": 2.0, "campus/C": 1.0}
+    )
+
+    def __post_init__(self) -> None:
+        for name in ("phone_ratio", "email_ratio", "push_ratio", "opt_out_ratio"):
+            _check_ratio(name, getattr(self, name))
+        _weighted(self.channel_orders)
+        _weighted(self.zones)
+        if self.opt_out_ratio > 0:
+            _weighted(self.opt_out_types)
+
+
+def generate_population(
+    n: int,
+    profile: Optional[PopulationProfile] = None,
+    seed: int = 0,
+) -> Iterator[Tuple[User, str]]:
+    """(User, zone) pour n utilisateurs ; même graine = même population."""
+    profile = profile if profile is not None else PopulationProfile()
+    rng = random.Random(seed)
+    orders, order_weights = _weighted(profile.channel_orders)
+    zones, zone_weights = _weighted(profile.zones)
+    if profile.opt_out_ratio > 0:
+        opt_types, opt_weights = _weighted(profile.opt_out_types)
+
+    for i in range(n):
+        opt_out = []
+        if rng.random() < profile.opt_out_ratio:
+            opt_out = list(dict.fromkeys(rng.choices(opt_types, opt_weights, k=rng.randint(1, 2))))
+        user = User(
+            user_id=f"sim-{i}",
+            phone=f"+336{i % 100_000_000:08d}" if rng.random() < profile.phone_ratio else None,
+            email=f"user{i}@campus.example" if rng.random() < profile.email_ratio else None,
+            push_token=f"push-{i:08x}" if rng.random() < profile.push_ratio else None,
+            preferences=UserPreferences(
+                enabled_channels=list(rng.choices(orders, order_weights)[0]),
+                opt_out_types=opt_out,
+            ),
+        )
+        yield user, rng.choices(zones, zone_weights)[0]
+
+
+def build_zone_index(population: Iterable[Tuple[User, str]], index: Optional[ZoneIndex] = None) -> ZoneIndex:
+    """Place chaque utilisateur dans sa zone (nouvel index si index est None)."""
+    index = index if index is not None else ZoneIndex()
+    for user, zone in population:
+        index.add(user, zone)
+    return index
+
+
+@dataclass
+class AlertProfile:
+    """
+    Profil du flux d'alertes.
+
+    - types / priorities : {valeur: poids}
+    - zones : {zone ciblée: poids} ("campus" = tout le monde)
+    - ttl_seconds : validité de l'alerte (None = pas d'échéance)
+    """
+    types: Dict[EmergencyType, float] = field(
+        default_factory=lambda: {
+            EmergencyType.SECURITY: 2.0,
+            EmergencyType.WEATHER: 3.0,
+            EmergencyType.HEALTH: 1.0,
+            EmergencyType.INFRASTRUCTURE: 2.0,
+            EmergencyType.ACADEMIC: 4.0,
+            EmergencyType.OTHER: 1.0,
+        }
+    )
+    priorities: Dict[Priority, float] = field(
+        default_factory=lambda: {Priority.LOW: 4.0, Priority.MEDIUM: 3.0, Priority.HIGH: 2.0, Priority.URGENT: 1.0}
+    )
+    zones: Dict[str, float] = field(default_factory=lambda: {"campus": 1.0, "campus/B": 2.0, "campus/A": 1.0})
+    ttl_seconds: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        _weighted(self.types)
+        _weighted(self.priorities)
+        _weighted(self.zones)
+        if self.ttl_seconds is not None and self.ttl_seconds <= 0:
+            raise ValueError("ttl_seconds doit être > 0.")
+
+
+def generate_alerts(n: int, profile: Optional[AlertProfile] = None, seed: int = 0) -> Iterator[Notification]:
+    """n alertes tirées selon le profil (expires_at calculé à la génération)."""
+    profile = profile if profile is not None else AlertProfile()
+    rng = random.Random(seed)
+    types, type_weights = _weighted(profile.types)
+    priorities, priority_weights = _weighted(profile.priorities)
+    zones, zone_weights = _weighted(profile.zones)
+
+    for i in range(n):
+        emergency_type = rng.choices(types, type_weights)[0]
+        priority = rng.choices(priorities, priority_weights)[0]
+        zone = rng.choices(zones, zone_weights)[0]
+        yield Notification(
+            emergency_type=emergency_type,
+            priority=priority,
+            message=f"[SIM {i}] {emergency_type.name} {priority.name} ({zone})",
+            zone=zone,
+            expires_at=None if profile.ttl_seconds is None else time.time() + profile.ttl_seconds,
+        )
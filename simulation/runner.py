@@ -0,0 +1,162 @@
+"""
+simulation/runner.py
+
+Exécution d'un scénario de charge : alertes synthétiques diffusées (ZoneIndex ->
+schedule_audience) sur des fournisseurs simulés, puis rapport.
+
+SimulationReport :
+- volume : alertes, jobs (alerte x destinataire), tentatives de canal
+- débit : jobs/s et tentatives/s (temps mur de la phase d'envoi)
+- issues : {canal: {statut: nombre}}, part des jobs livrés (au moins un SENT)
+- délai de livraison (ms) : du début de l'envoi au premier SENT de chaque job
+  (file d'attente + latence fournisseur + fallback), percentiles
+- par canal : appels fournisseur, erreurs, rejets 429 et latence simulée
+
+Toutes les alertes sont planifiées avant l'envoi (rafale) : le délai de livraison
+mesure donc le temps nécessaire pour prévenir toute la population.
+
+    index = build_zone_index(generate_population(20_000, seed=1))
+    report = run_simulation(index, generate_alerts(5, seed=2), mode="threads", max_workers=64)
+    print(report.format())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from core.async_dispatcher import AsyncDispatcher
+from core.audience import ZoneIndex
+from core.dispatcher import Dispatcher
+from core.metrics import LatencyHistogram
+from core.models import DeliveryResult, DeliveryStatus, Notification
+from core.results import DeliveryResultBatch
+from simulation.channels import AsyncSimulatedEmergencyNotifier, SimulatedEmergencyNotifier
+
+MODES = ("sequential", "threads", "async")
+
+
+@dataclass
+class SimulationReport:
+    mode: str
+    alerts: int
+    jobs: int
+    attempts: int
+    wall_s: float
+    jobs_per_s: float
+    attempts_per_s: float
+    delivered_ratio: float
+    outcomes: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    time_to_deliver_ms: Dict[str, Optional[float]] = field(default_factory=dict)
+    providers: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def format(self) -> str:
+        """Rapport texte (terminal)."""
+        def ms(value: Optional[float]) -> str:
+            return "-" if value is None else f"{value:.1f}"
+
+        lines = [
+            f"mode {self.mode} : {self.alerts} alertes, {self.jobs} jobs, {self.attempts} tentatives en {self.wall_s:.3f} s",
+            f"débit : {self.jobs_per_s:,.0f} jobs/s, {self.attempts_per_s:,.0f} tentatives/s",
+            f"jobs livrés : {self.delivered_ratio:.1%}",
+            "délai de livraison : "
+            + ", ".join(f"{q} {ms(v)}" for q, v in self.time_to_deliver_ms.items()),
+            "",
+            f"{'canal':<8} {'statuts':<40} {'appels':>8} {'erreurs':>8} {'429':>6} {'p50 ms':>8} {'p99 ms':>8}",
+        ]
+        for channel in sorted(set(self.outcomes) | set(self.providers)):
+            statuses = ", ".join(f"{s}={n}" for s, n in sorted(self.outcomes.get(channel, {}).items()))
+            provider = self.providers.get(channel, {})
+            lines.append(
+                f"{channel:<8} {statuses:<40} {provider.get('calls', 0):>8} {provider.get('errors', 0):>8} "
+                f"{provider.get('throttled', 0):>6} {ms(provider.get('p50_ms')):>8} {ms(provider.get('p99_ms')):>8}"
+            )
+        return "\n".join(lines)
+
+
+class _Collector:
+    """Sink de dispatch : résultats en colonnes + délai jusqu'au premier SENT de chaque job."""
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.batch = DeliveryResultBatch()
+        self.jobs: Set[Tuple[str, str]] = set()
+        self.delivered: Set[Tuple[str, str]] = set()
+        self.time_to_deliver = LatencyHistogram()
+
+    def __call__(self, result: DeliveryResult) -> None:
+        self.batch.append(result)
+        key = (result.notification_id, result.user_id)
+        self.jobs.add(key)
+        if result.status == DeliveryStatus.SENT and key not in self.delivered:
+            self.delivered.add(key)
+            self.time_to_deliver.record_ms(max(0.0, (result.timestamp - self.start) * 1000.0))
+
+
+def run_simulation(
+    index: ZoneIndex,
+    alerts: Iterable[Notification],
+    notifier: Any = None,
+    mode: str = "threads",
+    max_workers: int = 32,
+    dispatcher: Optional[Dispatcher] = None,
+) -> SimulationReport:
+    """
+    Planifie chaque alerte vers son audience (index.users_for) puis envoie.
+
+    mode : "sequential", "threads" (max_workers threads) ou "async"
+    (max_workers envois en vol, AsyncDispatcher)
+    notifier : défaut SimulatedEmergencyNotifier (AsyncSimulatedEmergencyNotifier en mode async)
+    dispatcher : pour une file / RetryPolicy particulière (AsyncDispatcher en mode async)
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode doit être parmi {', '.join(MODES)}.")
+    if max_workers < 1:
+        raise ValueError("max_workers doit être >= 1.")
+    if notifier is None:
+        notifier = AsyncSimulatedEmergencyNotifier() if mode == "async" else SimulatedEmergencyNotifier()
+    if dispatcher is None:
+        dispatcher = AsyncDispatcher() if mode == "async" else Dispatcher()
+    elif mode == "async" and not isinstance(dispatcher, AsyncDispatcher):
+        raise ValueError("Le mode async nécessite un AsyncDispatcher.")
+    elif mode != "async" and isinstance(dispatcher, AsyncDispatcher):
+        raise ValueError(f"Le mode {mode} nécessite un Dispatcher synchrone.")
+
+    count = 0
+    for alert in alerts:
+        dispatcher.schedule_audience(alert, index.users_for(alert), notifier)
+        count += 1
+
+    start = time.time()
+    collector = _Collector(start)
+    if mode == "async":
+        for result in asyncio.run(dispatcher.dispatch(max_in_flight=max_workers)):
+            collector(result)
+    else:
+        dispatcher.dispatch_to(collector, max_workers=max_workers if mode == "threads" else None)
+    wall = time.time() - start
+
+    batch = collector.batch
+    jobs = len(collector.jobs)
+    providers = notifier.simulation_stats() if hasattr(notifier, "simulation_stats") else {}
+    return SimulationReport(
+        mode=mode,
+        alerts=count,
+        jobs=jobs,
+        attempts=len(batch),
+        wall_s=wall,
+        jobs_per_s=jobs / wall if wall > 0 else 0.0,
+        attempts_per_s=len(batch) / wall if wall > 0 else 0.0,
+        delivered_ratio=len(collector.delivered) / jobs if jobs else 0.0,
+        outcomes={
+            channel: {status.value: n for status, n in statuses.items()}
+            for channel, statuses in batch.counts().items()
+        },
+        time_to_deliver_ms=collector.time_to_deliver.percentiles(),
+        providers=providers,
+    )
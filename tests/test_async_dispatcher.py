@@ -0,0 +1,67 @@
+# tests/test_async_dispatcher.py
+"""
+Tests AsyncDispatcher + AsyncEmergencyNotifier (asyncio).
+- les variantes synchrones héritées de Dispatcher lèvent TypeError
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from core.models import User, UserPreferences, Notification, Priority, DeliveryStatus
+from core.emergencies import EmergencyType
+from core.async_dispatcher import AsyncDispatcher
+from core.notifiers import AsyncEmergencyNotifier
+
+
+def test_async_dispatch_diffusion_et_fallback():
+    d = AsyncDispatcher()
+    n = Notification(emergency_type=EmergencyType.HEALTH, priority=Priority.HIGH, message="Urgence médicale")
+    users = [User(user_id=f"u{i}", email=f"u{i}@campus.edu") for i in range(50)]
+    d.schedule_audience(n, users, AsyncEmergencyNotifier())
+
+    results = asyncio.run(d.dispatch(max_in_flight=10))
+
+    # SMS échoue (pas de téléphone) puis Email réussit, pour chaque user
+    assert len(results) == 100
+    sent = [r for r in results if r.status == DeliveryStatus.SENT]
+    assert {r.channel for r in sent} == {"email"}
+    assert len(sent) == 50
+
+
+def test_async_dispatch_respecte_la_priorite():
+    d = AsyncDispatcher()
+    notifier = AsyncEmergencyNotifier()
+    prefs = UserPreferences(enabled_channels=["push"])
+    user = User(user_id="u1", push_token="tok", preferences=prefs)
+    low = Notification(emergency_type=EmergencyType.ACADEMIC, priority=Priority.LOW, message="Info")
+    urgent = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    d.schedule(low, user, notifier)
+    d.schedule(urgent, user, notifier)
+
+    results = asyncio.run(d.dispatch(max_in_flight=1))
+    assert [r.notification_id for r in results] == [urgent.notification_id, low.notification_id]
+
+
+def test_variantes_synchrones_refusees():
+    d = AsyncDispatcher()
+    user = User(user_id="u1", email="u1@campus.edu")
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    d.schedule(n, user, AsyncEmergencyNotifier())
+
+    with pytest.raises(TypeError, match="arun_job"):
+        d.run_job(next(d.iter_jobs()))
+    for call in (d.dispatch_iter, d.dispatch_concurrent, lambda: d.dispatch_to(print)):
+        with pytest.raises(TypeError):
+            call()
+
+    # Job expiré : SKIPPED via arun_job, sans passer par run_job
+    expired = Notification(
+        emergency_type=EmergencyType.WEATHER, priority=Priority.LOW, message="Passé", expires_at=time.time() - 1
+    )
+    d.schedule(expired, user, AsyncEmergencyNotifier())
+    results = asyncio.run(d.dispatch())
+    assert [r.status for r in results] == [DeliveryStatus.SKIPPED]
@@ -0,0 +1,81 @@
+# tests/test_audience.py
+"""
+Tests de l'index d'audience par zone :
+- zones hiérarchiques et déplacements
+- opérations ensemblistes et opt-out (manuels conservés par add)
+- alimentation de schedule_audience
+"""
+
+from __future__ import annotations
+
+from core.audience import ZoneIndex, zone_ancestors
+from core.models import User, UserPreferences, Notification, Priority
+from core.emergencies import EmergencyType
+from core.dispatcher import Dispatcher
+from core.notifiers import EmergencyNotifier
+
+
+def _ids(users):
+    return sorted(u.user_id for u in users)
+
+
+def test_zones_hierarchiques_et_deplacement():
+    assert zone_ancestors(" campus/B/2/ ") == ["campus", "campus/B", "campus/B/2"]
+
+    index = ZoneIndex()
+    index.add(User(user_id="a"), "campus/B/1")
+    index.add(User(user_id="b"), "campus/B/2")
+    index.add(User(user_id="c"), "campus/C")
+
+    assert _ids(index.resolve(["campus/B"])) == ["a", "b"]
+    assert _ids(index.resolve(["campus"])) == ["a", "b", "c"]
+    assert _ids(index.resolve(["campus/B", "campus/C"], exclude=["campus/B/2"])) == ["a", "c"]
+
+    index.move("b", "campus/C")
+    assert _ids(index.resolve(["campus/B"])) == ["a"]
+    assert index.size("campus/C") == 2
+    assert "campus/B/2" not in index.zones()
+
+    index.remove("a")
+    assert index.resolve(["campus/B"]) == []
+    assert len(index) == 2
+
+
+def test_opt_out_et_schedule_audience():
+    index = ZoneIndex()
+    index.add(User(user_id="a", phone="0812345678"), "campus/B")
+    index.add(User(user_id="b", phone="0812345678"), "campus/B")
+    index.add(
+        User(user_id="c", phone="0812345678", preferences=UserPreferences(opt_out_types=[EmergencyType.ACADEMIC])),
+        "campus/B/3",
+    )
+    index.opt_out("b")
+
+    alert = Notification(emergency_type=EmergencyType.ACADEMIC, priority=Priority.LOW, message="Cours", zone="campus/B")
+    assert _ids(index.users_for(alert)) == ["a"]
+
+    index.opt_in("b")
+    d = Dispatcher()
+    d.schedule_audience(alert, index.users_for(alert), EmergencyNotifier())
+    assert sorted(r.user_id for r in d.dispatch()) == ["a", "b"]
+
+
+def test_opt_out_manuel_conserve_apres_mise_a_jour():
+    index = ZoneIndex()
+    index.add(User(user_id="a", phone="0812345678"), "campus/B")
+    index.opt_out("a", EmergencyType.WEATHER)
+
+    # Mise à jour du profil (ex: synchronisation) : l'opt-out manuel reste
+    prefs = UserPreferences(opt_out_types=[EmergencyType.ACADEMIC])
+    index.add(User(user_id="a", phone="0899999999", preferences=prefs), "campus/B")
+    weather = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage", zone="campus")
+    academic = Notification(emergency_type=EmergencyType.ACADEMIC, priority=Priority.LOW, message="Cours", zone="campus")
+    assert index.users_for(weather) == []
+    assert index.users_for(academic) == []
+
+    # Préférences modifiées : seul l'opt-out issu des préférences change
+    index.add(User(user_id="a", phone="0899999999"), "campus/B")
+    assert _ids(index.users_for(academic)) == ["a"]
+    assert index.users_for(weather) == []
+    index.opt_in("a", EmergencyType.WEATHER)
+    assert _ids(index.users_for(weather)) == ["a"]
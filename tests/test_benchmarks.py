@@ -0,0 +1,68 @@
+# tests/test_benchmarks.py
+"""
+Tests de la suite de benchmarks :
+- mesure d'un cas et cas optionnels ignorés
+- comparaison à une baseline, seuil élargi par le bruit mesuré
+- code de sortie en cas de régression (--quick : rapport seul sauf --strict)
+"""
+
+from __future__ import annotations
+
+import json
+
+from benchmarks.__main__ import main
+from benchmarks.harness import CASES, Case, compare, run_case
+
+
+def test_mesure_et_cas_optionnel_ignore():
+    result = run_case(CASES["priority_queue.add_pop[n=1000]"], repeat=2, warmup=0)
+    assert result["status"] == "ok" and result["ops"] == 2000
+    assert 0 < result["min_s"] <= result["median_s"]
+
+    optional = Case("demo.optional", setup=lambda: (lambda: None), ops=1, requires=("module_absent_xyz",))
+    assert run_case(optional)["status"] == "skipped"
+
+
+def test_comparaison_baseline():
+    baseline = {"results": {"a": {"status": "ok", "min_s": 1.0}, "b": {"status": "ok", "min_s": 1.0}}}
+    current = {
+        "results": {
+            "a": {"status": "ok", "min_s": 1.1},
+            "b": {"status": "ok", "min_s": 1.5},
+            "nouveau": {"status": "ok", "min_s": 9.0},
+        }
+    }
+    rows = {row["name"]: row for row in compare(current, baseline, tolerance=0.25)}
+    assert set(rows) == {"a", "b"}
+    assert not rows["a"]["regression"] and rows["b"]["regression"]
+
+
+def test_seuil_elargi_par_le_bruit():
+    baseline = {"results": {"a": {"status": "ok", "min_s": 1.0, "median_s": 1.05}}}
+    noisy = {"results": {"a": {"status": "ok", "min_s": 1.4, "median_s": 2.1}}}
+    (row,) = compare(noisy, baseline, tolerance=0.25)
+    assert abs(row["noise"] - 0.5) < 1e-9 and not row["regression"]
+
+    stable = {"results": {"a": {"status": "ok", "min_s": 1.4, "median_s": 1.42}}}
+    (row,) = compare(stable, baseline, tolerance=0.25)
+    assert abs(row["threshold"] - 1.3) < 1e-9 and row["regression"]
+
+
+def test_cli_echoue_sur_regression(tmp_path):
+    name = "descriptors.valid[n=10000]"
+    baseline = tmp_path / "baseline.json"
+    assert main(["-k", name, "--repeat", "1", "--warmup", "0", "--baseline", str(baseline), "--save-baseline"]) == 0
+    assert name in json.loads(baseline.read_text())["results"]
+
+    data = json.loads(baseline.read_text())
+    for key in ("min_s", "median_s"):
+        data["results"][name][key] /= 100  # baseline irréaliste : régression garantie
+    baseline.write_text(json.dumps(data))
+    output = tmp_path / "out.json"
+    args = ["-k", name, "--repeat", "1", "--warmup", "0", "--confirm", "0", "--baseline", str(baseline)]
+    assert main(args + ["-o", str(output)]) == 1
+    assert json.loads(output.read_text())["comparison"][0]["regression"]
+
+    # --quick : régression affichée mais pas bloquante, sauf --strict
+    assert main(args + ["--quick"]) == 0
+    assert main(args + ["--quick", "--strict"]) == 1
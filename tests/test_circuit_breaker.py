@@ -0,0 +1,83 @@
+# tests/test_circuit_breaker.py
+"""
+Tests des disjoncteurs par canal.
+"""
+
+from __future__ import annotations
+
+from core.models import User, Notification, Priority, DeliveryStatus
+from core.emergencies import EmergencyType
+from core.notifiers import EmergencyNotifier
+from mixins.circuit_breaker import BreakerState, CircuitBreaker, CircuitBreakerMixin
+
+
+def test_etats_closed_open_half_open():
+    now = [0.0]
+    b = CircuitBreaker(window=4, failure_threshold=0.5, min_calls=4, open_seconds=10, clock=lambda: now[0])
+
+    for ok in (True, False, True, False):
+        assert b.allow()
+        b.record(ok)
+    assert b.state == BreakerState.OPEN
+    assert b.allow() is False
+
+    now[0] = 10.0
+    assert b.state == BreakerState.HALF_OPEN
+    assert b.allow() is True
+    assert b.allow() is False  # un seul essai à la fois
+    assert b.record(True) == "half_open->closed"
+    assert b.stats()["transitions"] == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+
+def test_contact_manquant_est_neutre():
+    b = CircuitBreaker(window=2, min_calls=1)
+    b.record(None)
+    b.record(None)
+    assert b.state == BreakerState.CLOSED
+    assert b.stats()["calls"] == 0
+
+
+class DownSMSNotifier(EmergencyNotifier):
+    circuit_breaker_settings = {"window": 3, "min_calls": 3, "open_seconds": 60}
+    circuit_breaker_scope = "test-down-sms"
+
+    def send_sms(self, notification, user):
+        raise ConnectionError("SMS gateway down")
+
+
+def test_fallback_ignore_le_canal_en_panne_partage_entre_instances():
+    CircuitBreakerMixin.reset_circuit_breakers()
+    user = User(user_id="u1", phone="0812345678", email="u1@campus.edu")
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+
+    for _ in range(3):
+        results = DownSMSNotifier().send(n, user)
+        assert [(r.channel, r.status) for r in results] == [("sms", DeliveryStatus.FAILED), ("email", DeliveryStatus.SENT)]
+
+    # Nouveau notificateur, même disjoncteur : SMS n'est plus appelé
+    results = DownSMSNotifier().send(n, user)
+    assert [(r.channel, r.status) for r in results] == [("sms", DeliveryStatus.SKIPPED), ("email", DeliveryStatus.SENT)]
+
+    stats = CircuitBreakerMixin.circuit_stats()["sms@test-down-sms"]
+    assert stats["state"] == "open"
+    assert stats["rejected"] == 1
+    CircuitBreakerMixin.reset_circuit_breakers()
+
+
+def test_run_with_retry_court_circuite():
+    CircuitBreakerMixin.reset_circuit_breakers()
+    notifier = DownSMSNotifier()
+    calls = []
+
+    def boom():
+        calls.append(1)
+        raise TimeoutError("timeout")
+
+    for _ in range(2):
+        notifier.run_with_retry(boom, channel="sms")
+    # 3 échecs ouvrent le circuit : la 4e tentative n'appelle pas fn
+    assert len(calls) == 3
+    r = notifier.run_with_retry(boom, channel="sms")
+    assert len(calls) == 3
+    assert r.error == "Retry exhausted: Circuit ouvert"
+    CircuitBreakerMixin.reset_circuit_breakers()
@@ -0,0 +1,55 @@
+# tests/test_coalescing.py
+"""
+Tests de la suppression des doublons (CoalescingIndex) :
+- fenêtre TTL et borne LRU
+- intégration Dispatcher (schedule et diffusion)
+"""
+
+from __future__ import annotations
+
+from core.models import User, Notification, Priority
+from core.emergencies import EmergencyType
+from core.dispatcher import Dispatcher
+from core.notifiers import EmergencyNotifier
+from priority.coalescing import CoalescingIndex
+
+
+def _notif(message: str = "Intrusion bâtiment B", zone: str = "B") -> Notification:
+    return Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message=message, zone=zone)
+
+
+def test_fenetre_ttl_et_borne_lru():
+    now = [0.0]
+    index = CoalescingIndex(window=10.0, max_entries=2, clock=lambda: now[0])
+    u1, u2, u3 = User(user_id="u1"), User(user_id="u2"), User(user_id="u3")
+
+    assert index.admit(_notif(), u1)
+    # Même contenu (autre notification_id), même zone : doublon
+    assert not index.admit(_notif(), u1)
+    # Zone ou contenu différents : pas un doublon
+    assert index.admit(_notif(zone="C"), u1)
+
+    now[0] = 10.0
+    assert index.admit(_notif(), u1)  # fenêtre écoulée
+
+    index.admit(_notif(), u2)
+    index.admit(_notif(), u3)
+    assert len(index) == 2
+    assert index.stats()["evicted"] >= 1
+
+
+def test_dispatcher_rejette_les_doublons_avant_la_file():
+    d = Dispatcher(coalescer=CoalescingIndex(window=60.0))
+    notifier = EmergencyNotifier()
+    user = User(user_id="u1", phone="0812345678")
+
+    assert d.schedule(_notif(), user, notifier) is True
+    assert d.schedule(_notif(), user, notifier) is False
+    assert len(d.priority_queue) == 1
+
+    # Diffusion : l'utilisateur déjà servi et le doublon de la liste sont filtrés
+    users = [user, User(user_id="u2", phone="0812345678"), User(user_id="u2", phone="0812345678")]
+    d.schedule_audience(_notif(), users, notifier)
+    results = d.dispatch()
+    assert sorted(r.user_id for r in results) == ["u1", "u2"]
+    assert d.coalescer.stats()["duplicates"] == 3
@@ -0,0 +1,203 @@
+# tests/test_dispatcher.py
+"""
+Tests du Dispatcher :
+- ordre par priorité
+- diffusion (audience) déroulée paresseusement, acquittée après ses envois
+- planification groupée (schedule_many)
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import replace
+
+from core.models import User, Notification, Priority, DeliveryStatus
+from core.emergencies import EmergencyType
+from core.dispatcher import DispatchJob, Dispatcher
+from core.notifiers import EmergencyNotifier
+from priority.coalescing import CoalescingIndex
+from priority.priority_handler import PriorityQueue
+
+
+def _user(i: int) -> User:
+    return User(user_id=f"u{i}", phone="0812345678")
+
+
+def test_dispatch_respecte_la_priorite():
+    d = Dispatcher()
+    low = Notification(emergency_type=EmergencyType.ACADEMIC, priority=Priority.LOW, message="Cours annulé")
+    urgent = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Intrusion")
+    notifier = EmergencyNotifier()
+
+    d.schedule(low, _user(1), notifier)
+    d.schedule(urgent, _user(1), notifier)
+
+    results = d.dispatch()
+    assert [r.notification_id for r in results] == [urgent.notification_id, low.notification_id]
+
+
+def test_schedule_audience_un_seul_element_en_file_et_deroulement_paresseux():
+    d = Dispatcher()
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    consumed = []
+
+    def users():
+        for i in range(5):
+            consumed.append(i)
+            yield _user(i)
+
+    d.schedule_audience(n, users(), EmergencyNotifier())
+    # Rien n'est consommé avant le dispatch
+    assert consumed == []
+
+    results = d.dispatch()
+    assert [r.user_id for r in results] == [f"u{i}" for i in range(5)]
+    assert all(r.status == DeliveryStatus.SENT for r in results)
+
+
+def test_dispatch_concurrent_agrege_tous_les_resultats():
+    d = Dispatcher()
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    d.schedule_audience(n, [_user(i) for i in range(20)], EmergencyNotifier())
+
+    results = d.dispatch_concurrent(max_workers=4)
+    assert sorted(r.user_id for r in results) == sorted(f"u{i}" for i in range(20))
+
+
+class _AckRecordingQueue(PriorityQueue):
+    def __init__(self, sent):
+        super().__init__()
+        self.sent = sent
+        self.acks = []
+
+    def task_done(self, item):
+        self.acks.append((item, len(self.sent)))
+
+
+class _SlowNotifier(EmergencyNotifier):
+    def __init__(self, sent):
+        super().__init__()
+        self.sent = sent
+
+    def send(self, notification, user):
+        time.sleep(0.01)
+        results = super().send(notification, user)
+        self.sent.append(user.user_id)
+        return results
+
+
+def test_diffusion_acquittee_apres_tous_ses_envois():
+    sent = []
+    q = _AckRecordingQueue(sent)
+    d = Dispatcher(priority_queue=q)
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    d.schedule_audience(n, [_user(i) for i in range(12)], _SlowNotifier(sent))
+
+    d.dispatch_concurrent(max_workers=4)
+    # Un seul acquittement (la diffusion), quand les 12 envois sont terminés
+    assert len(q.acks) == 1
+    audience, sent_at_ack = q.acks[0]
+    assert audience.users[0].user_id == "u0"
+    assert sent_at_ack == 12
+
+
+def test_schedule_many_un_seul_ajout():
+    d = Dispatcher(coalescer=CoalescingIndex(window=60.0))
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    assert d.schedule_many(n, [_user(i) for i in range(5)], EmergencyNotifier()) == 5
+    # Doublons rejetés par le coalescer
+    assert d.schedule_many(n, [_user(i) for i in range(3, 7)], EmergencyNotifier(), expires_at=time.time() + 60) == 2
+
+    assert len(d.priority_queue) == 7
+    # Les jobs à échéance passent d'abord (EDF)
+    results = d.dispatch()
+    assert [r.user_id for r in results] == ["u5", "u6", "u0", "u1", "u2", "u3", "u4"]
+
+
+def test_dispatch_concurrent_un_worker_garde_l_ordre_de_priorite():
+    d = Dispatcher()
+    notifier = EmergencyNotifier()
+    low = Notification(emergency_type=EmergencyType.ACADEMIC, priority=Priority.LOW, message="Info")
+    urgent = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    d.schedule(low, _user(1), notifier)
+    d.schedule(urgent, _user(2), notifier)
+
+    results = d.dispatch_concurrent(max_workers=1)
+    assert [r.notification_id for r in results] == [urgent.notification_id, low.notification_id]
+
+
+def test_dispatch_iter_produit_au_fil_de_l_eau():
+    d = Dispatcher()
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    consumed = []
+
+    def users():
+        for i in range(3):
+            consumed.append(i)
+            yield _user(i)
+
+    d.schedule_audience(n, users(), EmergencyNotifier())
+    it = d.dispatch_iter()
+    first = next(it)
+    assert first.user_id == "u0"
+    assert consumed == [0]
+    assert [r.user_id for r in it] == ["u1", "u2"]
+
+
+def test_dispatch_to_sink():
+    d = Dispatcher()
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    d.schedule_audience(n, [_user(i) for i in range(4)], EmergencyNotifier())
+    seen = []
+
+    assert d.dispatch_to(seen.append, max_workers=2) == 4
+    assert sorted(r.user_id for r in seen) == ["u0", "u1", "u2", "u3"]
+
+
+def test_job_expire_est_skipped_sans_envoi():
+    d = Dispatcher()
+    expired = Notification(
+        emergency_type=EmergencyType.WEATHER,
+        priority=Priority.HIGH,
+        message="Orage à 14h",
+        expires_at=time.time() - 1,
+    )
+    live = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage à 18h")
+    notifier = EmergencyNotifier()
+    d.schedule_audience(expired, [_user(1), _user(2)], notifier)
+    d.schedule(live, _user(3), notifier, expires_at=time.time() + 3600)
+
+    results = d.dispatch()
+
+    # EDF : l'échéance dépassée sort en premier, mais est SKIPPED sans appel au notifier
+    skipped, sent = results[:2], results[2:]
+    assert [r.user_id for r in skipped] == ["u1", "u2"]
+    assert all(r.status == DeliveryStatus.SKIPPED for r in skipped)
+    assert [(r.notification_id, r.status) for r in sent] == [(live.notification_id, DeliveryStatus.SENT)]
+
+
+def test_echeance_du_job_prioritaire_sur_celle_de_la_notification():
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage", expires_at=100.0)
+    assert DispatchJob(notification=n, user=_user(1), notifier=None).is_expired(now=150.0)
+    assert not DispatchJob(notification=n, user=_user(1), notifier=None, expires_at=200.0).is_expired(now=150.0)
+    assert not DispatchJob(notification=replace(n, expires_at=None), user=_user(1), notifier=None).is_expired()
+
+
+def test_urgent_passe_devant_la_suite_d_une_grosse_diffusion():
+    d = Dispatcher(preempt_every=10)
+    low = Notification(emergency_type=EmergencyType.ACADEMIC, priority=Priority.LOW, message="Info")
+    urgent = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Intrusion")
+    notifier = EmergencyNotifier()
+
+    def users():
+        for i in range(1000):
+            if i == 15:
+                # Alerte URGENT planifiée pendant le déroulement de la diffusion
+                d.schedule(urgent, _user(9999), notifier)
+            yield _user(i)
+
+    d.schedule_audience(low, users(), notifier)
+    order = [r.notification_id for r in d.dispatch_iter()]
+
+    assert len(order) == 1001
+    assert order.index(urgent.notification_id) == 20  # au contrôle suivant, pas après les 1000 users
@@ -0,0 +1,159 @@
+# tests/test_fallback.py
+"""
+Tests du fallback multi-canaux :
+- séquentiel (arrêt au premier SENT)
+- fan-out parallèle (canaux redondants)
+- hedging : échec -> canal suivant, perdants rapportés, essai HALF_OPEN libéré
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from core.models import User, Notification, Priority, DeliveryStatus
+from core.emergencies import EmergencyType
+from core.notifiers import AsyncEmergencyNotifier, CampusSecurityNotifier, EmergencyNotifier
+from mixins.circuit_breaker import BreakerState
+
+
+def _user() -> User:
+    return User(user_id="u1", email="u1@campus.edu", phone="0812345678", push_token="tok")
+
+
+def test_sequentiel_s_arrete_au_premier_succes():
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    results = EmergencyNotifier().send(n, _user())
+    assert [(r.channel, r.status) for r in results] == [("sms", DeliveryStatus.SENT)]
+
+
+def test_fanout_campus_security_tous_les_canaux():
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.HIGH, message="Intrusion")
+    results = CampusSecurityNotifier().send(n, _user())
+    assert [r.channel for r in results] == ["sms", "email", "push"]
+    assert all(r.status == DeliveryStatus.SENT for r in results)
+
+
+def test_fanout_non_active_pour_les_autres_cas():
+    n = Notification(emergency_type=EmergencyType.ACADEMIC, priority=Priority.LOW, message="Info")
+    results = CampusSecurityNotifier().send(n, _user())
+    assert [r.channel for r in results] == ["sms"]
+
+
+class AsyncFanoutNotifier(AsyncEmergencyNotifier):
+    fanout_priorities = frozenset({Priority.URGENT})
+
+
+def test_fanout_asyncio():
+    n = Notification(emergency_type=EmergencyType.HEALTH, priority=Priority.URGENT, message="Urgence")
+    user = User(user_id="u2", email="u2@campus.edu")
+    results = asyncio.run(AsyncFanoutNotifier().send(n, user))
+    assert [(r.channel, r.status) for r in results] == [
+        ("sms", DeliveryStatus.FAILED),
+        ("email", DeliveryStatus.SENT),
+        ("push", DeliveryStatus.FAILED),
+    ]
+
+
+class SlowSMSNotifier(EmergencyNotifier):
+    channel_budgets_ms = {"sms": 20}
+
+    def send_sms(self, notification, user):
+        time.sleep(0.3)
+        return super().send_sms(notification, user)
+
+
+def test_hedged_demarre_email_quand_sms_depasse_son_budget():
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    start = time.monotonic()
+    results = SlowSMSNotifier().send(n, _user())
+    elapsed = time.monotonic() - start
+
+    assert [(r.channel, r.status) for r in results] == [("email", DeliveryStatus.SENT), ("sms", DeliveryStatus.SKIPPED)]
+    assert results[1].error.startswith("Redondant (hedge gagné par email)")
+    assert elapsed < 0.25
+
+
+def test_hedged_echec_demarre_le_canal_suivant_sans_attendre():
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    user = User(user_id="u3", phone="0812345678", push_token="tok")  # pas d'email : échec immédiat
+    start = time.monotonic()
+    results = SlowSMSNotifier().send(n, user)
+    elapsed = time.monotonic() - start
+
+    assert [(r.channel, r.status) for r in results] == [
+        ("email", DeliveryStatus.FAILED),
+        ("push", DeliveryStatus.SENT),
+        ("sms", DeliveryStatus.SKIPPED),
+    ]
+    assert elapsed < 0.25
+
+    results = asyncio.run(AsyncSlowSMSNotifier().send(n, user))
+    assert [(r.channel, r.status) for r in results] == [
+        ("email", DeliveryStatus.FAILED),
+        ("push", DeliveryStatus.SENT),
+        ("sms", DeliveryStatus.SKIPPED),
+    ]
+
+
+class AsyncSlowSMSNotifier(AsyncEmergencyNotifier):
+    channel_budgets_ms = {"sms": 20}
+
+    async def send_sms(self, notification, user):
+        await asyncio.sleep(0.3)
+        return await super().send_sms(notification, user)
+
+
+def test_hedged_asyncio_annule_le_perdant():
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    results = asyncio.run(AsyncSlowSMSNotifier().send(n, _user()))
+
+    assert [(r.channel, r.status) for r in results] == [
+        ("email", DeliveryStatus.SENT),
+        ("sms", DeliveryStatus.SKIPPED),
+    ]
+
+
+class AsyncProbeNotifier(AsyncSlowSMSNotifier):
+    circuit_breaker_scope = "test-hedge-probe"
+    circuit_breaker_settings = {"window": 1, "min_calls": 1, "open_seconds": 0}
+
+
+def test_hedge_annule_libere_l_essai_half_open():
+    notifier = AsyncProbeNotifier()
+    breaker = notifier.channel_breaker("sms")
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == BreakerState.HALF_OPEN  # open_seconds=0
+
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    results = asyncio.run(notifier.send(n, _user()))
+    assert [(r.channel, r.status) for r in results] == [
+        ("email", DeliveryStatus.SENT),
+        ("sms", DeliveryStatus.SKIPPED),
+    ]
+    # L'essai SMS annulé est neutre : un nouvel essai reste possible
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert breaker.allow() is True
+    notifier.reset_circuit_breakers()
+
+
+def test_plan_de_canaux_mis_en_cache_par_preferences():
+    notifier = EmergencyNotifier()
+    user = _user()
+    user.preferences.enabled_channels = ["push", "sms", "fax", "push"]
+
+    plan = notifier.channel_plan(user)
+    assert [c for c, _ in plan] == ["push", "sms"]
+    assert notifier.channel_plan(_user()) is not plan
+    assert notifier.channel_plan(user) is plan
+
+    # Préférences modifiées -> nouvelle signature, nouveau plan
+    user.preferences.enabled_channels = ["email"]
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    assert [r.channel for r in notifier.send(n, user)] == ["email"]
+
+    # Méthode d'envoi remplacée sur l'instance : invalidation explicite
+    notifier.send_email = lambda notification, u: (_ for _ in ()).throw(ConnectionError("down"))
+    notifier.invalidate_channel_plans()
+    assert [r.status for r in notifier.send(n, user)] == [DeliveryStatus.FAILED]
@@ -0,0 +1,34 @@
+# tests/test_ids.py
+"""
+Tests du générateur d'identifiants (triable dans le temps, remplaçable).
+"""
+
+from __future__ import annotations
+
+import time
+
+from core.ids import id_lower_bound, id_timestamp, new_id, set_id_generator
+from core.models import DeliveryResult, DeliveryStatus, Notification, Priority
+from core.emergencies import EmergencyType
+
+
+def test_identifiants_monotones_et_horodates():
+    before = time.time()
+    ids = [new_id() for _ in range(10_000)]
+
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert all(len(i) == 32 for i in ids)
+    assert before - 0.001 <= id_timestamp(ids[0]) <= time.time()
+    assert id_lower_bound(before) <= ids[0]
+
+
+def test_generateur_remplacable_dans_les_modeles():
+    previous = set_id_generator(lambda: "fixed")
+    try:
+        n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+        r = DeliveryResult(notification_id=n.notification_id, user_id="u1", channel="sms", status=DeliveryStatus.SENT)
+        assert (n.notification_id, r.delivery_id) == ("fixed", "fixed")
+    finally:
+        set_id_generator(previous)
+    assert new_id() != "fixed"
@@ -0,0 +1,78 @@
+# tests/test_logging.py
+"""
+Tests des logs structurés des notificateurs :
+- niveau vérifié avant formatage
+- écriture en arrière-plan (JSON)
+- échantillonnage des livraisons réussies
+- logs des processus shards (fork) non perdus
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+
+from core.models import User, Notification, Priority
+from core.emergencies import EmergencyType
+from core.notifiers import EmergencyNotifier
+from core.sharding import ShardedDispatcher
+from core.structured_logging import configure_logging, notifier_logger, shutdown_logging
+
+
+class _Counting:
+    calls = 0
+
+    def __str__(self) -> str:
+        _Counting.calls += 1
+        return "x"
+
+
+def _records(stream: io.StringIO):
+    shutdown_logging()  # vide la file
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_niveau_verifie_avant_formatage_et_json(capsys):
+    stream = io.StringIO()
+    configure_logging(level="INFO", stream=stream)
+    notifier = EmergencyNotifier()
+
+    notifier.log("debug %s", _Counting(), level=logging.DEBUG)
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    notifier.send(n, User(user_id="u1", phone="0812345678"))
+
+    records = _records(stream)
+    assert _Counting.calls == 0
+    assert [r["msg"] for r in records] == ["Delivered successfully via sms"]
+    assert records[0]["event"] == "delivered" and records[0]["notifier"] == "EmergencyNotifier"
+    assert capsys.readouterr().out == ""  # plus de double print
+
+
+def test_echantillonnage_des_succes_seulement():
+    stream = io.StringIO()
+    configure_logging(level="INFO", stream=stream)
+
+    class Sampled(EmergencyNotifier):
+        log_success_sample_rate = 0.0
+
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    Sampled().send(n, User(user_id="u1", phone="0812345678"))
+    Sampled().log("Exception on channel %s: %s", "sms", "down", level=logging.WARNING, event="channel_error")
+
+    assert [r["event"] for r in _records(stream)] == ["channel_error"]
+
+
+def test_logs_des_shards_apres_fork(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    with open(path, "w", encoding="utf-8") as stream:
+        configure_logging(level="DEBUG", stream=stream)
+        notifier_logger()  # backend asynchrone actif dans le parent avant le fork
+        d = ShardedDispatcher(shards=2)
+        n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+        d.schedule_audience(n, [User(user_id=f"u{i}") for i in range(6)], EmergencyNotifier())
+        d.dispatch()
+        shutdown_logging()
+
+    sends = [r for r in map(json.loads, path.read_text().splitlines()) if r["msg"] == "EmergencyNotifier.send called"]
+    assert len(sends) == 6
@@ -0,0 +1,100 @@
+# tests/test_metrics.py
+"""
+Tests des histogrammes de latence et de add_performance_tracking :
+- percentiles (erreur relative bornée), fusion, fragments par thread
+- fragments des threads terminés repliés, reset() vu par le chemin rapide
+- séries par méthode / label
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.metrics import LatencyHistogram
+from decorators.class_decorators import add_performance_tracking
+
+
+def test_percentiles_fusion_et_threads():
+    h = LatencyHistogram()
+    for v in range(1, 10_001):
+        h.record_ns(v * 1000)  # 1 µs .. 10 ms, uniforme
+
+    p = h.percentiles()
+    assert abs(p["p50_ms"] - 5.0) / 5.0 < 0.07
+    assert abs(p["p99_ms"] - 9.9) / 9.9 < 0.07
+    assert h.snapshot()["max_ms"] == 10.0
+
+    other = LatencyHistogram()
+    workers = [threading.Thread(target=lambda: [other.record_ms(20.0) for _ in range(1000)]) for _ in range(4)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    assert other.count == 4000
+
+    merged = LatencyHistogram.merged([h, other])
+    assert merged.count == 14_000
+    assert merged.snapshot()["max_ms"] == 20.0
+    assert h.count == 10_000  # sources inchangées
+
+
+def test_decorateur_percentiles_methodes_et_labels():
+    @add_performance_tracking(methods=("send", "send_sms"), label=lambda self: self.region)
+    class Tracked:
+        def __init__(self, region: str) -> None:
+            self.region = region
+
+        def send(self, x: int) -> int:
+            return self.send_sms(x)
+
+        def send_sms(self, x: int) -> int:
+            return x
+
+    north, south = Tracked("nord"), Tracked("sud")
+    for i in range(10):
+        north.send(i)
+    south.send(1)
+
+    metrics = north.get_metrics()
+    assert metrics["method"] == "send" and metrics["count"] == 11
+    assert {"p50_ms", "p90_ms", "p99_ms", "p999_ms", "last_ms"} <= set(metrics)
+    series = {(s["method"], s["label"]): s["count"] for s in metrics["series"]}
+    assert series == {("send", "nord"): 10, ("send", "sud"): 1, ("send_sms", "nord"): 10, ("send_sms", "sud"): 1}
+
+
+def test_decorateur_methode_asynchrone():
+    @add_performance_tracking
+    class AsyncTracked:
+        async def send(self) -> str:
+            await asyncio.sleep(0.01)
+            return "ok"
+
+    n = AsyncTracked()
+    assert asyncio.run(n.send()) == "ok"
+    assert n.get_metrics()["min_ms"] >= 10.0
+
+
+def test_fragments_des_threads_termines_replies():
+    h = LatencyHistogram()
+    for _ in range(30):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: h.record_ns(1000), range(20)))
+    assert h.count == 600
+    assert h.fragments() == 1  # seul le fragment commun reste
+
+
+def test_reset_vu_par_le_chemin_rapide():
+    @add_performance_tracking
+    class Tracked:
+        def send(self) -> None:
+            pass
+
+    n = Tracked()
+    n.send()
+    hist = Tracked._perf_histograms[("send", None)]
+    hist.reset()
+    n.send()
+    n.send()
+    assert hist.count == 2
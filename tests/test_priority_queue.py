@@ -0,0 +1,85 @@
+# tests/test_priority_queue.py
+"""
+Tests de la file de priorité à voies.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from core.models import Priority
+from priority.priority_handler import PriorityQueue
+
+
+def test_ordre_urgent_vers_low_et_fifo_par_voie():
+    q = PriorityQueue()
+    q.add("low1", Priority.LOW)
+    q.add("urgent1", Priority.URGENT)
+    q.add("low2", Priority.LOW)
+    q.add("high1", Priority.HIGH)
+    q.add("urgent2", Priority.URGENT)
+
+    assert len(q) == 5
+    assert [q.get_next() for _ in range(5)] == ["urgent1", "urgent2", "high1", "low1", "low2"]
+    assert q.get_next() is None
+    assert len(q) == 0
+
+
+def test_add_many_drain_et_profondeurs():
+    q = PriorityQueue()
+    q.add_many(range(3), Priority.MEDIUM)
+    q.add_many(["a", "b"], Priority.URGENT)
+
+    assert q.depth(Priority.MEDIUM) == 3
+    assert q.depths() == {Priority.URGENT: 2, Priority.HIGH: 0, Priority.MEDIUM: 3, Priority.LOW: 0}
+
+    assert q.drain(3) == ["a", "b", 0]
+    assert len(q) == 2
+    assert q.drain(10) == [1, 2]
+    assert len(q) == 0
+
+
+def test_priorite_invalide():
+    q = PriorityQueue()
+    with pytest.raises(ValueError):
+        q.add("x", 7)
+
+
+def test_fairness_every_sert_une_voie_inferieure():
+    q = PriorityQueue(fairness_every=3)
+    q.add_many([f"u{i}" for i in range(6)], Priority.URGENT)
+    q.add_many(["low1", "low2"], Priority.LOW)
+
+    picks = q.drain(8)
+    assert picks == ["u0", "u1", "low1", "u2", "u3", "low2", "u4", "u5"]
+    assert q.wait_stats()["fair_picks"] == 2
+
+
+def test_aging_promeut_un_element_ancien():
+    now = [0.0]
+    q = PriorityQueue(aging_seconds=10, clock=lambda: now[0])
+    q.add("low", Priority.LOW)
+    now[0] = 5.0
+    q.add("urgent1", Priority.URGENT)
+    q.add("urgent2", Priority.URGENT)
+
+    assert q.get_next() == "urgent1"
+    now[0] = 11.0
+    assert q.get_next() == "low"
+    assert q.get_next() == "urgent2"
+
+    stats = q.wait_stats()
+    assert stats["promotions"] == 1
+    assert stats["lanes"][Priority.LOW]["max_s"] == 11.0
+    assert stats["lanes"][Priority.URGENT]["count"] == 2
+
+
+def test_echeances_edf_dans_une_priorite():
+    q = PriorityQueue()
+    q.add("sans_echeance", Priority.HIGH)
+    q.add("echeance_tardive", Priority.HIGH, deadline=200.0)
+    q.add("echeance_proche", Priority.HIGH, deadline=100.0)
+    q.add("urgent", Priority.URGENT)
+
+    assert q.drain(4) == ["urgent", "echeance_proche", "echeance_tardive", "sans_echeance"]
+    assert len(q) == 0
@@ -0,0 +1,118 @@
+# tests/test_prometheus.py
+"""
+Tests du registre de métriques (format texte Prometheus) :
+- compteurs (cellules des threads terminés repliées), jauges, histogrammes, collecteurs
+- instrumentation du dispatcher, des canaux et des disjoncteurs
+- clear() : remise à zéro en place des séries pré-résolues
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.metrics import REGISTRY, Counter, Gauge, MetricsRegistry
+from core.models import User, Notification, Priority
+from core.emergencies import EmergencyType
+from core.dispatcher import Dispatcher
+from core.notifiers import EmergencyNotifier
+from mixins.circuit_breaker import CircuitBreakerMixin
+
+
+def test_rendu_format_texte():
+    registry = MetricsRegistry()
+    sent = registry.counter("demo_sent_total", "Envois.", ["channel"])
+    workers = [threading.Thread(target=lambda: [sent.labels("sms").inc() for _ in range(1000)]) for _ in range(4)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    registry.gauge("demo_depth", "Profondeur.").set_function(lambda: 7)
+    latency = registry.histogram("demo_latency_seconds", "Latence.", ["channel"], buckets=(0.001, 0.01))
+    for seconds in (0.0005, 0.002, 0.003, 0.5):
+        latency.labels('e"mail').observe(seconds)
+
+    def collector():
+        workers_gauge = Gauge("demo_workers", "Calculé à la collecte.")
+        workers_gauge.set(2)
+        return [workers_gauge]
+
+    registry.add_collector(collector)
+    text = registry.render()
+
+    assert "# TYPE demo_sent_total counter" in text
+    assert 'demo_sent_total{channel="sms"} 4000' in text
+    assert "demo_depth 7" in text
+    assert "demo_workers 2" in text
+    assert "# TYPE demo_latency_seconds histogram" in text
+    assert 'demo_latency_seconds_bucket{channel="e\\"mail",le="0.001"} 1' in text
+    assert 'demo_latency_seconds_bucket{channel="e\\"mail",le="0.01"} 3' in text
+    assert 'demo_latency_seconds_bucket{channel="e\\"mail",le="+Inf"} 4' in text
+    assert 'demo_latency_seconds_count{channel="e\\"mail"} 4' in text
+    assert registry.counter("demo_sent_total", "Envois.", ["channel"]) is sent
+
+
+def test_cellules_des_threads_termines_repliees():
+    sent = Counter("demo_total", "Envois.").labels()
+    for _ in range(30):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: sent.inc(), range(20)))
+    assert sent.get() == 600
+    assert sent.cells() == 0
+    sent.inc(2)
+    assert sent.get() == 602 and sent.cells() == 1
+
+
+def test_dispatcher_et_canaux_instrumentes():
+    processed = REGISTRY.get("notify_jobs_processed_total").labels("urgent", "sent")
+    attempts = REGISTRY.get("notify_channel_attempts_total").labels("sms", "sent")
+    before_processed, before_attempts = processed.get(), attempts.get()
+
+    d = Dispatcher()
+    alert = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    for i in range(3):
+        d.schedule(alert, User(user_id=f"u{i}", phone="0812345678"), EmergencyNotifier())
+    assert 'notify_queue_depth{priority="urgent"} 3' in REGISTRY.render()
+
+    d.dispatch()
+    assert processed.get() - before_processed == 3
+    assert attempts.get() - before_attempts == 3
+    assert "notify_channel_latency_seconds_count" in REGISTRY.render()
+
+
+def test_clear_remet_a_zero_les_series_pre_resolues():
+    d = Dispatcher()
+    alert = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    d.schedule(alert, User(user_id="u1", phone="0812345678"), EmergencyNotifier())
+    d.dispatch()
+
+    REGISTRY.clear()
+    text = REGISTRY.render()
+    assert 'notify_jobs_processed_total{priority="urgent",outcome="sent"} 0' in text
+    assert 'notify_channel_latency_seconds_count{channel="sms"} 0' in text
+
+    # Les séries gardées par le dispatcher et les canaux sont toujours exportées
+    d.schedule(alert, User(user_id="u2", phone="0812345678"), EmergencyNotifier())
+    d.dispatch()
+    text = REGISTRY.render()
+    assert 'notify_jobs_processed_total{priority="urgent",outcome="sent"} 1' in text
+    assert 'notify_channel_attempts_total{channel="sms",status="sent"} 1' in text
+    assert 'notify_channel_latency_seconds_count{channel="sms"} 1' in text
+
+
+def test_transitions_des_disjoncteurs_exportees():
+    class Probe(CircuitBreakerMixin):
+        circuit_breaker_scope = "test-transitions"
+        circuit_breaker_settings = {"window": 1, "min_calls": 1, "open_seconds": 0}
+
+    breaker = Probe().channel_breaker("sms")
+    breaker.record(False)
+    breaker.allow()
+    breaker.record(True)
+    text = REGISTRY.render()
+    Probe.reset_circuit_breakers()
+
+    labels = 'channel="sms@test-transitions"'
+    assert f'notify_circuit_transitions_total{{{labels},from="closed",to="open"}} 1' in text
+    assert f'notify_circuit_transitions_total{{{labels},from="open",to="half_open"}} 1' in text
+    assert f'notify_circuit_transitions_total{{{labels},from="half_open",to="closed"}} 1' in text
@@ -0,0 +1,90 @@
+# tests/test_rate_limit.py
+"""
+Tests de la limitation de débit (token bucket) :
+- seau à jetons
+- canal saturé -> fallback immédiat sur le canal suivant
+- attente bornée pour URGENT / HIGH, part du débit par processus (shards)
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from core.models import User, Notification, Priority, DeliveryStatus
+from core.emergencies import EmergencyType
+from core.notifiers import EmergencyNotifier
+from mixins.rate_limit import RateLimitMixin, TokenBucket, set_process_share
+
+
+def test_token_bucket_rafale_puis_recharge():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=3, clock=lambda: now[0])
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.wait_time() == 0.5
+    now[0] = 0.5
+    assert bucket.try_acquire()
+    assert bucket.acquire(max_wait=0.0) is False
+    assert bucket.stats()["throttled"] == 1
+
+
+class ThrottledNotifier(EmergencyNotifier):
+    rate_limits = {"sms": (0.001, 2)}
+    rate_limit_account = "test-account"
+
+
+def test_canal_sature_bascule_sur_le_suivant():
+    RateLimitMixin.reset_rate_limits()
+    notifier = ThrottledNotifier()
+    user = User(user_id="u1", phone="0812345678", email="u1@campus.edu")
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+
+    channels = []
+    for _ in range(3):
+        results = notifier.send(n, user)
+        channels.append([(r.channel, r.status) for r in results])
+
+    assert channels[0] == [("sms", DeliveryStatus.SENT)]
+    assert channels[1] == [("sms", DeliveryStatus.SENT)]
+    assert channels[2] == [("sms", DeliveryStatus.SKIPPED), ("email", DeliveryStatus.SENT)]
+
+    stats = RateLimitMixin.rate_limit_stats()["sms@test-account"]
+    assert stats["acquired"] == 2
+    assert stats["throttled"] == 1
+    RateLimitMixin.reset_rate_limits()
+
+
+class BurstNotifier(EmergencyNotifier):
+    rate_limits = {"sms": (20, 1)}  # un jeton toutes les 50 ms
+    rate_limit_account = "test-burst"
+
+
+def test_urgent_attend_un_jeton_low_bascule():
+    RateLimitMixin.reset_rate_limits()
+    notifier = BurstNotifier()
+    user = User(user_id="u1", phone="0812345678", email="u1@campus.edu")
+
+    def channels(priority):
+        n = Notification(emergency_type=EmergencyType.SECURITY, priority=priority, message="Alerte")
+        return [(r.channel, r.status) for r in notifier.send(n, user)]
+
+    assert channels(Priority.URGENT) == [("sms", DeliveryStatus.SENT)]
+    # Seau vide : l'alerte URGENT attend le prochain jeton (~50 ms) au lieu de basculer
+    assert channels(Priority.URGENT) == [("sms", DeliveryStatus.SENT)]
+    assert channels(Priority.LOW) == [("sms", DeliveryStatus.SKIPPED), ("email", DeliveryStatus.SENT)]
+    assert RateLimitMixin.rate_limit_stats()["sms@test-burst"]["waited_s"] > 0
+    RateLimitMixin.reset_rate_limits()
+
+
+def test_part_du_debit_par_processus():
+    try:
+        set_process_share(0.25)
+        bucket = BurstNotifier().channel_bucket("sms")
+        assert bucket.rate == 5.0
+        assert bucket.capacity == 1.0  # au moins un jeton
+        with pytest.raises(ValueError):
+            set_process_share(0)
+    finally:
+        set_process_share(1.0)
+    assert BurstNotifier().channel_bucket("sms").rate == 20.0
+    RateLimitMixin.reset_rate_limits()
@@ -0,0 +1,44 @@
+# tests/test_results.py
+"""
+Tests du stockage en colonnes des résultats (DeliveryResultBatch).
+"""
+
+from __future__ import annotations
+
+import pickle
+
+from core.models import DeliveryResult, DeliveryStatus, Notification, Priority, User
+from core.emergencies import EmergencyType
+from core.dispatcher import Dispatcher
+from core.notifiers import EmergencyNotifier
+from core.results import DeliveryResultBatch
+
+
+def test_aller_retour_et_agregations():
+    results = [
+        DeliveryResult(notification_id="n1", user_id="a", channel="sms", status=DeliveryStatus.FAILED, error="timeout"),
+        DeliveryResult(notification_id="n1", user_id="a", channel="email", status=DeliveryStatus.SENT),
+        DeliveryResult(notification_id="n1", user_id="b", channel="sms", status=DeliveryStatus.SKIPPED),
+    ]
+    batch = DeliveryResultBatch(results)
+
+    assert len(batch) == 3
+    assert list(batch) == results
+    assert batch[-1] == results[2]
+    assert batch.counts_by_status() == {DeliveryStatus.FAILED: 1, DeliveryStatus.SENT: 1, DeliveryStatus.SKIPPED: 1}
+    assert batch.counts_by_channel() == {"sms": 2, "email": 1}
+    assert batch.counts()["sms"] == {DeliveryStatus.FAILED: 1, DeliveryStatus.SKIPPED: 1}
+    assert [r.error for r in batch.where(channel="sms", status=DeliveryStatus.FAILED)] == ["timeout"]
+    assert batch.success_rate() == 0.5
+
+
+def test_modeles_sans_dict_et_picklables():
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    assert not hasattr(n, "__dict__")
+    assert pickle.loads(pickle.dumps(n)) == n
+
+    d = Dispatcher()
+    d.schedule(n, User(user_id="u1", phone="0812345678"), EmergencyNotifier())
+    batch = DeliveryResultBatch()
+    assert d.dispatch_to(batch.append) == 1
+    assert batch.counts_by_status() == {DeliveryStatus.SENT: 1}
@@ -0,0 +1,110 @@
+# tests/test_retry.py
+"""
+Tests des nouvelles tentatives différées :
+- roue temporelle (jamais en avance)
+- RetryPolicy du Dispatcher (backoff sans bloquer les autres jobs)
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from core.models import User, UserPreferences, Notification, Priority, DeliveryStatus
+from core.emergencies import EmergencyType
+from core.dispatcher import Dispatcher, RetryPolicy
+from core.notifiers import EmergencyNotifier
+from mixins.circuit_breaker import CircuitBreakerMixin
+from priority.timer_wheel import TimerWheel
+
+
+@pytest.fixture(autouse=True)
+def _fresh_breakers():
+    # FlakySMSNotifier ouvre le disjoncteur sms partagé : chaque test repart d'un état fermé
+    CircuitBreakerMixin.reset_circuit_breakers()
+    yield
+    CircuitBreakerMixin.reset_circuit_breakers()
+
+
+def test_timer_wheel_echeances_et_tours_multiples():
+    now = [0.0]
+    wheel = TimerWheel(tick_seconds=1.0, slots=4, clock=lambda: now[0])
+    wheel.schedule("a", 1.0)
+    wheel.schedule("b", 2.5)
+    wheel.schedule("c", 9.0)  # plus de deux tours de roue
+    assert len(wheel) == 3
+
+    now[0] = 1.0
+    assert wheel.advance() == ["a"]
+    now[0] = 3.0
+    assert wheel.advance() == ["b"]
+    now[0] = 8.9
+    assert wheel.advance() == []
+    now[0] = 9.0
+    assert wheel.advance() == ["c"]
+    assert len(wheel) == 0
+
+
+def test_timer_wheel_jamais_en_avance():
+    now = [0.0]
+    wheel = TimerWheel(tick_seconds=1.0, slots=4, clock=lambda: now[0])
+    now[0] = 0.9  # fin du premier tick
+    wheel.schedule("x", 1.0)  # échéance exacte : 1.9
+    for t in (1.0, 1.5, 1.89):
+        now[0] = t
+        assert wheel.advance() == []
+    now[0] = 2.0  # au plus un tick de retard
+    assert wheel.advance() == ["x"]
+
+    wheel.schedule("y", 0.0)
+    assert wheel.advance() == []
+    now[0] = 3.0
+    assert wheel.advance() == ["y"]
+
+
+class FlakySMSNotifier(EmergencyNotifier):
+    """SMS en panne aux deux premiers appels."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def send_sms(self, notification, user):
+        self.calls += 1
+        if self.calls <= 2:
+            raise ConnectionError("gateway timeout")
+        return super().send_sms(notification, user)
+
+
+def test_retry_differe_ne_bloque_pas_les_autres_jobs():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.02, jitter=0.0)
+    d = Dispatcher(retry_policy=policy, retry_wheel=TimerWheel(tick_seconds=0.005))
+    prefs = UserPreferences(enabled_channels=["sms"])
+    flaky = FlakySMSNotifier()
+    alert = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    info = Notification(emergency_type=EmergencyType.ACADEMIC, priority=Priority.LOW, message="Info")
+
+    d.schedule(alert, User(user_id="flaky", phone="0812345678", preferences=prefs), flaky)
+    d.schedule(info, User(user_id="other", phone="0812345678"), EmergencyNotifier())
+
+    results = d.dispatch()
+    summary = [(r.user_id, r.status) for r in results]
+
+    # 1re tentative URGENT échoue, le job LOW passe pendant le backoff, puis 2 retries
+    assert summary == [
+        ("flaky", DeliveryStatus.FAILED),
+        ("other", DeliveryStatus.SENT),
+        ("flaky", DeliveryStatus.FAILED),
+        ("flaky", DeliveryStatus.SENT),
+    ]
+    assert d.retries_scheduled == 2
+
+
+def test_retry_mode_concurrent():
+    policy = RetryPolicy(max_attempts=2, base_delay=0.01, jitter=0.0)
+    d = Dispatcher(retry_policy=policy, retry_wheel=TimerWheel(tick_seconds=0.005))
+    prefs = UserPreferences(enabled_channels=["sms"])
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    d.schedule(n, User(user_id="flaky", phone="0812345678", preferences=prefs), FlakySMSNotifier())
+
+    results = d.dispatch_concurrent(max_workers=2)
+    assert [r.status for r in results] == [DeliveryStatus.FAILED, DeliveryStatus.FAILED]
+    assert d.retries_scheduled == 1
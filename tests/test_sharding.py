@@ -0,0 +1,123 @@
+# tests/test_sharding.py
+"""
+Tests du dispatch multi-processus (shards) :
+- fusion des flux, ordre par utilisateur
+- acquittement après les résultats du shard, shard arrêté détecté
+- RetryPolicy appliquée dans les shards, doublons filtrés par le parent
+"""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from core.models import DeliveryResult, User, Notification, Priority, DeliveryStatus
+from core.emergencies import EmergencyType
+from core.dispatcher import RetryPolicy
+from core.notifiers import EmergencyNotifier
+from core.sharding import ShardedDispatcher, shard_of
+from priority.coalescing import CoalescingIndex
+from priority.priority_handler import PriorityQueue
+
+
+def test_shard_of_est_stable():
+    assert shard_of("agent1", 8) == shard_of("agent1", 8)
+    assert 0 <= shard_of("agent1", 8) < 8
+
+
+def test_dispatch_shard_fusion_et_ordre_par_utilisateur():
+    d = ShardedDispatcher(shards=3, chunk_size=4)
+    notifier = EmergencyNotifier()
+    users = [User(user_id=f"u{i}", phone="0812345678") for i in range(20)]
+    low = Notification(emergency_type=EmergencyType.ACADEMIC, priority=Priority.LOW, message="Info")
+    urgent = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    d.schedule_audience(low, users, notifier)
+    d.schedule_audience(urgent, users, notifier)
+
+    results = d.dispatch()
+
+    assert len(results) == 40
+    assert all(r.status == DeliveryStatus.SENT for r in results)
+    # Pour chaque user, URGENT est livré avant LOW
+    for u in users:
+        mine = [r.notification_id for r in results if r.user_id == u.user_id]
+        assert mine == [urgent.notification_id, low.notification_id]
+    assert d.progress[Priority.URGENT] == {"scheduled": 20, "done": 20}
+    assert d.progress[Priority.LOW] == {"scheduled": 20, "done": 20}
+
+
+class _AckCountingQueue(PriorityQueue):
+    def __init__(self):
+        super().__init__()
+        self.acks = 0
+
+    def task_done(self, item):
+        self.acks += 1
+
+
+class CrashingNotifier(EmergencyNotifier):
+    def send(self, notification, user):
+        os._exit(3)  # arrêt brutal : pas de paquet de fin
+
+
+class FlakyNotifier(EmergencyNotifier):
+    calls = {}
+
+    def send(self, notification, user):
+        self.calls[user.user_id] = self.calls.get(user.user_id, 0) + 1
+        if self.calls[user.user_id] == 1:
+            return [DeliveryResult(notification_id=notification.notification_id, user_id=user.user_id,
+                                   channel="sms", status=DeliveryStatus.FAILED, error="Indisponible")]
+        return super().send(notification, user)
+
+
+def _alert() -> Notification:
+    return Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+
+
+def test_acquittement_apres_les_resultats_du_shard():
+    q = _AckCountingQueue()
+    d = ShardedDispatcher(shards=2, chunk_size=1, priority_queue=q)
+    for i in range(6):
+        d.schedule(_alert(), User(user_id=f"u{i}", phone="0812345678"), EmergencyNotifier())
+    stream = d.dispatch_iter()
+    next(stream)
+    assert q.acks == 1  # pas d'acquittement en bloc au partitionnement
+    assert len(list(stream)) == 5
+    assert q.acks == 6
+
+    # Une diffusion : un seul acquittement, une fois tous ses jobs terminés
+    d.schedule_audience(_alert(), [User(user_id=f"a{i}", phone="0812345678") for i in range(4)], EmergencyNotifier())
+    stream = d.dispatch_iter()
+    next(stream)
+    assert q.acks == 6
+    assert len(list(stream)) == 3
+    assert q.acks == 7
+
+
+def test_shard_arrete_sans_paquet_de_fin():
+    q = _AckCountingQueue()
+    d = ShardedDispatcher(shards=1, priority_queue=q, poll_interval=0.1)
+    d.schedule(_alert(), User(user_id="u1", phone="0812345678"), CrashingNotifier())
+    with pytest.raises(RuntimeError, match="exitcode 3"):
+        d.dispatch()
+    assert q.acks == 0
+
+
+def test_retry_policy_transmise_aux_shards():
+    d = ShardedDispatcher(shards=2, retry_policy=RetryPolicy(max_attempts=2, base_delay=0.01, jitter=0.0))
+    d.schedule_audience(_alert(), [User(user_id=f"u{i}", phone="0812345678") for i in range(4)], FlakyNotifier())
+    results = d.dispatch()
+    for i in range(4):
+        assert [r.status for r in results if r.user_id == f"u{i}"] == [DeliveryStatus.FAILED, DeliveryStatus.SENT]
+    assert d.progress[Priority.URGENT] == {"scheduled": 4, "done": 4}
+
+
+def test_doublons_filtres_avant_partitionnement():
+    d = ShardedDispatcher(shards=2, coalescer=CoalescingIndex(window=60.0))
+    alert = _alert()
+    users = [User(user_id=f"u{i}", phone="0812345678") for i in range(4)]
+    d.schedule(alert, users[0], EmergencyNotifier())
+    d.schedule_audience(alert, users, EmergencyNotifier())
+    assert sorted(r.user_id for r in d.dispatch()) == ["u0", "u1", "u2", "u3"]
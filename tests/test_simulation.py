@@ -0,0 +1,146 @@
+# tests/test_simulation.py
+"""
+Tests de la simulation de charge :
+- population et alertes déterministes (graine), opt-out respectés par l'index
+- fournisseurs simulés : erreurs -> fallback, limitation -> rejet 429
+- compteurs exacts sous threads, tirages reproductibles en séquentiel
+- rapport de run_simulation (threads et asyncio)
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.emergencies import EmergencyType
+from core.models import DeliveryStatus, Notification, Priority, User
+from simulation.channels import (
+    AsyncSimulatedEmergencyNotifier,
+    ChannelProfile,
+    ProviderThrottled,
+    SimulatedEmergencyNotifier,
+    constant,
+    uniform,
+)
+from simulation.population import (
+    AlertProfile,
+    PopulationProfile,
+    build_zone_index,
+    generate_alerts,
+    generate_population,
+)
+from simulation.runner import run_simulation
+
+
+@pytest.fixture(autouse=True)
+def _fresh_breakers():
+    SimulatedEmergencyNotifier.reset_circuit_breakers()
+    yield
+    SimulatedEmergencyNotifier.reset_circuit_breakers()
+
+
+def _user() -> User:
+    return User(user_id="u1", phone="0812345678", email="u1@campus.edu", push_token="tok")
+
+
+def test_population_deterministe_et_profil_respecte():
+    profile = PopulationProfile(phone_ratio=0.0, push_ratio=1.0, opt_out_ratio=0.5)
+    first = [(u.user_id, u.email, u.preferences.enabled_channels, z) for u, z in generate_population(300, profile, seed=3)]
+    again = [(u.user_id, u.email, u.preferences.enabled_channels, z) for u, z in generate_population(300, profile, seed=3)]
+    assert first == again
+
+    users = [u for u, _ in generate_population(300, profile, seed=3)]
+    assert all(u.phone is None and u.push_token for u in users)
+    assert 100 < sum(bool(u.preferences.opt_out_types) for u in users) < 200
+
+    index = build_zone_index(generate_population(300, profile, seed=3))
+    alert = Notification(emergency_type=EmergencyType.ACADEMIC, priority=Priority.LOW, message="Info", zone="campus")
+    audience = index.users_for(alert)
+    assert 0 < len(audience) < 300
+    assert all(EmergencyType.ACADEMIC not in u.preferences.opt_out_types for u in audience)
+
+    with pytest.raises(ValueError):
+        PopulationProfile(email_ratio=1.5)
+
+
+def test_alertes_selon_le_profil():
+    profile = AlertProfile(types={EmergencyType.WEATHER: 1.0}, zones={"campus/B": 1.0}, ttl_seconds=60)
+    alerts = list(generate_alerts(20, profile, seed=1))
+    assert {a.emergency_type for a in alerts} == {EmergencyType.WEATHER}
+    assert all(a.zone == "campus/B" and a.expires_at is not None for a in alerts)
+    assert [a.priority for a in alerts] == [a.priority for a in generate_alerts(20, profile, seed=1)]
+
+
+def test_erreur_fournisseur_declenche_le_fallback():
+    class SmsDown(SimulatedEmergencyNotifier):
+        channel_profiles = {"sms": ChannelProfile(error_rate=1.0)}
+        simulation_seed = 1
+
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    notifier = SmsDown()
+    results = notifier.send(n, _user())
+    assert results[0].channel == "sms" and results[0].status == DeliveryStatus.FAILED
+    assert results[-1].status == DeliveryStatus.SENT and results[-1].channel != "sms"
+    assert notifier.simulation_stats()["sms"]["errors"] >= 1
+
+
+def test_limitation_du_fournisseur():
+    class Throttled(SimulatedEmergencyNotifier):
+        channel_profiles = {"sms": ChannelProfile(latency=constant(0.0), throttle_rate=0.001, throttle_burst=2)}
+
+    notifier = Throttled()
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    notifier.simulate_call("sms", _user())
+    notifier.simulate_call("sms", _user())
+    with pytest.raises(ProviderThrottled):
+        notifier.simulate_call("sms", _user())
+    assert notifier.simulation_stats()["sms"]["throttled"] == 1
+    # Utilisateur sans téléphone : pas d'appel fournisseur, échec du canal de base
+    assert notifier.send_sms(n, User(user_id="u2")).status == DeliveryStatus.FAILED
+    assert notifier.simulation_stats()["sms"]["calls"] == 3
+
+
+def test_compteurs_exacts_sous_threads():
+    class Sim(SimulatedEmergencyNotifier):
+        channel_profiles = {"sms": ChannelProfile(latency=uniform(0.0, 1.0), error_rate=0.3)}
+        simulation_seed = 4
+
+    def draws(notifier, workers):
+        def call(_):
+            return notifier.provider_call("sms", _user())
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(call, range(4000)))
+
+    threaded = Sim()
+    outcomes = draws(threaded, 8)
+    stats = threaded.simulation_stats()["sms"]
+    assert stats["calls"] == 4000
+    assert stats["errors"] == sum(error is not None for _, error in outcomes)
+
+    # Un seul thread : mêmes tirages à graine égale
+    first, again = draws(Sim(), 1), draws(Sim(), 1)
+    assert [(d, e is None) for d, e in first] == [(d, e is None) for d, e in again]
+
+
+@pytest.mark.parametrize("mode", ["threads", "async"])
+def test_rapport_de_simulation(mode):
+    index = build_zone_index(generate_population(400, seed=5))
+    alerts = generate_alerts(3, AlertProfile(zones={"campus": 1.0}), seed=6)
+    notifier = AsyncSimulatedEmergencyNotifier() if mode == "async" else SimulatedEmergencyNotifier()
+    notifier.time_scale = 0.001
+    notifier.simulation_seed = 7
+
+    report = run_simulation(index, alerts, notifier=notifier, mode=mode, max_workers=16)
+
+    assert report.alerts == 3 and 0 < report.jobs <= 1200
+    assert report.attempts >= report.jobs
+    assert sum(sum(s.values()) for s in report.outcomes.values()) == report.attempts
+    assert 0.5 < report.delivered_ratio <= 1.0
+    assert report.jobs_per_s > 0
+    assert report.time_to_deliver_ms["p50_ms"] <= report.time_to_deliver_ms["p99_ms"]
+    assert report.providers["sms"]["calls"] > 0
+    assert "débit" in report.format()
+
+    with pytest.raises(ValueError):
+        run_simulation(index, [], mode="processes")
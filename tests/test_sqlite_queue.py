@@ -0,0 +1,130 @@
+# tests/test_sqlite_queue.py
+"""
+Tests de la file durable SQLite :
+- ordre par priorité
+- reprise après crash (bail expiré / même worker_id)
+- intégration Dispatcher (acquittement, ajout groupé)
+- diffusion découpée en tranches : reprise sans renvoyer toute l'audience
+"""
+
+from __future__ import annotations
+
+from core.models import User, Notification, Priority
+from core.emergencies import EmergencyType
+from core.dispatcher import Dispatcher
+from core.notifiers import EmergencyNotifier
+from priority.sqlite_queue import SQLitePriorityQueue
+
+
+def test_ordre_par_priorite(tmp_path):
+    q = SQLitePriorityQueue(str(tmp_path / "q.db"))
+    q.add("low", Priority.LOW)
+    q.add("urgent", Priority.URGENT)
+    q.add("high", Priority.HIGH)
+
+    assert len(q) == 3
+    assert [q.get_next() for _ in range(3)] == ["urgent", "high", "low"]
+    assert q.get_next() is None
+    q.close()
+
+
+def test_job_plus_urgent_apres_reservation(tmp_path):
+    q = SQLitePriorityQueue(str(tmp_path / "q.db"))
+    q.add_many(["low1", "low2"], Priority.LOW)
+    assert q.get_next() == "low1"  # low2 est réservé dans le buffer local
+    q.add("urgent", Priority.URGENT)
+    assert q.get_next() == "urgent"
+    assert q.get_next() == "low2"
+    q.close()
+
+
+def test_reprise_apres_crash(tmp_path):
+    path = str(tmp_path / "q.db")
+    now = [1000.0]
+
+    q1 = SQLitePriorityQueue(path, worker_id="w1", lease_seconds=30, clock=lambda: now[0])
+    q1.add_many(["a", "b", "c"], Priority.MEDIUM)
+    first = q1.get_next()
+    q1.task_done(first)
+    q1.flush()
+    # Crash : "b" et "c" sont réservés mais jamais acquittés (pas de close)
+
+    # Un autre worker ne les voit pas tant que le bail court...
+    q2 = SQLitePriorityQueue(path, worker_id="w2", clock=lambda: now[0])
+    assert q2.get_next() is None
+    # ... puis les reprend une fois le bail expiré
+    now[0] += 31
+    assert [q2.get_next(), q2.get_next(), q2.get_next()] == ["b", "c", None]
+
+    # Le même worker_id récupère immédiatement ses propres baux
+    q3 = SQLitePriorityQueue(path, worker_id="w2", clock=lambda: now[0])
+    assert q3.get_next() == "b"
+
+
+def test_dispatcher_acquitte_les_jobs(tmp_path):
+    path = str(tmp_path / "q.db")
+    q = SQLitePriorityQueue(path)
+    d = Dispatcher(priority_queue=q)
+    n = Notification(emergency_type=EmergencyType.SECURITY, priority=Priority.URGENT, message="Alerte")
+    for i in range(3):
+        d.schedule(n, User(user_id=f"u{i}", phone="0812345678"), EmergencyNotifier())
+
+    results = d.dispatch()
+    assert [r.user_id for r in results] == ["u0", "u1", "u2"]
+    assert len(q) == 0
+    q.close()
+
+
+def test_echeances_edf(tmp_path):
+    q = SQLitePriorityQueue(str(tmp_path / "q.db"))
+    q.add("sans", Priority.HIGH)
+    q.add("tard", Priority.HIGH, deadline=200.0)
+    q.add("tot", Priority.HIGH, deadline=100.0)
+
+    assert [q.get_next() for _ in range(3)] == ["tot", "tard", "sans"]
+    q.close()
+
+
+def test_ajouts_durables_sans_flush(tmp_path):
+    path = str(tmp_path / "q.db")
+    d = Dispatcher(priority_queue=SQLitePriorityQueue(path, worker_id="w1"))
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    for i in range(10):
+        d.schedule(n, User(user_id=f"u{i}", phone="0812345678"), EmergencyNotifier())
+    # Audience fournie par un générateur : figée en liste à l'ajout
+    d.schedule_audience(n, (User(user_id=f"a{i}", phone="0812345678") for i in range(3)), EmergencyNotifier())
+
+    # Crash : ni flush ni close, puis reprise avec le même worker_id
+    reopened = SQLitePriorityQueue(path, worker_id="w1")
+    assert len(reopened) == 11
+    results = Dispatcher(priority_queue=reopened).dispatch()
+    assert sorted(r.user_id for r in results) == sorted([f"u{i}" for i in range(10)] + ["a0", "a1", "a2"])
+
+
+def test_schedule_many_une_transaction(tmp_path):
+    q = SQLitePriorityQueue(str(tmp_path / "q.db"))
+    d = Dispatcher(priority_queue=q)
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    assert d.schedule_many(n, [User(user_id=f"u{i}", phone="0812345678") for i in range(50)], EmergencyNotifier()) == 50
+    assert len(q) == 50
+    assert [r.user_id for r in d.dispatch()] == [f"u{i}" for i in range(50)]
+    assert len(q) == 0
+    q.close()
+
+
+def test_diffusion_reprise_par_tranche(tmp_path):
+    path = str(tmp_path / "q.db")
+    q = SQLitePriorityQueue(path, worker_id="w1", batch_size=1, audience_chunk=2)
+    d = Dispatcher(priority_queue=q)
+    n = Notification(emergency_type=EmergencyType.WEATHER, priority=Priority.HIGH, message="Orage")
+    d.schedule_audience(n, [User(user_id=f"a{i}", phone="0812345678") for i in range(5)], EmergencyNotifier())
+    assert len(q) == 3  # tranches a0-a1, a2-a3, a4
+
+    stream = d.dispatch_iter()
+    # a0, a1 (première tranche acquittée en passant à la suivante), puis a2
+    assert [next(stream).user_id for _ in range(3)] == ["a0", "a1", "a2"]
+    # Crash pendant la deuxième tranche
+    reopened = SQLitePriorityQueue(path, worker_id="w1")
+    assert len(reopened) == 2
+    results = Dispatcher(priority_queue=reopened).dispatch()
+    assert [r.user_id for r in results] == ["a2", "a3", "a4"]
@@ -0,0 +1,109 @@
+# tests/test_tracing.py
+"""
+Tests des traces :
+- chaîne schedule -> job -> notifier.send -> channel.attempt dans une même trace
+- retries différés, fan-out multi-threads, asyncio
+- échantillonnage en tête et export JSONL
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from core import tracing
+from core.models import User, UserPreferences, Notification, Priority
+from core.emergencies import EmergencyType
+from core.dispatcher import Dispatcher, RetryPolicy
+from core.async_dispatcher import AsyncDispatcher
+from core.notifiers import AsyncEmergencyNotifier, CampusSecurityNotifier, EmergencyNotifier
+from priority.timer_wheel import TimerWheel
+
+
+@pytest.fixture
+def exporter():
+    exporter = tracing.configure_tracing(sample_rate=1.0)
+    yield exporter
+    tracing.shutdown_tracing()
+
+
+def _alert(priority=Priority.HIGH, emergency_type=EmergencyType.WEATHER):
+    return Notification(emergency_type=emergency_type, priority=priority, message="Alerte")
+
+
+def _by_name(spans):
+    out = {}
+    for s in spans:
+        out.setdefault(s.name, []).append(s)
+    return out
+
+
+def test_trace_de_bout_en_bout(exporter):
+    d = Dispatcher()
+    d.schedule(_alert(), User(user_id="u1", email="u1@campus.test"), EmergencyNotifier())
+    results = d.dispatch()
+
+    schedule = _by_name(exporter.spans())["dispatcher.schedule"][0]
+    spans = _by_name(exporter.trace(schedule.trace_id))
+    job, send = spans["dispatcher.job"][0], spans["notifier.send"][0]
+    assert job.parent_id == schedule.span_id and send.parent_id == job.span_id
+    assert job.attributes["wait_ms"] >= 0
+    assert job.attributes["delivery_ids"] == [r.delivery_id for r in results]
+
+    attempts = spans["channel.attempt"]
+    assert [a.attributes["channel"] for a in attempts] == ["sms", "email"]
+    assert attempts[0].status == "error"  # pas de téléphone
+    assert attempts[1].attributes["status"] == "sent"
+    assert all(a.parent_id == send.span_id for a in attempts)
+
+
+def test_retry_et_fanout_dans_la_meme_trace(exporter):
+    class FlakyNotifier(CampusSecurityNotifier):
+        calls = 0
+
+        def send_sms(self, notification, user):
+            FlakyNotifier.calls += 1
+            raise ConnectionError("gateway timeout")
+
+    d = Dispatcher(retry_policy=RetryPolicy(max_attempts=2, base_delay=0.01, jitter=0.0),
+                   retry_wheel=TimerWheel(tick_seconds=0.005))
+    user = User(user_id="u1", phone="0812345678", preferences=UserPreferences(enabled_channels=["sms", "push"]))
+    d.schedule(_alert(Priority.URGENT, EmergencyType.SECURITY), user, FlakyNotifier())
+    d.dispatch()
+
+    trace_id = _by_name(exporter.spans())["dispatcher.schedule"][0].trace_id
+    spans = _by_name(exporter.trace(trace_id))
+    assert [j.attributes["attempt"] for j in spans["dispatcher.job"]] == [1, 2]
+    assert spans["dispatcher.retry"][0].attributes["delay_ms"] == 10.0
+    # Fan-out sur le pool de threads : les tentatives restent rattachées à la trace
+    assert len(spans["channel.attempt"]) == 4
+
+
+def test_async_et_echantillonnage(exporter):
+    d = AsyncDispatcher()
+    d.schedule(_alert(), User(user_id="u1", phone="0812345678"), AsyncEmergencyNotifier())
+    asyncio.run(d.dispatch())
+    names = {s.name for s in exporter.spans()}
+    assert {"dispatcher.job", "notifier.send", "channel.attempt"} <= names
+
+    exporter.clear()
+    tracing.configure_tracing(sample_rate=0.0, exporter=exporter)
+    d = Dispatcher()
+    d.schedule(_alert(), User(user_id="u1", phone="0812345678"), EmergencyNotifier())
+    d.dispatch()
+    assert exporter.spans() == []
+
+
+def test_export_jsonl(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracing.configure_tracing(exporter=tracing.JsonlFileExporter(str(path)))
+    try:
+        EmergencyNotifier().send(_alert(), User(user_id="u1", phone="0812345678"))
+    finally:
+        tracing.shutdown_tracing()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["channel.attempt", "notifier.send"]
+    assert lines[0]["parent_id"] == lines[1]["span_id"] and lines[1]["parent_id"] is None
@@ -157,3 +157,13 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 LOGIN_URL = "/login/"
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/login/"
+
+# ============================================================
+# MÉTRIQUES PROMETHEUS (/metrics/)
+# ============================================================
+
+# Le scraper n'a pas de session : accès par adresse autorisée ou par jeton
+# (en-tête "Authorization: Bearer <jeton>"). Un membre du staff connecté
+# peut aussi consulter la page.
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+METRICS_TOKEN = os.environ.get("NOTIFY_METRICS_TOKEN") or None
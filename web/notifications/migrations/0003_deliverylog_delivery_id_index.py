@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_deliverylog_confirmed_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='deliverylog',
+            name='delivery_id',
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+    ]
@@ -41,7 +41,7 @@ class DeliveryLog(models.Model):
     channel = models.CharField(max_length=30)
     status = models.CharField(max_length=30)  # sent/failed/pending_confirmation/confirmed
     error = models.TextField(blank=True, default="")
-    delivery_id = models.CharField(max_length=64)
+    delivery_id = models.CharField(max_length=64, db_index=True)
 
     # Confirmation
     confirmed_at = models.DateTimeField(blank=True, null=True)
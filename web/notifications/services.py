@@ -25,7 +25,7 @@ def dispatch_from_form(data: Dict[str, Any]) -> List[Dict[str, Any]]:
 
     1) Construire User + Notification (objets métier)
     2) Appeler Dispatcher + EmergencyNotifier (moteur POO)
-    3) Logger NotificationLog + DeliveryLog en SQLite
+    3) Logger NotificationLog + DeliveryLog en SQLite (au fil des résultats)
     4) Retourner résultats sérialisés pour l'UI
     """
 
@@ -53,31 +53,9 @@ def dispatch_from_form(data: Dict[str, Any]) -> List[Dict[str, Any]]:
     dispatcher = Dispatcher()
 
     dispatcher.schedule(notification=notif, user=user, notifier=notifier)
-    results = dispatcher.dispatch()
 
-    # 4) Statut global simple : au moins une livraison "sent" => sent, sinon failed
-    serialized = []
-    has_sent = False
-
-    for r in results:
-        status_str = r.status.value if hasattr(r.status, "value") else str(r.status)
-        if status_str == "sent":
-            has_sent = True
-
-        serialized.append(
-            {
-                "notification_id": r.notification_id,
-                "user_id": r.user_id,
-                "channel": r.channel,
-                "status": status_str,
-                "error": r.error,
-                "delivery_id": r.delivery_id,
-            }
-        )
-
-    global_status = "sent" if has_sent else "failed"
-
-    # 5) Persister en DB (snapshot)
+    # 4) Persister en DB (snapshot) : la notification d'abord,
+    #    puis chaque tentative dès qu'elle est produite (streaming)
     nlog = NotificationLog.objects.create(
         user_id=user.user_id,
         email=user.email or "",
@@ -87,10 +65,27 @@ def dispatch_from_form(data: Dict[str, Any]) -> List[Dict[str, Any]]:
         priority=priority.name,
         message=notif.message,
         zone=notif.zone or "",
-        global_status=global_status,
     )
 
-    for row in serialized:
+    # 5) Statut global simple : au moins une livraison "sent" => sent, sinon failed
+    serialized = []
+    has_sent = False
+
+    for r in dispatcher.dispatch_iter():
+        status_str = r.status.value if hasattr(r.status, "value") else str(r.status)
+        if status_str == "sent":
+            has_sent = True
+
+        row = {
+            "notification_id": r.notification_id,
+            "user_id": r.user_id,
+            "channel": r.channel,
+            "status": status_str,
+            "error": r.error,
+            "delivery_id": r.delivery_id,
+        }
+        serialized.append(row)
+
         DeliveryLog.objects.create(
             notification=nlog,
             channel=row["channel"],
@@ -99,4 +94,7 @@ def dispatch_from_form(data: Dict[str, Any]) -> List[Dict[str, Any]]:
             delivery_id=row["delivery_id"],
         )
 
+    nlog.global_status = "sent" if has_sent else "failed"
+    nlog.save(update_fields=["global_status"])
+
     return serialized
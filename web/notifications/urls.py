@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import dashboard, dispatch_submit, history, detail
-from .views import confirm_delivery
+from .views import confirm_delivery, metrics
 
 urlpatterns = [
     path("", dashboard, name="dashboard"),
@@ -8,4 +8,5 @@ urlpatterns = [
     path("history/", history, name="history"),
     path("history/<int:notification_id>/", detail, name="detail"),
       path("confirm/<str:delivery_id>/", confirm_delivery, name="confirm_delivery"),
+    path("metrics/", metrics, name="metrics"),
 ]
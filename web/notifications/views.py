@@ -21,7 +21,13 @@ from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from .models import DeliveryLog
 
+import hmac
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, HttpResponseForbidden
+
+from core.metrics import REGISTRY, CONTENT_TYPE
 
 
 @login_required
@@ -120,3 +126,27 @@ def confirm_delivery(request, delivery_id: str):
 
     # Retour vers la page détails de la notification
     return redirect("detail", notification_id=d.notification_id)
+
+
+def _metrics_allowed(request) -> bool:
+    """Adresse dans METRICS_ALLOWED_IPS, jeton METRICS_TOKEN valide, ou staff connecté."""
+    if request.META.get("REMOTE_ADDR") in getattr(settings, "METRICS_ALLOWED_IPS", ()):
+        return True
+    token = getattr(settings, "METRICS_TOKEN", None)
+    scheme, _, supplied = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+    if token and scheme.lower() == "bearer" and hmac.compare_digest(supplied.strip(), token):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    GET /metrics/
+    Métriques du moteur au format texte Prometheus.
+    Le scraper n'a pas de session : accès réservé aux adresses autorisées et
+    au jeton (settings.METRICS_ALLOWED_IPS / METRICS_TOKEN), ou au staff connecté.
+    """
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden("Accès aux métriques refusé.")
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)